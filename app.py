@@ -1,32 +1,199 @@
-import json
 import os
-from flask import Flask, request, jsonify, Response, send_from_directory
+import threading
+import uuid
+from functools import partial
+from flask import Blueprint, Flask, current_app, request, jsonify, Response, send_from_directory, g
 from flask_cors import CORS
 
-from planner.planner import Planner
-from orchestrator import Orchestrator
+from jobs.job_queue import QueueFull
+from observability.metrics import registry
+from worker.document import Document
 
-app = Flask(__name__, static_folder=".", static_url_path="")
-CORS(app)
+SESSION_COOKIE = "orchestrator_session"
 
-# In-memory storage for uploaded document text
-uploaded_text = {"content": ""}
+# Seconds a /run job may go without a connected client before it is cancelled
+ABANDON_GRACE = 10
 
-planner = Planner()
-orchestrator = Orchestrator()
+# WSGI environ key an async server sets to a callable taking the async frame
+# generator of an SSE response; it then streams the frames on its event loop
+ASYNC_SSE = "orchestrator.async_sse"
 
+SAMPLE_DOCUMENT = Document(
+    "This is sample content for demonstration purposes. "
+    "The AI Task Orchestration System separates planning from execution. "
+    "Workers process tasks independently with confidence scoring. "
+    "The assembler combines results and surfaces uncertainty explicitly. "
+    "Failures are isolated and visible. Retries are bounded. "
+    "Source-of-Truth data is preferred when available. "
+    "Model knowledge is used as a fallback for reasoning tasks."
+)
 
-@app.route("/")
+
+def _config_from_env() -> dict:
+    return {
+        # Episodic memory of executed plans; set ORCHESTRATOR_PLAN_DB to relocate it
+        "plan_db": os.environ.get("ORCHESTRATOR_PLAN_DB", "plans.db"),
+        # Extra planning rules, reloaded when the file changes; set ORCHESTRATOR_PLAN_RULES to enable
+        "plan_rules": os.environ.get("ORCHESTRATOR_PLAN_RULES"),
+        # Threads executing queued plans
+        "job_workers": int(os.environ.get("ORCHESTRATOR_JOB_WORKERS", 4)),
+        # Admission limits: jobs waiting overall, and queued or running per session
+        "job_max_depth": int(os.environ.get("ORCHESTRATOR_JOB_MAX_DEPTH", 64)),
+        "job_max_per_client": int(os.environ.get("ORCHESTRATOR_JOB_MAX_PER_CLIENT", 8)),
+        # Pool for parallel plans: "thread", or "process" for CPU-bound handlers on large documents
+        "executor": os.environ.get("ORCHESTRATOR_EXECUTOR", "thread"),
+    }
+
+
+class Services:
+    """
+    The components behind the routes, each built on first use: importing the
+    app (and NumPy, the process pools and the plan database with it) stays
+    cheap, so a server starts accepting connections right away.
+    """
+
+    def __init__(self, config: dict):
+        self.config = config
+        self._built = {}
+        self._lock = threading.RLock()
+
+    def _get(self, name, build):
+        with self._lock:
+            if name not in self._built:
+                self._built[name] = build()
+            return self._built[name]
+
+    @property
+    def corpus(self):
+        """Inverted index over every uploaded source, updated on upload and delete."""
+        from memory.index import CorpusIndex
+        return self._get("corpus", CorpusIndex)
+
+    @property
+    def documents(self):
+        """Uploaded documents, keyed by session and document ID."""
+        from memory.document_store import DocumentStore
+        return self._get("documents", lambda: DocumentStore(index=self.corpus))
+
+    @property
+    def plans(self):
+        from memory.plan_store import PlanStore
+        return self._get("plans", lambda: PlanStore(self.config["plan_db"]))
+
+    @property
+    def costs(self):
+        """
+        Per-task cost estimates by type and document size, calibrated by every handler
+        run; the planner balances workers with them and the orchestrator orders ready tasks.
+        """
+        from planner.cost_model import CostModel
+        return self._get("costs", CostModel)
+
+    @property
+    def planner(self):
+        from planner.planner import Planner
+        return self._get("planner", lambda: Planner(
+            store=self.plans, rules_path=self.config["plan_rules"], cost_model=self.costs,
+        ))
+
+    @property
+    def orchestrator(self):
+        from orchestrator import Orchestrator
+        from worker.cache import ResultCache
+        from worker.mapreduce import MapReduceRunner
+        return self._get("orchestrator", lambda: Orchestrator(
+            executor=self.config["executor"],
+            cache=ResultCache(max_entries=512, ttl=3600),
+            map_reduce=MapReduceRunner(),
+            plan_store=self.plans,
+            index=self.corpus,
+            cost_model=self.costs,
+        ))
+
+    @property
+    def jobs(self):
+        """Queued executions for /run and /jobs: a fixed worker pool with per-session fairness."""
+        from jobs.job_queue import JobQueue
+        return self._get("jobs", lambda: JobQueue(
+            self.orchestrator,
+            workers=self.config["job_workers"],
+            max_depth=self.config["job_max_depth"],
+            max_per_client=self.config["job_max_per_client"],
+        ))
+
+    @property
+    def progress(self):
+        """
+        SSE progress channel: worker updates coalesced per 100ms window and sent as deltas,
+        heartbeat comments after 15s idle, results over 32KB gzip-compressed.
+        """
+        from jobs.progress import ProgressStream
+        return self._get("progress", lambda: ProgressStream(window=0.1, heartbeat=15, compress_above=32 * 1024))
+
+    def shutdown(self, timeout=None):
+        """
+        Stop taking jobs and let the queued and running ones finish (for up
+        to timeout seconds), then release pools and the plan database.
+        Only components that were ever built are touched.
+        """
+        with self._lock:
+            built = dict(self._built)
+        if "jobs" in built:
+            built["jobs"].shutdown(drain=True, timeout=timeout)
+        if "orchestrator" in built:
+            built["orchestrator"].shutdown()
+            built["orchestrator"].map_reduce.shutdown()
+        if "plans" in built:
+            built["plans"].close()
+
+
+bp = Blueprint("orchestrator", __name__)
+
+
+def create_app(config: dict = None) -> Flask:
+    """
+    Build the Flask app. config overrides the ORCHESTRATOR_* environment
+    settings; components are created lazily on first request (see Services).
+    """
+    app = Flask(__name__, static_folder=".", static_url_path="")
+    CORS(app)
+    app.extensions["orchestrator"] = Services(dict(_config_from_env(), **(config or {})))
+    app.register_blueprint(bp)
+    return app
+
+
+def services() -> Services:
+    """The current app's Services."""
+    return current_app.extensions["orchestrator"]
+
+
+@bp.before_request
+def load_session():
+    """Identify the caller's session from the X-Session-ID header or session cookie."""
+    g.session_id = request.headers.get("X-Session-ID") or request.cookies.get(SESSION_COOKIE)
+    g.new_session = not g.session_id
+    if g.new_session:
+        g.session_id = uuid.uuid4().hex
+
+
+@bp.after_request
+def save_session(response):
+    if g.get("new_session"):
+        response.set_cookie(SESSION_COOKIE, g.session_id, httponly=True, samesite="Lax")
+    return response
+
+
+@bp.route("/")
 def serve_index():
     """Serve the main dashboard."""
     return send_from_directory(".", "index.html")
 
 
-@app.route("/plan", methods=["POST"])
+@bp.route("/plan", methods=["POST"])
 def create_plan():
     """
     POST /plan
-    Body: { "intent": "Summarize the document" }
+    Body: { "intent": "Summarize the document", "document_id": "..." (optional) }
     Returns: { "plan": { ... } }
     """
     data = request.get_json(force=True)
@@ -35,98 +202,316 @@ def create_plan():
     if not intent:
         return jsonify({"error": "Intent is required"}), 400
 
-    num_sources = 1 if uploaded_text["content"] else 0
-    plan = planner.create_plan(intent, num_sources)
+    stored = services().documents.get(g.session_id, data.get("document_id"))
+    if stored:
+        plan = services().planner.create_plan(intent, len(stored.sources), stored.size)
+    else:
+        plan = services().planner.create_plan(intent, 0, len(SAMPLE_DOCUMENT))
 
     return jsonify({"plan": plan})
 
 
-@app.route("/upload", methods=["POST"])
+@bp.route("/upload", methods=["POST"])
 def upload_files():
     """
     POST /upload
-    Body: multipart/form-data with file(s), OR JSON with { "text": "..." } for pasted text
-    Returns: { "sources": [ { name, type, size, status } ] }
+    Body: multipart/form-data with file(s), OR JSON with { "text": "..." } for pasted text.
+    Pass "document_id" (form field or JSON key) to add sources to an existing document.
+    Returns: { "document_id": str, "sources": [ { name, type, size, status } ] }
     """
     sources = []
+    loaded = []
 
     # Handle JSON body (pasted text or URL)
     if request.is_json:
         data = request.get_json(force=True)
         text = data.get("text", "")
-        name = data.get("name", "Pasted Text")
-        source_type = data.get("type", "paste")
+        document_id = data.get("document_id")
 
         if text:
-            uploaded_text["content"] = text
-            sources.append({
-                "name": name,
-                "type": source_type,
-                "size": len(text),
-                "status": "loaded",
-            })
-        return jsonify({"sources": sources})
-
-    # Handle file uploads
-    files = request.files.getlist("files")
-    combined_text = []
-
-    for f in files:
-        try:
-            content = f.read().decode("utf-8", errors="ignore")
-            combined_text.append(content)
-            sources.append({
-                "name": f.filename,
-                "type": f.filename.rsplit(".", 1)[-1] if "." in f.filename else "txt",
-                "size": len(content),
-                "status": "loaded",
-            })
-        except Exception as e:
-            sources.append({
-                "name": f.filename,
-                "type": "unknown",
-                "size": 0,
-                "status": "error",
-                "error": str(e),
-            })
-
-    if combined_text:
-        uploaded_text["content"] = "\n\n---\n\n".join(combined_text)
-
-    return jsonify({"sources": sources})
-
-
-@app.route("/run", methods=["POST"])
-def run_orchestration():
+            loaded.append(services().documents.spool_source(
+                data.get("name", "Pasted Text"), data.get("type", "paste"), text
+            ))
+    else:
+        document_id = request.form.get("document_id")
+
+        # Handle file uploads, streamed to disk in bounded chunks
+        for f in request.files.getlist("files"):
+            try:
+                loaded.append(services().documents.spool_source(
+                    f.filename,
+                    f.filename.rsplit(".", 1)[-1] if "." in f.filename else "txt",
+                    f.stream,
+                ))
+            except Exception as e:
+                sources.append({
+                    "name": f.filename,
+                    "type": "unknown",
+                    "size": 0,
+                    "status": "error",
+                    "error": str(e),
+                })
+
+    if not loaded:
+        return jsonify({"document_id": document_id, "sources": sources})
+
+    stored = services().documents.add_sources(g.session_id, loaded, document_id)
+
+    return jsonify({"document_id": stored.id, "sources": [s.describe() for s in loaded] + sources})
+
+
+def _load_run(data):
     """
-    POST /run
-    Body: { "plan": { ... } }
-    Returns: Server-Sent Events stream of worker updates + final result
+    Validate a run request's plan and resolve its document.
+    Returns (plan, document, sources, None), or (None, None, None, error response).
     """
-    data = request.get_json(force=True)
     plan = data.get("plan", {})
 
     if not plan.get("tasks"):
-        return jsonify({"error": "No tasks in plan"}), 400
-
-    document_text = uploaded_text.get("content", "")
-
-    if not document_text:
-        document_text = (
-            "This is sample content for demonstration purposes. "
-            "The AI Task Orchestration System separates planning from execution. "
-            "Workers process tasks independently with confidence scoring. "
-            "The assembler combines results and surfaces uncertainty explicitly. "
-            "Failures are isolated and visible. Retries are bounded. "
-            "Source-of-Truth data is preferred when available. "
-            "Model knowledge is used as a fallback for reasoning tasks."
-        )
-
-    def generate():
-        for update in orchestrator.run(plan, document_text):
-            yield f"data: {json.dumps(update)}\n\n"
-
-    return Response(generate(), mimetype="text/event-stream")
+        return None, None, None, (jsonify({"error": "No tasks in plan"}), 400)
+
+    try:
+        services().orchestrator.validate_plan(plan)
+    except ValueError as e:
+        return None, None, None, (jsonify({"error": str(e)}), 400)
+
+    document_id = data.get("document_id")
+    stored = services().documents.get(g.session_id, document_id)
+
+    if stored is None and document_id:
+        return None, None, None, (jsonify({"error": f"Unknown document: {document_id}"}), 404)
+
+    if stored is None:
+        return plan, SAMPLE_DOCUMENT, [], None
+    return plan, stored.document(), stored.source_documents(), None
+
+
+def _submit(plan, document, sources, abandon_after=None):
+    """Queue a run for the caller's session; returns (job, None) or (None, 429 response)."""
+    try:
+        return services().jobs.submit(g.session_id, plan, document, sources, abandon_after), None
+    except QueueFull as e:
+        response = jsonify({"error": str(e)})
+        response.headers["Retry-After"] = "5"
+        return None, (response, 429)
+
+
+def _stream(job):
+    """
+    SSE progress response for a job. Resumes after the Last-Event-ID header
+    (or last_event_id query parameter); ?window= overrides the coalescing window in seconds.
+    """
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    window = request.args.get("window", type=float)
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        last_event_id = None
+
+    progress = services().progress
+    handoff = request.environ.get(ASYNC_SSE)
+    if handoff is not None:
+        # The async server streams the frames itself, without holding this thread
+        handoff(partial(progress.aframes, job, last_event_id, window))
+        body = ()
+    else:
+        body = progress.frames(job, last_event_id, window)
+
+    response = Response(body, mimetype="text/event-stream")
+    response.headers["X-Job-ID"] = job.id
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+@bp.route("/run", methods=["POST"])
+def run_orchestration():
+    """
+    POST /run
+    Body: { "plan": { ... }, "document_id": "..." (optional, defaults to the latest upload) }
+    Returns: Server-Sent Events progress stream (see ProgressStream) for a queued job
+    whose ID is in the X-Job-ID header; resume it from GET /jobs/<id>/events.
+    The job is cancelled if no client is connected to it for ABANDON_GRACE seconds.
+    429 if the job queue is full.
+    """
+    plan, document, sources, error = _load_run(request.get_json(force=True))
+    if error:
+        return error
+
+    job, error = _submit(plan, document, sources, abandon_after=ABANDON_GRACE)
+    if error:
+        return error
+    return _stream(job)
+
+
+def _session_job(job_id):
+    """The caller's job by ID; other sessions' jobs are reported as missing."""
+    job = services().jobs.get(job_id)
+    if job is None or job.client_id != g.session_id:
+        return None
+    return job
+
+
+@bp.route("/jobs", methods=["POST"])
+def submit_job():
+    """
+    POST /jobs
+    Body: same as /run
+    Returns: 202 { "job_id": str, "status": "queued" }, or 429 if the queue is full
+    """
+    plan, document, sources, error = _load_run(request.get_json(force=True))
+    if error:
+        return error
+
+    job, error = _submit(plan, document, sources)
+    if error:
+        return error
+    return jsonify({"job_id": job.id, "status": job.status}), 202
+
+
+@bp.route("/jobs/<job_id>", methods=["GET"])
+def job_status(job_id):
+    """
+    GET /jobs/<job_id>
+    Returns: { job_id, status, events, error, created_at, started_at, finished_at }
+    """
+    job = _session_job(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown job: {job_id}"}), 404
+    return jsonify(job.describe())
+
+
+@bp.route("/jobs/<job_id>", methods=["DELETE"])
+def cancel_job(job_id):
+    """
+    DELETE /jobs/<job_id>
+    Cancels the job; a running job stops its tasks and finishes with partial results.
+    Returns: { job_id, status, ... }
+    """
+    job = _session_job(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown job: {job_id}"}), 404
+    job.cancel()
+    return jsonify(job.describe())
+
+
+@bp.route("/jobs/<job_id>/result", methods=["GET"])
+def job_result(job_id):
+    """
+    GET /jobs/<job_id>/result
+    Returns: the final result event once complete; 202 with the status while pending
+    """
+    job = _session_job(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown job: {job_id}"}), 404
+    if not job.finished:
+        return jsonify(job.describe()), 202
+    if job.status == "failed" or job.result is None:
+        return jsonify({"error": job.error, "job_id": job.id, "status": job.status}), 500
+    return jsonify(job.result)
+
+
+@bp.route("/jobs/<job_id>/events", methods=["GET"])
+def job_events(job_id):
+    """
+    GET /jobs/<job_id>/events
+    Returns: Server-Sent Events progress stream of the job, from the start or after
+    Last-Event-ID, closing after the final result
+    """
+    job = _session_job(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown job: {job_id}"}), 404
+    return _stream(job)
+
+
+@bp.route("/documents/<document_id>", methods=["DELETE"])
+def delete_document(document_id):
+    """
+    DELETE /documents/<document_id>
+    Removes the document's spool files and drops its sources from the corpus index.
+    Returns: { "document_id": str, "deleted": true }; 404 if unknown,
+    409 with the "job_ids" still queued or running against it
+    """
+    stored = services().documents.get(g.session_id, document_id)
+    if stored is None:
+        return jsonify({"error": f"Unknown document: {document_id}"}), 404
+
+    paths = set(stored.paths)
+    busy = [
+        job.id for job in services().jobs.active(g.session_id)
+        if any(getattr(d, "path", None) in paths for d in [job.document, *(job.sources or [])])
+    ]
+    if busy:
+        return jsonify({"error": "Document is in use by unfinished jobs", "job_ids": busy}), 409
+
+    services().documents.delete(g.session_id, document_id)
+    return jsonify({"document_id": document_id, "deleted": True})
+
+
+def _index_scope():
+    """Index keys of the caller's document (?document_id=, default the latest upload), or an error response."""
+    document_id = request.args.get("document_id")
+    stored = services().documents.get(g.session_id, document_id)
+    if stored is None:
+        return None, (jsonify({"error": f"Unknown document: {document_id}" if document_id else "No document uploaded"}), 404)
+    return [s.path for s in stored.sources], None
+
+
+@bp.route("/index/terms", methods=["GET"])
+def index_terms():
+    """
+    GET /index/terms?document_id=...&k=10
+    Returns: { "terms": [ { term, score } ] } ranked by TF-IDF across the document's sources
+    """
+    keys, error = _index_scope()
+    if error:
+        return error
+    terms = services().corpus.top_terms(keys, request.args.get("k", 10, type=int))
+    return jsonify({"terms": [{"term": term, "score": score} for term, score in terms]})
+
+
+@bp.route("/index/sources", methods=["GET"])
+def index_sources():
+    """
+    GET /index/sources?term=...&document_id=...
+    Returns: { "term": str, "sources": [ { name, occurrences } ] } for the sources mentioning term
+    """
+    term = request.args.get("term", "").strip()
+    if not term:
+        return jsonify({"error": "term is required"}), 400
+    keys, error = _index_scope()
+    if error:
+        return error
+    hits = services().corpus.sources_mentioning(term, keys)
+    return jsonify({"term": term, "sources": [{"name": name, "occurrences": n} for name, n in hits]})
+
+
+@bp.route("/index/search", methods=["GET"])
+def index_search():
+    """
+    GET /index/search?q=...&k=5&document_id=...
+    Returns: { "results": [ { source, sentence, score } ] }, the best-matching sentences across sources
+    """
+    query = request.args.get("q", "").strip()
+    if not query:
+        return jsonify({"error": "q is required"}), 400
+    keys, error = _index_scope()
+    if error:
+        return error
+    return jsonify({"results": services().corpus.search(query, keys, request.args.get("k", 5, type=int))})
+
+
+@bp.route("/metrics", methods=["GET"])
+def metrics():
+    """
+    GET /metrics
+    Returns: Prometheus text exposition of stage latency histograms and task counters
+    """
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+
+# Development/WSGI entry point (python app.py, flask run); see serve.py for production
+app = create_app()
 
 
 if __name__ == "__main__":
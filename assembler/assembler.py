@@ -1,27 +1,87 @@
 class Assembler:
-    def __init__(self, confidence_threshold=0.6):
+    """
+    Combines worker outputs while preserving failures, either all at once
+    (assemble) or incrementally as each task finishes (add / stop), keeping
+    running success, failure and confidence totals for partial results.
+    """
+
+    def __init__(self, confidence_threshold=0.6, total_tasks=0):
         self.threshold = confidence_threshold
+        self.total_tasks = total_tasks
+        self.successful = 0
+        self.failed = 0
+        self.confidence_sum = 0.0
+        self.results = 0
 
-    def assemble(self, worker_outputs: dict) -> dict:
+    def assemble(self, worker_outputs: dict, incomplete: dict = None) -> dict:
         """
         Combines worker outputs while preserving failures.
         Expects worker_outputs: { task_id: { "result": str, "confidence": float } }
+        incomplete: { task_id: reason } for tasks stopped without a result
+        (e.g. "deadline exceeded"); they are reported as failures too.
         """
         assembled = {}
         failed = []
+        incomplete = incomplete or {}
 
         for task_id, result in worker_outputs.items():
-            confidence = result.get("confidence", 0)
-
-            if confidence < self.threshold:
-                assembled[task_id] = f"LOW CONFIDENCE ({confidence:.0%}) — {result.get('result', 'No output')}"
+            assembled[task_id], low = self._entry(result)
+            if low:
                 failed.append(task_id)
-            else:
-                assembled[task_id] = result.get("result", result.get("summary", ""))
+
+        for task_id, reason in incomplete.items():
+            assembled[task_id] = self._stopped_entry(reason)
+            failed.append(task_id)
 
         return {
             "assembled_output": assembled,
             "failed_tasks": failed,
-            "total_tasks": len(worker_outputs),
-            "successful_tasks": len(worker_outputs) - len(failed),
-        }
\ No newline at end of file
+            "incomplete_tasks": incomplete,
+            "total_tasks": len(worker_outputs) + len(incomplete),
+            "successful_tasks": len(worker_outputs) + len(incomplete) - len(failed),
+        }
+
+    def add(self, task_id, result: dict, **extra) -> dict:
+        """Fold in one finished task's result; returns a "partial" event for it."""
+        output, low = self._entry(result)
+        self.results += 1
+        self.confidence_sum += result.get("confidence", 0)
+        return self._partial(task_id, output, low, int(result.get("confidence", 0) * 100), extra)
+
+    def stop(self, task_id, reason: str, **extra) -> dict:
+        """Record a task stopped without a result; returns a "partial" event for it."""
+        return self._partial(task_id, self._stopped_entry(reason), True, None, extra)
+
+    @property
+    def overall_confidence(self) -> float:
+        return round(self.confidence_sum / self.results, 2) if self.results else 0
+
+    def _entry(self, result):
+        """(assembled text, is_failure) for one worker output."""
+        confidence = result.get("confidence", 0)
+        if confidence < self.threshold:
+            return f"LOW CONFIDENCE ({confidence:.0%}) — {result.get('result', 'No output')}", True
+        return result.get("result", result.get("summary", "")), False
+
+    def _stopped_entry(self, reason):
+        return f"{reason.upper()} — No output"
+
+    def _partial(self, task_id, output, failed, confidence, extra):
+        if failed:
+            self.failed += 1
+        else:
+            self.successful += 1
+        event = {
+            "type": "partial",
+            "task_id": task_id,
+            "output": output,
+            "failed": failed,
+            "confidence": confidence,
+            "done_tasks": self.successful + self.failed,
+            "total_tasks": self.total_tasks,
+            "successful_tasks": self.successful,
+            "failed_tasks": self.failed,
+            "overall_confidence": int(self.overall_confidence * 100),
+        }
+        event.update(extra)
+        return event
@@ -0,0 +1,234 @@
+"""
+Batch / offline mode: run a JSONL file of (intent, document) jobs through
+Planner → Orchestrator → Assembler across a process pool.
+
+Input lines:  { "id": str, "intent": str, "document": str }  (or "document_path")
+Output lines: { "id", "intent", "status", "latency", "result" | "error" }
+
+A line that isn't a JSON object gets an error record (with its "line"
+number, which is also its id) and the rest of the file still runs.
+
+With --partials, each task's assembled output is also written as it finishes,
+as { "type": "partial", "id", "task_id", "output", ... } lines ahead of the
+job's final line (which then carries "partials", the number written for it).
+
+Usage:
+    python batch.py jobs.jsonl results.jsonl --workers 4 --max-in-flight 16
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import sys
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from planner.planner import Planner
+from orchestrator import Orchestrator
+from worker.document import Document
+
+
+# Planner and Orchestrator are built once per pool process by the initializer
+_planner = None
+_orchestrator = None
+# Queue partial events are sent back on when streaming them (--partials)
+_partials = None
+
+# Seconds to wait for a finished job's partial events to reach the parent
+PARTIALS_TIMEOUT = 5.0
+
+
+def _init_process(partials=None):
+    global _planner, _orchestrator, _partials
+    _planner = Planner()
+    _orchestrator = Orchestrator()
+    _partials = partials
+
+
+def run_job(job: dict) -> dict:
+    """Plan and execute one job; returns its output record."""
+    started = time.perf_counter()
+    partials = 0
+    try:
+        if "document_path" in job:
+            with open(job["document_path"], "r", encoding="utf-8", errors="ignore") as f:
+                document = Document(f.read())
+        else:
+            document = Document(job.get("document", ""))
+
+        plan = _planner.create_plan(job["intent"], 0 if document.is_empty else 1)
+        # Jobs already run in parallel across the pool; each one runs its plan inline
+        plan["execution_policy"]["parallel"] = False
+
+        result = None
+        for update in _orchestrator.run(plan, document):
+            if update["type"] == "result":
+                result = update
+            elif update["type"] == "partial" and _partials is not None:
+                _partials.put(dict(update, id=job["id"]))
+                partials += 1
+
+        record = {"status": "ok", "result": result}
+    except Exception as e:
+        record = {"status": "error", "error": f"{type(e).__name__}: {e}"}
+
+    record.update({
+        "id": job["id"],
+        "intent": job.get("intent"),
+        "latency": round(time.perf_counter() - started, 4),
+    })
+    if _partials is not None:
+        record["partials"] = partials
+    return record
+
+
+def read_jobs(path: str):
+    """
+    Yield (job, error) for each line of a JSONL file, defaulting each id to
+    its line number. error is None, or describes why the line isn't a job
+    (the job is then just its id and "line").
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                job = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield {"id": str(line_no), "line": line_no}, f"{type(e).__name__}: {e}"
+                continue
+            if not isinstance(job, dict):
+                yield {"id": str(line_no), "line": line_no}, f"Expected a JSON object, got {type(job).__name__}"
+                continue
+            job.setdefault("id", str(line_no))
+            job["id"] = str(job["id"])
+            yield job, None
+
+
+def load_checkpoint(path: str) -> set:
+    """IDs of jobs already written to the output by a previous run."""
+    if not os.path.exists(path):
+        return set()
+    with open(path, "r", encoding="utf-8") as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile of values (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def run_batch(input_path, output_path, workers=None, max_in_flight=None, checkpoint_path=None,
+              partials=False) -> dict:
+    """
+    Run every job in input_path not yet recorded in the checkpoint.
+    At most max_in_flight jobs are queued at once; results are appended to
+    output_path as they complete and their IDs checkpointed after each write,
+    so an interrupted run resumes where it left off.
+    With partials, every task's assembled output is appended as it finishes
+    (a resumed job may repeat the partial lines of its interrupted attempt).
+    Returns a throughput summary.
+    """
+    workers = workers or os.cpu_count() or 1
+    max_in_flight = max_in_flight or workers * 2
+    checkpoint_path = checkpoint_path or output_path + ".checkpoint"
+
+    done_ids = load_checkpoint(checkpoint_path)
+    latencies = []
+    counts = {"ok": 0, "error": 0, "skipped": 0}
+    started = time.perf_counter()
+
+    partial_queue = multiprocessing.Queue() if partials else None
+    received = Counter()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_process, initargs=(partial_queue,)) as pool, \
+            open(output_path, "a", encoding="utf-8") as out, \
+            open(checkpoint_path, "a", encoding="utf-8") as checkpoint:
+
+        def write_partials(job_id=None, expected=0):
+            """Write queued partial events; with job_id, first wait until its expected count has arrived."""
+            while True:
+                waiting = job_id is not None and received[job_id] < expected
+                try:
+                    event = partial_queue.get(block=waiting, timeout=PARTIALS_TIMEOUT if waiting else None)
+                except queue.Empty:
+                    out.flush()
+                    return
+                received[event["id"]] += 1
+                out.write(json.dumps(event) + "\n")
+
+        def write(record):
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            checkpoint.write(record["id"] + "\n")
+            checkpoint.flush()
+            counts[record["status"]] += 1
+
+        def drain(pending, return_when):
+            # While streaming partials, wake up regularly to write them out
+            done, _ = wait(pending, timeout=0.05 if partials else None, return_when=return_when)
+            if partials:
+                write_partials()
+            for future in done:
+                pending.remove(future)
+                record = future.result()
+                if partials:
+                    write_partials(record["id"], record["partials"])
+                    received.pop(record["id"], None)
+                write(record)
+                latencies.append(record["latency"])
+
+        pending = set()
+        for job, error in read_jobs(input_path):
+            if job["id"] in done_ids:
+                counts["skipped"] += 1
+                continue
+            if error is not None:
+                write(dict(job, intent=None, status="error", error=error, latency=0.0))
+                continue
+            while len(pending) >= max_in_flight:
+                drain(pending, FIRST_COMPLETED)
+            pending.add(pool.submit(run_job, job))
+
+        while pending:
+            drain(pending, FIRST_COMPLETED)
+
+    elapsed = time.perf_counter() - started
+    completed = counts["ok"] + counts["error"]
+    return {
+        "jobs": completed,
+        "ok": counts["ok"],
+        "errors": counts["error"],
+        "skipped": counts["skipped"],
+        "elapsed_s": round(elapsed, 3),
+        "jobs_per_s": round(completed / elapsed, 2) if elapsed > 0 else 0.0,
+        "p50_latency_s": percentile(latencies, 50),
+        "p95_latency_s": percentile(latencies, 95),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a JSONL file of intent/document jobs offline.")
+    parser.add_argument("input", help="JSONL file of jobs")
+    parser.add_argument("output", help="JSONL file results are appended to")
+    parser.add_argument("--workers", type=int, default=None, help="pool processes (default: CPU count)")
+    parser.add_argument("--max-in-flight", type=int, default=None, help="queued jobs cap (default: 2x workers)")
+    parser.add_argument("--checkpoint", default=None, help="checkpoint file (default: <output>.checkpoint)")
+    parser.add_argument("--partials", action="store_true", help="also write each task's output as it finishes")
+    args = parser.parse_args(argv)
+
+    summary = run_batch(args.input, args.output, args.workers, args.max_in_flight, args.checkpoint,
+                        args.partials)
+    print(json.dumps(summary, indent=2), file=sys.stderr)
+    return 0 if summary["errors"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,57 @@
+"""
+Micro-benchmarks for each Worker handler across document sizes.
+
+Documents below the map-reduce threshold are tokenized fresh on every call,
+as a new upload would be; larger ones are spooled to disk and run through
+MappedDocument + MapReduceRunner, the path the app takes for them.
+"""
+import os
+import shutil
+import tempfile
+from memory.document_store import spool
+from worker.document import Document, MappedDocument
+from worker.mapreduce import MapReduceRunner
+from worker.worker import Worker
+from .common import format_size, make_text, measure, summarize
+
+
+HANDLERS = ("summarize", "extract", "analyze", "validate", "generate")
+
+
+def run(sizes, handlers=HANDLERS, min_time=0.5, max_iterations=50) -> list:
+    records = []
+    runner = MapReduceRunner()
+    worker = Worker(name="bench", temperature=0.3, map_reduce=runner)
+    spool_dir = tempfile.mkdtemp(prefix="orchestrator-bench-")
+
+    try:
+        for size in sizes:
+            text = make_text(size)
+            mapped = runner.applies(Document(text))
+            path = None
+            if mapped:
+                # Only the spool file is kept; chunks are read back through mmap
+                path, length = spool(text, spool_dir)
+                text = None
+                make_document = lambda: MappedDocument(path, length)
+            else:
+                make_document = lambda: Document(text)
+
+            for task_type in handlers:
+                task = {"type": task_type, "description": f"bench {task_type}"}
+                timings = measure(
+                    lambda: worker.compute(task, make_document()),
+                    min_time=min_time, max_iterations=max_iterations,
+                )
+                records.append(summarize(
+                    "handler", f"handler/{task_type}/{format_size(size)}", timings, units=size,
+                    size=size, mode="mapreduce" if mapped else "single",
+                ))
+
+            if path is not None:
+                os.remove(path)
+    finally:
+        runner.shutdown()
+        shutil.rmtree(spool_dir, ignore_errors=True)
+
+    return records
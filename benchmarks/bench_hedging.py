@@ -0,0 +1,59 @@
+"""
+Plan latency with straggling tasks, with and without hedging. Handlers run
+behind a FakeBackend whose calls occasionally straggle, standing in for a
+high-variance model backend; "plain" runs wait out every straggler, "hedged"
+runs duplicate attempts slower than the p80 of their task type.
+"""
+import time
+from orchestrator import Orchestrator
+from worker.backend import FakeBackend
+from .common import make_text, percentile, summarize
+
+
+# Independent tasks per plan, so one straggler decides the plan's latency
+TASKS = 6
+
+# Backend: 20ms per call (+10ms jitter); 8% of calls take 500ms longer
+LATENCY, JITTER, STRAGGLER_RATE, STRAGGLER = 0.02, 0.01, 0.08, 0.5
+
+
+def make_plan(hedged: bool) -> dict:
+    types = ("extract", "analyze", "validate")
+    policy = {"parallel": True, "max_workers": TASKS + 2, "max_retries": 0, "confidence_threshold": 0.0}
+    if hedged:
+        policy.update(hedge_percentile=80, hedge_min_samples=20)
+    return {
+        "tasks": [
+            {"id": f"t{i}", "type": types[i % len(types)], "worker": i % 4 + 1, "depends_on": []}
+            for i in range(TASKS)
+        ],
+        "execution_policy": policy,
+    }
+
+
+def run(runs=100, warmup=30) -> list:
+    text = make_text(10 * 1024)
+    records = []
+    for variant in ("plain", "hedged"):
+        backend = FakeBackend(LATENCY, JITTER, STRAGGLER_RATE, STRAGGLER, seed=1)
+        orchestrator = Orchestrator(backend=backend)
+        # Same latency history for both variants before timing starts
+        for _ in range(warmup):
+            list(orchestrator.run(make_plan(False), text))
+        backend.calls = 0
+
+        timings = []
+        started = time.perf_counter()
+        for _ in range(runs):
+            run_started = time.perf_counter()
+            list(orchestrator.run(make_plan(variant == "hedged"), text))
+            timings.append(time.perf_counter() - run_started)
+        elapsed = time.perf_counter() - started
+
+        records.append(summarize(
+            "hedge", f"hedge/{variant}", timings, elapsed=elapsed,
+            p90_ms=round(percentile(timings, 90) * 1000, 3),
+            backend_calls_per_run=round(backend.calls / runs, 2),
+        ))
+        orchestrator.shutdown()
+    return records
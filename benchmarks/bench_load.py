@@ -0,0 +1,123 @@
+"""
+Local load generator: concurrent clients each upload a document once, then
+repeatedly POST /plan followed by POST /run, consuming the SSE stream until
+the final result event.
+
+Targets --url when given; otherwise serves a fresh app in-process on an
+ephemeral port, with its plan database in a temporary directory.
+"""
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from .bench_orchestrator import INTENTS
+from .common import format_size, make_text, percentile, summarize
+
+
+def _post(base_url, path, session_id, body, timeout=300):
+    request = urllib.request.Request(
+        base_url + path,
+        data=json.dumps(body).encode("utf-8"),
+        headers={"Content-Type": "application/json", "X-Session-ID": session_id},
+        method="POST",
+    )
+    return urllib.request.urlopen(request, timeout=timeout)
+
+
+def _plan_and_run(base_url, session_id, document_id, intent):
+    """One /plan + /run round trip; returns (total seconds, seconds to first SSE event)."""
+    started = time.perf_counter()
+    with _post(base_url, "/plan", session_id, {"intent": intent, "document_id": document_id}) as response:
+        plan = json.load(response)["plan"]
+
+    first_event = None
+    result = None
+    with _post(base_url, "/run", session_id, {"plan": plan, "document_id": document_id}) as response:
+        for line in response:
+            if not line.startswith(b"data:"):
+                continue
+            if first_event is None:
+                first_event = time.perf_counter() - started
+            update = json.loads(line[5:])
+            if update.get("type") == "result":
+                result = update
+
+    if result is None:
+        raise RuntimeError("SSE stream ended without a result event")
+    return time.perf_counter() - started, first_event
+
+
+def _serve_app(directory):
+    """Serve a new app storing its plans under directory; returns (server, app, url)."""
+    from werkzeug.serving import make_server
+    from app import create_app
+
+    # Per-request access logs would swamp the benchmark output
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    flask_app = create_app({"plan_db": os.path.join(directory, "plans.db")})
+    server = make_server("127.0.0.1", 0, flask_app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, flask_app, f"http://127.0.0.1:{server.server_port}"
+
+
+def run(size, clients=8, requests=200, url=None) -> list:
+    if url is not None:
+        return _load(url.rstrip("/"), size, clients, requests)
+
+    with tempfile.TemporaryDirectory(prefix="bench-load-") as directory:
+        server, flask_app, url = _serve_app(directory)
+        try:
+            return _load(url, size, clients, requests)
+        finally:
+            server.shutdown()
+            flask_app.extensions["orchestrator"].shutdown(timeout=30)
+
+
+def _load(url, size, clients, requests) -> list:
+
+    text = make_text(size)
+    intents = list(INTENTS.values())
+    timings, first_events, errors = [], [], []
+    lock = threading.Lock()
+    remaining = [requests]
+
+    def client(n):
+        session_id = uuid.uuid4().hex
+        with _post(url, "/upload", session_id, {"text": text, "name": f"bench-{n}.txt"}) as response:
+            document_id = json.load(response)["document_id"]
+        i = 0
+        while True:
+            with lock:
+                if remaining[0] <= 0:
+                    return
+                remaining[0] -= 1
+            try:
+                total, first = _plan_and_run(url, session_id, document_id, intents[(n + i) % len(intents)])
+                with lock:
+                    timings.append(total)
+                    first_events.append(first)
+            except Exception as e:
+                with lock:
+                    errors.append(f"{type(e).__name__}: {e}")
+            i += 1
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(client, range(clients)))
+    elapsed = time.perf_counter() - started
+
+    record = summarize(
+        "load", f"load/c{clients}/{format_size(size)}", timings, elapsed=elapsed,
+        size=size, clients=clients, errors=len(errors),
+    )
+    if first_events:
+        record["p50_first_event_ms"] = round(percentile(first_events, 50) * 1000, 3)
+    if errors:
+        record["first_error"] = errors[0]
+    return [record]
@@ -0,0 +1,53 @@
+"""
+End-to-end Orchestrator.run per planner intent family, including planning
+and assembly. Compare plans run against several sources.
+"""
+import time
+from orchestrator import Orchestrator
+from planner.planner import Planner
+from worker.document import Document
+from .common import format_size, make_text, measure, summarize
+
+
+INTENTS = {
+    "summarize": "Summarize the document",
+    "analyze": "Analyze the trends in this report",
+    "compare": "Compare the sources",
+    "extract": "Extract the key entities",
+    "validate": "Validate the claims",
+}
+
+COMPARE_SOURCES = 3
+
+
+def run(size, families=tuple(INTENTS), min_time=1.0, max_iterations=30) -> list:
+    records = []
+    planner = Planner()
+    orchestrator = Orchestrator()
+    text = make_text(size)
+    source_texts = [make_text(size // COMPARE_SOURCES, seed=i + 1) for i in range(COMPARE_SOURCES)]
+
+    for family in families:
+        num_sources = COMPARE_SOURCES if family == "compare" else 1
+
+        def run_once():
+            plan = planner.create_plan(INTENTS[family], num_sources)
+            if family == "compare":
+                sources = [Document(t) for t in source_texts]
+                document = Document("\n\n---\n\n".join(source_texts))
+            else:
+                sources, document = [], Document(text)
+            for update in orchestrator.run(plan, document, sources):
+                pass
+            return update
+
+        started = time.perf_counter()
+        timings = measure(run_once, min_time=min_time, max_iterations=max_iterations)
+        elapsed = time.perf_counter() - started
+        records.append(summarize(
+            "orchestrator", f"orchestrator/{family}/{format_size(size)}", timings, elapsed=elapsed,
+            units=size, size=size, tasks=len(planner.create_plan(INTENTS[family], num_sources)["tasks"]),
+        ))
+
+    orchestrator.shutdown()
+    return records
@@ -0,0 +1,102 @@
+"""
+Planning cost versus rule count. Each size adds synthetic multi-keyword rules
+through a rules file. "compiled" is full Planner.create_plan with the
+compiled matcher; "linear" times matching alone the old way, testing each
+rule's keywords against the intent in turn.
+"""
+import json
+import os
+import random
+import tempfile
+import time
+from planner.planner import Planner
+from .common import measure, summarize
+from .bench_orchestrator import INTENTS
+
+
+RULE_COUNTS = (10, 100, 1000, 10000)
+
+# Intents planned per timed call, so one call is long enough to time reliably
+BATCH = 100
+
+
+def make_rules(count: int, seed: int = 0) -> list:
+    """Synthetic rules of one or two made-up keywords (some with synonyms) over the built-in patterns."""
+    rng = random.Random(seed)
+    patterns = list(INTENTS)
+
+    def word():
+        return "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(5, 10)))
+
+    rules = []
+    for _ in range(count):
+        keywords = [word() for _ in range(rng.randint(1, 2))]
+        if rng.random() < 0.3:
+            keywords[0] = [keywords[0], word()]
+        rules.append({"keywords": keywords, "pattern": rng.choice(patterns), "priority": rng.randint(0, 3)})
+    return rules
+
+
+def make_intents(rules: list, count: int = BATCH, seed: int = 0) -> list:
+    """Intents mixing the benchmark intent families with keywords of random rules."""
+    rng = random.Random(seed)
+    intents = []
+    for i in range(count):
+        words = list(INTENTS.values())[i % len(INTENTS)].split()
+        for keyword in rng.choice(rules)["keywords"]:
+            words.insert(rng.randint(0, len(words)), keyword if isinstance(keyword, str) else keyword[0])
+        intents.append(" ".join(words))
+    return intents
+
+
+def linear_match(rules: list, intent: str):
+    """Reference matcher: every rule's keywords checked against the intent, one rule at a time."""
+    intent = intent.lower()
+    best = None
+    for rule in rules:
+        groups = [[k] if isinstance(k, str) else k for k in rule["keywords"]]
+        if all(any(k in intent for k in group) for group in groups):
+            if best is None or rule["priority"] > best["priority"]:
+                best = rule
+    return best
+
+
+def run(rule_counts=RULE_COUNTS, min_time=0.5, max_iterations=50) -> list:
+    records = []
+    directory = tempfile.mkdtemp(prefix="bench-planner-")
+    path = os.path.join(directory, "rules.json")
+
+    try:
+        for count in rule_counts:
+            rules = make_rules(count)
+            intents = make_intents(rules)
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump({"rules": rules}, f)
+
+            started = time.perf_counter()
+            planner = Planner(rules_path=path)
+            build_ms = round((time.perf_counter() - started) * 1000, 3)
+
+            def compiled():
+                for intent in intents:
+                    planner.create_plan(intent)
+
+            def linear():
+                for intent in intents:
+                    linear_match(rules, intent)
+
+            for variant, fn in (("compiled", compiled), ("linear", linear)):
+                started = time.perf_counter()
+                timings = measure(fn, min_time=min_time, max_iterations=max_iterations)
+                elapsed = time.perf_counter() - started
+                records.append(summarize(
+                    "planner", f"planner/rules-{count}/{variant}", timings, elapsed=elapsed,
+                    rules=count, intents_per_call=BATCH,
+                    **({"build_ms": build_ms} if variant == "compiled" else {}),
+                ))
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+        os.rmdir(directory)
+
+    return records
@@ -0,0 +1,103 @@
+import random
+import resource
+import sys
+import time
+
+
+# Vocabulary for synthetic documents: a mix of stop words and longer content terms
+_WORDS = (
+    "the system orchestration worker planner assembler confidence threshold retry "
+    "document source extract summarize analyze validate generate report pipeline "
+    "latency throughput failure isolation evidence claim result quarterly revenue "
+    "growth customer market product region forecast metric signal pattern trend "
+    "that this with from have been were they their will would could should about"
+).split()
+
+_SIZE_UNITS = {"KB": 1024, "MB": 1024 * 1024, "GB": 1024 * 1024 * 1024}
+
+
+def parse_size(text: str) -> int:
+    """'100KB' → 102400; bare numbers are bytes."""
+    text = text.strip().upper()
+    for unit, factor in _SIZE_UNITS.items():
+        if text.endswith(unit):
+            return int(float(text[:-len(unit)]) * factor)
+    return int(text)
+
+
+def format_size(size: int) -> str:
+    for unit in ("GB", "MB", "KB"):
+        factor = _SIZE_UNITS[unit]
+        if size >= factor and size % factor == 0:
+            return f"{size // factor}{unit}"
+    return f"{size}B"
+
+
+def make_text(size: int, seed: int = 0) -> str:
+    """
+    Deterministic synthetic prose of about `size` characters.
+    A 64KB block of random sentences is generated once and repeated, so
+    100MB documents are cheap to build.
+    """
+    rng = random.Random(seed)
+    block_size = min(size, 64 * 1024)
+    sentences = []
+    length = 0
+    while length < block_size:
+        words = rng.choices(_WORDS, k=rng.randint(6, 24))
+        sentence = " ".join(words).capitalize() + rng.choice([". ", ". ", ". ", "! ", "? "])
+        sentences.append(sentence)
+        length += len(sentence)
+    block = "".join(sentences)
+    repeats, remainder = divmod(size, len(block))
+    return block * repeats + block[:remainder]
+
+
+def percentile(values: list, pct: float) -> float:
+    """Nearest-rank percentile of values (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, int(round(pct / 100 * len(ordered))))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process so far, in MB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+def measure(fn, min_time=0.5, max_iterations=50, min_iterations=1) -> list:
+    """Call fn repeatedly until min_time has elapsed (bounded by max_iterations); returns per-call seconds."""
+    timings = []
+    deadline = time.perf_counter() + min_time
+    while len(timings) < max_iterations and (len(timings) < min_iterations or time.perf_counter() < deadline):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def summarize(suite: str, name: str, timings: list, elapsed=None, units=None, **extra) -> dict:
+    """
+    Benchmark record: throughput (calls/s, plus MB/s when units is a byte count
+    per call), p50/p95/p99 latency in milliseconds, and peak RSS.
+    """
+    elapsed = elapsed if elapsed is not None else sum(timings)
+    record = {
+        "suite": suite,
+        "name": name,
+        "iterations": len(timings),
+        "throughput": round(len(timings) / elapsed, 3) if elapsed > 0 else 0.0,
+        "p50_ms": round(percentile(timings, 50) * 1000, 3),
+        "p95_ms": round(percentile(timings, 95) * 1000, 3),
+        "p99_ms": round(percentile(timings, 99) * 1000, 3),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    if units and elapsed > 0:
+        record["mb_per_s"] = round(units * len(timings) / elapsed / (1024 * 1024), 2)
+    record.update(extra)
+    return record
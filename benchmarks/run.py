@@ -0,0 +1,127 @@
+"""
+Benchmark suite runner.
+
+Writes one JSON record per benchmark to bench_output.txt (throughput,
+p50/p95/p99 latency, peak RSS) and compares each against the stored
+baseline, flagging p50 regressions beyond --tolerance.
+
+Usage:
+    python -m benchmarks.run                          # all suites
+    python -m benchmarks.run --suites handler --sizes 1KB,1MB
+    python -m benchmarks.run --suites load --url http://localhost:5000
+    python -m benchmarks.run --suites planner --rules 10,1000,10000
+    python -m benchmarks.run --suites hedge --hedge-runs 200
+    python -m benchmarks.run --save-baseline          # record a new baseline
+"""
+import argparse
+import json
+import os
+import sys
+from . import bench_handlers, bench_hedging, bench_load, bench_orchestrator, bench_planner
+from .common import parse_size
+
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_SIZES = "1KB,100KB,1MB,10MB,100MB"
+SUITES = ("handler", "orchestrator", "planner", "hedge", "load")
+
+
+def load_baseline(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_baseline(path: str, records: list):
+    """Merge records into the baseline file, keyed by benchmark name."""
+    baseline = load_baseline(path)
+    for record in records:
+        baseline[record["name"]] = {
+            "throughput": record["throughput"],
+            "p50_ms": record["p50_ms"],
+            "p95_ms": record["p95_ms"],
+            "p99_ms": record["p99_ms"],
+            "peak_rss_mb": record["peak_rss_mb"],
+        }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(dict(sorted(baseline.items())), f, indent=2)
+        f.write("\n")
+
+
+def compare(record: dict, baseline: dict, tolerance: float) -> dict:
+    """Annotate a record with its change against the baseline; sets "regression" when p50 is too slow."""
+    reference = baseline.get(record["name"])
+    if not reference or not reference.get("p50_ms"):
+        record["baseline"] = None
+        return record
+    change = (record["p50_ms"] - reference["p50_ms"]) / reference["p50_ms"]
+    record["baseline"] = reference
+    record["p50_change_pct"] = round(change * 100, 1)
+    record["regression"] = change > tolerance
+    return record
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the orchestrator benchmark suite.")
+    parser.add_argument("--suites", default=",".join(SUITES), help=f"comma-separated subset of {SUITES}")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="handler document sizes (e.g. 1KB,10MB)")
+    parser.add_argument("--e2e-size", default="100KB", help="document size for orchestrator runs")
+    parser.add_argument("--rules", default="10,100,1000,10000", help="planner rule counts")
+    parser.add_argument("--hedge-runs", type=int, default=100, help="plans run per hedging variant")
+    parser.add_argument("--load-size", default="10KB", help="document size uploaded by each load client")
+    parser.add_argument("--clients", type=int, default=8, help="concurrent load-generator clients")
+    parser.add_argument("--requests", type=int, default=200, help="total /plan + /run round trips")
+    parser.add_argument("--url", default=None, help="target server (default: serve a fresh app in-process)")
+    parser.add_argument("--min-time", type=float, default=0.5, help="minimum seconds per micro-benchmark")
+    parser.add_argument("--output", default="bench_output.txt", help="JSON-lines output file")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="baseline file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p50 slowdown (0.25 = 25%%)")
+    parser.add_argument("--save-baseline", action="store_true", help="write results to the baseline file")
+    args = parser.parse_args(argv)
+
+    suites = [s.strip() for s in args.suites.split(",") if s.strip()]
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        parser.error(f"unknown suites: {', '.join(sorted(unknown))}")
+
+    records = []
+    if "handler" in suites:
+        sizes = [parse_size(s) for s in args.sizes.split(",")]
+        records += bench_handlers.run(sizes, min_time=args.min_time)
+    if "orchestrator" in suites:
+        records += bench_orchestrator.run(parse_size(args.e2e_size), min_time=args.min_time * 2)
+    if "planner" in suites:
+        rule_counts = [int(n) for n in args.rules.split(",")]
+        records += bench_planner.run(rule_counts, min_time=args.min_time)
+    if "hedge" in suites:
+        records += bench_hedging.run(args.hedge_runs)
+    if "load" in suites:
+        records += bench_load.run(parse_size(args.load_size), args.clients, args.requests, args.url)
+
+    baseline = load_baseline(args.baseline)
+    records = [compare(r, baseline, args.tolerance) for r in records]
+
+    with open(args.output, "w", encoding="utf-8") as out:
+        for record in records:
+            out.write(json.dumps(record) + "\n")
+
+    for r in records:
+        change = f"{r['p50_change_pct']:+.1f}%" if r.get("baseline") else "new"
+        flag = "  REGRESSION" if r.get("regression") else ""
+        print(
+            f"{r['name']:<32} {r['throughput']:>10.2f}/s  p50 {r['p50_ms']:>10.3f}ms  "
+            f"p95 {r['p95_ms']:>10.3f}ms  p99 {r['p99_ms']:>10.3f}ms  "
+            f"rss {r['peak_rss_mb']:>7.1f}MB  {change}{flag}",
+            file=sys.stderr,
+        )
+
+    if args.save_baseline:
+        save_baseline(args.baseline, records)
+
+    regressions = [r for r in records if r.get("regression")]
+    return 1 if regressions and not args.save_baseline else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,313 @@
+import asyncio
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from worker.cancellation import CancellationToken
+
+
+class QueueFull(Exception):
+    """Raised when a job can't be admitted; maps to HTTP 429."""
+
+
+class Job:
+    """One queued plan execution and every progress event it has produced so far."""
+
+    def __init__(self, client_id, plan, document, sources, abandon_after=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.client_id = client_id
+        self.plan = plan
+        self.document = document
+        self.sources = sources
+        self.status = "queued"
+        self.events = []
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_token = CancellationToken()
+        # Seconds a job may run with no subscriber before it is cancelled (None: never)
+        self.abandon_after = abandon_after
+        self._subscribers = 0
+        self._changed = threading.Condition()
+        # Wake-up callbacks of async subscribers, called on every change
+        self._listeners = []
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("complete", "failed", "cancelled")
+
+    def cancel(self, reason="cancelled"):
+        """Stop the job; a running orchestration winds down and reports partial results."""
+        self.cancel_token.cancel(reason)
+
+    def publish(self, event):
+        with self._changed:
+            self.events.append(event)
+            if event.get("type") == "result":
+                self.result = event
+            self._notify()
+
+    def finish(self, status, error=None):
+        with self._changed:
+            self.status = status
+            self.error = error
+            self.finished_at = time.time()
+            # Drop the document reference; only the events are needed from here on
+            self.document = None
+            self.sources = None
+            self._notify()
+
+    def subscribe(self, after=0, timeout=None):
+        """
+        Yield events from index `after` onward, blocking for new ones until the job finishes.
+        With a timeout, yields None whenever that many seconds pass without an event.
+        """
+        index = after
+        with self._changed:
+            self._subscribers += 1
+        try:
+            while True:
+                with self._changed:
+                    while index >= len(self.events) and not self.finished:
+                        if not self._changed.wait(timeout) and timeout is not None:
+                            break
+                    pending = self.events[index:]
+                    finished = self.finished
+                if not pending and not finished:
+                    yield None
+                    continue
+                for event in pending:
+                    yield event
+                index += len(pending)
+                if finished and index >= len(self.events):
+                    return
+        finally:
+            self._unsubscribe()
+
+    async def asubscribe(self, after=0, timeout=None):
+        """
+        Async subscribe: the same events, awaited on the running event loop
+        instead of blocking a thread, so many streams can share one thread.
+        """
+        loop = asyncio.get_running_loop()
+        changed = asyncio.Event()
+
+        def wake():
+            try:
+                loop.call_soon_threadsafe(changed.set)
+            except RuntimeError:
+                pass  # Loop already closed
+
+        index = after
+        with self._changed:
+            self._subscribers += 1
+            self._listeners.append(wake)
+        try:
+            while True:
+                changed.clear()
+                with self._changed:
+                    pending = self.events[index:]
+                    finished = self.finished
+                for event in pending:
+                    yield event
+                index += len(pending)
+                if finished and index >= len(self.events):
+                    return
+                if not pending:
+                    try:
+                        await asyncio.wait_for(changed.wait(), timeout)
+                    except asyncio.TimeoutError:
+                        yield None
+        finally:
+            with self._changed:
+                self._listeners.remove(wake)
+            self._unsubscribe()
+
+    def _notify(self):
+        self._changed.notify_all()
+        for wake in self._listeners:
+            wake()
+
+    def watch(self):
+        """Cancel the job if it still has no subscriber abandon_after seconds from now."""
+        if self.abandon_after is None:
+            return
+        timer = threading.Timer(self.abandon_after, self._cancel_if_abandoned)
+        timer.daemon = True
+        timer.start()
+
+    def _unsubscribe(self):
+        with self._changed:
+            self._subscribers -= 1
+            abandoned = self._subscribers == 0 and not self.finished
+        if abandoned:
+            # Give the client a chance to reconnect (Last-Event-ID) before cancelling
+            self.watch()
+
+    def _cancel_if_abandoned(self):
+        with self._changed:
+            abandoned = self._subscribers == 0 and not self.finished
+        if abandoned:
+            self.cancel("client disconnected")
+
+    def describe(self) -> dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "events": len(self.events),
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobQueue:
+    """
+    Local stand-in for a Redis/Celery task queue.
+    Jobs wait in per-client queues served round-robin by a fixed pool of
+    worker threads, so one client's burst can't starve the others.
+    Admission is bounded by total queue depth and by per-client outstanding jobs.
+    """
+
+    def __init__(self, orchestrator, workers=4, max_depth=64, max_per_client=8, max_finished=1000):
+        self.orchestrator = orchestrator
+        self.max_depth = max_depth
+        self.max_per_client = max_per_client
+        self.max_finished = max_finished
+        self._jobs = OrderedDict()
+        self._pending = {}
+        self._clients = deque()
+        self._outstanding = {}
+        self._depth = 0
+        self._lock = threading.Condition()
+        self._stopping = False
+        self._threads = [
+            threading.Thread(target=self._work, name=f"job-worker-{i + 1}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, client_id, plan, document, sources=None, abandon_after=None) -> Job:
+        """
+        Queue a plan for execution; raises QueueFull if it can't be admitted.
+        With abandon_after, the job is cancelled once it has gone that many
+        seconds without a subscriber.
+        """
+        with self._lock:
+            if self._stopping:
+                raise QueueFull("Job queue is shutting down")
+            if self._depth >= self.max_depth:
+                raise QueueFull(f"Job queue is full ({self.max_depth} queued)")
+            if self._outstanding.get(client_id, 0) >= self.max_per_client:
+                raise QueueFull(f"Too many outstanding jobs for this client ({self.max_per_client})")
+
+            job = Job(client_id, plan, document, sources or [], abandon_after)
+            self._jobs[job.id] = job
+            if client_id not in self._pending:
+                self._pending[client_id] = deque()
+                self._clients.append(client_id)
+            self._pending[client_id].append(job)
+            self._outstanding[client_id] = self._outstanding.get(client_id, 0) + 1
+            self._depth += 1
+            self._lock.notify()
+        # Covers clients that disconnect before ever subscribing
+        job.watch()
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def active(self, client_id) -> list:
+        """The client's queued and running jobs, oldest first."""
+        with self._lock:
+            return [job for job in self._jobs.values() if job.client_id == client_id and not job.finished]
+
+    def stats(self) -> dict:
+        with self._lock:
+            running = sum(1 for job in self._jobs.values() if job.status == "running")
+            return {
+                "queued": self._depth,
+                "running": running,
+                "clients_waiting": len(self._clients),
+                "workers": len(self._threads),
+                "max_depth": self.max_depth,
+            }
+
+    def shutdown(self, drain=True, timeout=None):
+        """
+        Stop admitting jobs; with drain, let queued and running jobs finish first.
+        timeout bounds the whole wait, however many worker threads there are.
+        """
+        with self._lock:
+            self._stopping = True
+            if not drain:
+                for queue in self._pending.values():
+                    for job in queue:
+                        job.finish("failed", "Job queue shut down")
+                self._pending.clear()
+                self._clients.clear()
+                self._depth = 0
+            self._lock.notify_all()
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        for thread in self._threads:
+            thread.join(None if deadline is None else max(0.0, deadline - time.monotonic()))
+
+    def _next_job(self):
+        """Block for the next job, taking one from each waiting client in turn."""
+        with self._lock:
+            while not self._clients:
+                if self._stopping:
+                    return None
+                self._lock.wait()
+
+            client_id = self._clients.popleft()
+            queue = self._pending[client_id]
+            job = queue.popleft()
+            if queue:
+                self._clients.append(client_id)
+            else:
+                del self._pending[client_id]
+            self._depth -= 1
+            job.status = "running"
+            job.started_at = time.time()
+            return job
+
+    def _work(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+
+            try:
+                if job.cancel_token.cancelled:
+                    job.finish("cancelled", job.cancel_token.reason)
+                    continue
+                for update in self.orchestrator.run(job.plan, job.document, job.sources, job.cancel_token):
+                    job.publish(update)
+                if job.cancel_token.cancelled:
+                    job.finish("cancelled", job.cancel_token.reason)
+                else:
+                    job.finish("complete")
+            except Exception as e:
+                job.publish({"type": "error", "error": str(e)})
+                job.finish("failed", str(e))
+            finally:
+                self._release(job)
+
+    def _release(self, job):
+        with self._lock:
+            remaining = self._outstanding.get(job.client_id, 1) - 1
+            if remaining:
+                self._outstanding[job.client_id] = remaining
+            else:
+                self._outstanding.pop(job.client_id, None)
+
+            # Keep a bounded history of finished jobs for status/result lookups
+            finished = [jid for jid, j in self._jobs.items() if j.finished]
+            for jid in finished[:max(0, len(finished) - self.max_finished)]:
+                del self._jobs[jid]
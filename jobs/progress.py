@@ -0,0 +1,148 @@
+import base64
+import gzip
+import json
+import time
+from observability.metrics import STAGE_SECONDS
+from observability.tracing import tracer
+
+
+# Fields of a worker_update event tracked per worker and sent as deltas
+WORKER_FIELDS = ("status", "current_task", "total_tasks", "task_description", "confidence", "progress")
+
+
+class ProgressStream:
+    """
+    Turns a Job's raw events into a compact SSE progress channel.
+
+    worker_update events are coalesced per worker for `window` seconds and
+    sent as one "progress" frame carrying only the fields that changed since
+    the client last saw them. Every frame's id is the index of the last job
+    event it covers; since coalescing keeps the latest state, a client that
+    reconnects with Last-Event-ID gets deltas against exactly the state it
+    already has. Partial assembled results are sent as soon as they arrive;
+    the final result is sent once, gzip+base64 encoded when its JSON exceeds
+    compress_above bytes. Idle streams get heartbeat comments.
+    """
+
+    def __init__(self, window=0.1, heartbeat=15.0, compress_above=32 * 1024):
+        self.window = window
+        self.heartbeat = heartbeat
+        self.compress_above = compress_above
+
+    def frames(self, job, last_event_id=None, window=None):
+        """Yield SSE frames for job, resuming after last_event_id when given."""
+        state = _StreamState(self, job, last_event_id, window)
+        with tracer.span("sse", job_id=job.id, resumed_from=last_event_id) as span:
+            yield "retry: 2000\n\n"
+            updates = job.subscribe(state.after, timeout=state.timeout)
+            try:
+                for event in updates:
+                    yield from state.feed(event)
+            finally:
+                # Closing the subscription lets the job notice an abandoned client
+                updates.close()
+            yield from state.finish(span)
+
+    async def aframes(self, job, last_event_id=None, window=None):
+        """frames() for async servers: waits on the event loop rather than a thread."""
+        state = _StreamState(self, job, last_event_id, window)
+        with tracer.span("sse", job_id=job.id, resumed_from=last_event_id, mode="async") as span:
+            yield "retry: 2000\n\n"
+            updates = job.asubscribe(state.after, timeout=state.timeout)
+            try:
+                async for event in updates:
+                    for frame in state.feed(event):
+                        yield frame
+            finally:
+                await updates.aclose()
+            for frame in state.finish(span):
+                yield frame
+
+
+class _StreamState:
+    """Coalescing and delta state of one SSE stream, fed one job event (or None on idle) at a time."""
+
+    def __init__(self, stream, job, last_event_id, window):
+        self.stream = stream
+        self.window = stream.window if window is None else window
+        self.sent = {}
+        self.after = 0
+        if last_event_id is not None:
+            # The client already holds the state folded from every event up to its last id
+            self.after = last_event_id + 1
+            for event in job.events[:self.after]:
+                if event.get("type") == "worker_update":
+                    self.sent[event["worker_id"]] = {f: event.get(f) for f in WORKER_FIELDS}
+
+        self.stats = {"frames": 0, "serialize": 0.0}
+        self.pending = {}
+        self.index = self.after - 1
+        self.flushed_at = self.idle_since = time.monotonic()
+        self.timeout = min(self.window, stream.heartbeat) if self.window else stream.heartbeat
+
+    def feed(self, event):
+        """Yield the frames due after event."""
+        now = time.monotonic()
+        if event is None:
+            if not self.pending and now - self.idle_since >= self.stream.heartbeat:
+                self.idle_since = now
+                yield ": heartbeat\n\n"
+        elif event.get("type") == "worker_update":
+            self.index += 1
+            self.idle_since = now
+            self.pending[event["worker_id"]] = event
+        else:
+            # Anything else is sent as-is, right after the updates that preceded it
+            self.index += 1
+            self.idle_since = self.flushed_at = now
+            yield from self._progress_frame(self.index - 1)
+            yield self._event_frame(event, self.index)
+            return
+
+        if self.pending and now - self.flushed_at >= self.window:
+            yield from self._progress_frame(self.index)
+            self.flushed_at = now
+
+    def finish(self, span):
+        """Yield the last coalesced updates and record the stream's totals on span."""
+        yield from self._progress_frame(self.index)
+        span.attributes.update(
+            events=self.index + 1 - self.after, frames=self.stats["frames"],
+            serialize_ms=round(self.stats["serialize"] * 1000, 3),
+        )
+
+    def _progress_frame(self, index):
+        """Yield one frame with each pending worker's changed fields (nothing if none changed)."""
+        workers = {}
+        for wid, event in self.pending.items():
+            state = {f: event.get(f) for f in WORKER_FIELDS}
+            previous = self.sent.get(wid, {})
+            delta = {f: v for f, v in state.items() if previous.get(f) != v}
+            if delta:
+                workers[str(wid)] = delta
+            self.sent[wid] = state
+        self.pending.clear()
+        if workers:
+            yield self._frame({"type": "progress", "workers": workers}, index)
+
+    def _event_frame(self, event, index) -> str:
+        if event.get("type") != "result":
+            return self._frame(event, index)
+
+        started = time.perf_counter()
+        payload = json.dumps(event)
+        if len(payload) > self.stream.compress_above:
+            compressed = base64.b64encode(gzip.compress(payload.encode("utf-8"))).decode("ascii")
+            payload = json.dumps({"type": "result", "encoding": "gzip+base64", "payload": compressed})
+        return self._record(f"id: {index}\ndata: {payload}\n\n", started)
+
+    def _frame(self, data, index) -> str:
+        started = time.perf_counter()
+        return self._record(f"id: {index}\ndata: {json.dumps(data)}\n\n", started)
+
+    def _record(self, frame, started) -> str:
+        elapsed = time.perf_counter() - started
+        STAGE_SECONDS.observe(elapsed, stage="sse_serialize")
+        self.stats["frames"] += 1
+        self.stats["serialize"] += elapsed
+        return frame
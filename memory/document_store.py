@@ -0,0 +1,232 @@
+import codecs
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+from worker.document import MappedDocument
+
+
+# Separator used when a multi-source document is read as a single text
+SOURCE_SEPARATOR = "\n\n---\n\n"
+
+# Bytes read from an upload stream per iteration while spooling
+SPOOL_CHUNK_SIZE = 1024 * 1024
+
+
+def spool(data, directory, chunk_size=SPOOL_CHUNK_SIZE):
+    """
+    Write text or a binary stream to a UTF-8 spool file in bounded chunks.
+    Streams are decoded incrementally (invalid bytes dropped), so peak memory
+    is one chunk regardless of upload size. Returns (path, length in characters).
+    """
+    fd, path = tempfile.mkstemp(dir=directory, suffix=".txt")
+    length = 0
+    with os.fdopen(fd, "wb") as out:
+        if isinstance(data, str):
+            out.write(data.encode("utf-8", "surrogatepass"))
+            length = len(data)
+        else:
+            decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+            while True:
+                block = data.read(chunk_size)
+                text = decoder.decode(block or b"", final=not block)
+                out.write(text.encode("utf-8"))
+                length += len(text)
+                if not block:
+                    break
+    return path, length
+
+
+class Source:
+    """One uploaded file or pasted text inside a stored document, spooled to disk."""
+
+    def __init__(self, name, source_type, path, size):
+        self.name = name
+        self.type = source_type
+        self.path = path
+        self.size = size
+        self._document = None
+
+    def document(self) -> MappedDocument:
+        if self._document is None:
+            self._document = MappedDocument(self.path, self.size)
+        return self._document
+
+    def resident_size(self) -> int:
+        return self._document.resident_size() if self._document is not None else 0
+
+    def release(self):
+        if self._document is not None:
+            self._document.release()
+
+    def discard(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def describe(self) -> dict:
+        return {"name": self.name, "type": self.type, "size": self.size, "status": "loaded"}
+
+
+class StoredDocument:
+    """A session's document: one or more sources, readable individually or combined."""
+
+    def __init__(self, document_id, session_id, directory, index=None):
+        self.id = document_id
+        self.session_id = session_id
+        self.sources = []
+        self._directory = directory
+        self._index = index
+        self._combined = None
+        self._stale = []
+
+    @property
+    def size(self) -> int:
+        return sum(s.size for s in self.sources)
+
+    @property
+    def paths(self) -> list:
+        """Every spool file this document owns: its sources, then any combined views."""
+        paths = [s.path for s in self.sources] + self._stale
+        if self._combined is not None and len(self.sources) > 1:
+            paths.append(self._combined.path)
+        return paths
+
+    def document(self) -> MappedDocument:
+        """All sources as a single Document, joined like the original single-slot upload."""
+        if self._combined is None:
+            if len(self.sources) == 1:
+                self._combined = self.sources[0].document()
+            else:
+                self._combined = self._concatenate()
+                if self._index is not None:
+                    self._index.alias(self._combined.path, [s.path for s in self.sources], SOURCE_SEPARATOR)
+        return self._combined
+
+    def source_documents(self) -> list:
+        return [s.document() for s in self.sources]
+
+    def resident_size(self) -> int:
+        size = sum(s.resident_size() for s in self.sources)
+        if self._combined is not None and len(self.sources) > 1:
+            size += self._combined.resident_size()
+        return size
+
+    def release(self):
+        for source in self.sources:
+            source.release()
+        if self._combined is not None:
+            self._combined.release()
+
+    def invalidate(self):
+        """Forget the combined view after sources change (runs may still be reading it)."""
+        if self._combined is not None and len(self.sources) > 1:
+            self._stale.append(self._combined.path)
+        self._combined = None
+
+    def discard(self):
+        """Release everything materialized, then remove the spool files and their index entries."""
+        self.release()
+        self.invalidate()
+        for path in self._stale:
+            if self._index is not None:
+                self._index.remove(path)
+            if os.path.exists(path):
+                os.remove(path)
+        for source in self.sources:
+            if self._index is not None:
+                self._index.remove(source.path)
+            source.discard()
+
+    def _concatenate(self) -> MappedDocument:
+        """Stream every source file into one combined spool file."""
+        fd, path = tempfile.mkstemp(dir=self._directory, suffix=".txt")
+        separator = SOURCE_SEPARATOR.encode("utf-8")
+        with os.fdopen(fd, "wb") as out:
+            for i, source in enumerate(self.sources):
+                if i:
+                    out.write(separator)
+                with open(source.path, "rb") as f:
+                    shutil.copyfileobj(f, out, SPOOL_CHUNK_SIZE)
+        length = self.size + len(SOURCE_SEPARATOR) * (len(self.sources) - 1)
+        return MappedDocument(path, length)
+
+
+class DocumentStore:
+    """
+    Uploaded documents keyed by session and document ID.
+    Every source is spooled to disk on upload and read through mmap.
+    Text materialized from those files is capped by memory_budget (characters);
+    the least recently used documents beyond it are released back to disk.
+    With a CorpusIndex, every source is indexed as it is spooled.
+    """
+
+    def __init__(self, memory_budget=256 * 1024 * 1024, spool_dir=None, index=None):
+        self.memory_budget = memory_budget
+        self.spool_dir = spool_dir or tempfile.mkdtemp(prefix="orchestrator-docs-")
+        self.index = index
+        self._documents = OrderedDict()
+        self._latest = {}
+        self._lock = threading.Lock()
+
+    def spool_source(self, name, source_type, data) -> Source:
+        """Spool text or a binary stream to disk as a Source (no lock held while writing or indexing)."""
+        path, size = spool(data, self.spool_dir)
+        source = Source(name, source_type, path, size)
+        if self.index is not None:
+            self.index.add(path, source.document(), name)
+        return source
+
+    def add_sources(self, session_id, spooled, document_id=None) -> StoredDocument:
+        """
+        Add spooled Sources to a session's document.
+        Creates a new document unless document_id names an existing one in the session.
+        """
+        with self._lock:
+            stored = self._documents.get(document_id) if document_id else None
+            if stored is None or stored.session_id != session_id:
+                stored = StoredDocument(uuid.uuid4().hex[:12], session_id, self.spool_dir, self.index)
+                self._documents[stored.id] = stored
+
+            stored.invalidate()
+            stored.sources.extend(spooled)
+
+            self._latest[session_id] = stored.id
+            self._touch(stored)
+            return stored
+
+    def get(self, session_id, document_id=None):
+        """A session's document by ID, or its most recent upload; None if not found."""
+        with self._lock:
+            document_id = document_id or self._latest.get(session_id)
+            stored = self._documents.get(document_id)
+            if stored is None or stored.session_id != session_id:
+                return None
+            self._touch(stored)
+            return stored
+
+    def delete(self, session_id, document_id) -> bool:
+        with self._lock:
+            stored = self._documents.get(document_id)
+            if stored is None or stored.session_id != session_id:
+                return False
+            del self._documents[document_id]
+            if self._latest.get(session_id) == document_id:
+                del self._latest[session_id]
+            stored.discard()
+            return True
+
+    def _touch(self, stored):
+        """Mark stored as most recently used and release older documents over budget."""
+        self._documents.move_to_end(stored.id)
+        resident = sum(d.resident_size() for d in self._documents.values())
+        for other in list(self._documents.values()):
+            if resident <= self.memory_budget:
+                break
+            if other is stored:
+                continue
+            size = other.resident_size()
+            if size:
+                other.release()
+                resident -= size
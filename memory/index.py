@@ -0,0 +1,320 @@
+import heapq
+import math
+import threading
+from array import array
+from collections import Counter
+from worker.document import STOP_WORDS, TERM_PATTERN, Document
+
+
+# Characters per window when indexing, so large sources are read one chunk at a time
+INDEX_WINDOW = 1 << 20
+
+
+class IndexedSource:
+    """
+    Forward entry for one indexed source: its terms in first-occurrence order
+    with their counts, plus the whole-document figures the handlers report.
+    """
+
+    def __init__(self, number, key, name, document):
+        self.number = number
+        self.key = key
+        self.name = name
+        self.document = document
+        self.terms = array("I")
+        self.counts = array("I")
+        self.words = 0
+        self.pieces = 0
+        self.empty = True
+        self.removed = False
+
+
+class CorpusStats:
+    """Term counts, word count and sentence-piece count of an indexed document."""
+
+    def __init__(self, term_counts, words, pieces, empty):
+        self.term_counts = term_counts
+        self.words = words
+        self.pieces = pieces
+        self.empty = empty
+
+
+class CorpusIndex:
+    """
+    Inverted index over every stored source, updated as sources are uploaded
+    and removed. Postings live in compact unsigned arrays: per term, the
+    sources containing it with their counts, and the sentences mentioning it.
+    Sentences are kept as offsets into their source and read back on demand.
+    Removed sources are tombstoned and compacted away once they outnumber live ones.
+    """
+
+    def __init__(self, window=INDEX_WINDOW):
+        self.window = window
+        self._terms = {}
+        self._term_names = []
+        self._postings = []
+        self._frequencies = []
+        self._sentence_postings = []
+        self._sources = []
+        self._by_key = {}
+        self._aliases = {}
+        self._removed = 0
+        # Sentence table: owning source and offsets in its document's own units
+        self._sentence_sources = array("I")
+        self._sentence_starts = array("Q")
+        self._sentence_ends = array("Q")
+        self._lock = threading.RLock()
+
+    def add(self, key, document, name=None):
+        """Index document under key (replacing any earlier version), one window at a time."""
+        mapped = hasattr(document, "path")
+        counts = Counter()
+        sentences = []
+        words = 0
+        pieces = 0
+        empty = True
+
+        spans = document.chunk_spans(self.window)
+        for n, (start, end) in enumerate(spans):
+            text = document.chunk_text(start, end)
+            words += len(text.split())
+            empty = empty and not text.strip()
+
+            window = Document(text)
+            offsets = window.sentence_offsets
+            # Non-final windows end in whitespace after a boundary, which splits
+            # off an empty piece the whole document wouldn't have
+            last = len(offsets) if n == len(spans) - 1 else len(offsets) - 1
+            pieces += last
+
+            position, unit = 0, start
+            for i in range(last):
+                piece_start, piece_end = offsets[i]
+                terms = TERM_PATTERN.findall(window.sentences[i].lower())
+                if not terms:
+                    continue
+                counts.update(terms)
+                if mapped:
+                    unit += len(text[position:piece_start].encode("utf-8", "surrogatepass"))
+                    length = len(text[piece_start:piece_end].encode("utf-8", "surrogatepass"))
+                else:
+                    unit, length = start + piece_start, piece_end - piece_start
+                sentences.append((unit, unit + length, set(terms) - STOP_WORDS))
+                position, unit = piece_end, unit + length
+        if not spans:
+            pieces = 1
+
+        with self._lock:
+            if key in self._by_key:
+                self._remove(key)
+            source = IndexedSource(len(self._sources), key, name or str(key), document)
+            source.words, source.pieces, source.empty = words, pieces, empty
+            self._sources.append(source)
+            self._by_key[key] = source
+
+            for term, count in counts.items():
+                term_id = self._term_id(term)
+                source.terms.append(term_id)
+                source.counts.append(count)
+                self._postings[term_id].append(source.number)
+                self._frequencies[term_id].append(count)
+
+            for start, end, terms in sentences:
+                sentence = len(self._sentence_sources)
+                self._sentence_sources.append(source.number)
+                self._sentence_starts.append(start)
+                self._sentence_ends.append(end)
+                for term in terms:
+                    self._sentence_postings[self._term_id(term)].append(sentence)
+            return source
+
+    def alias(self, key, parts, separator):
+        """
+        Make key stand for the given indexed parts joined by separator (a combined
+        document). The separator must start and end with whitespace, so it never
+        glues a word or term across a join and the parts' counts stay exact.
+        """
+        if not (separator[:1].isspace() and separator[-1:].isspace()):
+            raise ValueError(f"Alias separator {separator!r} must start and end with whitespace")
+        with self._lock:
+            self._aliases[key] = (list(parts), separator)
+
+    def remove(self, key):
+        with self._lock:
+            self._aliases.pop(key, None)
+            self._remove(key)
+
+    def covers(self, key) -> bool:
+        with self._lock:
+            parts = self._aliases[key][0] if key in self._aliases else [key]
+            return all(part in self._by_key for part in parts)
+
+    def stats(self, key):
+        """
+        CorpusStats of an indexed source or alias, matching a full scan of its
+        text exactly; None when any part isn't indexed.
+        """
+        with self._lock:
+            parts, separator = self._aliases.get(key, ([key], ""))
+            sources = [self._by_key.get(part) for part in parts]
+            if not sources or None in sources:
+                return None
+
+            term_counts = Counter()
+            for source in sources:
+                for term_id, count in zip(source.terms, source.counts):
+                    term_name = self._term_names[term_id]
+                    term_counts[term_name] = term_counts.get(term_name, 0) + count
+
+        joins = len(sources) - 1
+        separator_doc = Document(separator)
+        return CorpusStats(
+            term_counts,
+            sum(s.words for s in sources) + joins * separator_doc.word_count,
+            # Each separator without a sentence boundary merges the pieces on either side
+            sum(s.pieces for s in sources) + joins * (len(separator_doc.sentences) - 2),
+            all(s.empty for s in sources) and not separator.strip(),
+        )
+
+    def sources_mentioning(self, term: str, keys=None) -> list:
+        """[(source name, occurrences)] of the sources containing term, most mentions first."""
+        with self._lock:
+            term_id = self._terms.get(term.lower())
+            if term_id is None:
+                return []
+            allowed = self._numbers(keys)
+            hits = [
+                (self._sources[number].name, count)
+                for number, count in zip(self._postings[term_id], self._frequencies[term_id])
+                if number in allowed
+            ]
+        return sorted(hits, key=lambda hit: -hit[1])
+
+    def top_terms(self, keys=None, k=10) -> list:
+        """
+        [(term, tf-idf)] of the highest-weighted terms across the given sources
+        (default: all), with smoothed idf over every live source in the index.
+        """
+        with self._lock:
+            allowed = self._numbers(keys)
+            total = len(self._sources) - self._removed
+            tf = Counter()
+            for number in allowed:
+                source = self._sources[number]
+                for term_id, count in zip(source.terms, source.counts):
+                    tf[term_id] += count
+
+            scored = []
+            for term_id, count in tf.items():
+                if self._term_names[term_id] in STOP_WORDS:
+                    continue
+                df = sum(1 for n in self._postings[term_id] if not self._sources[n].removed)
+                scored.append((count * (math.log((1 + total) / (1 + df)) + 1), term_id))
+            best = heapq.nlargest(k, scored)
+            return [(self._term_names[term_id], round(score, 4)) for score, term_id in best]
+
+    def search(self, query: str, keys=None, k=5) -> list:
+        """
+        Sentences across the given sources (default: all) that best match the
+        query's terms, scored by the summed idf of the terms they contain.
+        Returns [{ "source", "sentence", "score" }], best first.
+        """
+        terms = set(TERM_PATTERN.findall(query.lower())) - STOP_WORDS
+        with self._lock:
+            allowed = self._numbers(keys)
+            total = len(self._sentence_sources) or 1
+            scores = {}
+            for term in terms:
+                term_id = self._terms.get(term)
+                if term_id is None:
+                    continue
+                postings = self._sentence_postings[term_id]
+                idf = math.log(1 + total / len(postings)) if postings else 0.0
+                for sentence in postings:
+                    if self._sentence_sources[sentence] in allowed:
+                        scores[sentence] = scores.get(sentence, 0.0) + idf
+
+            best = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], -item[0]))
+            hits = []
+            for sentence, score in best:
+                source = self._sources[self._sentence_sources[sentence]]
+                hits.append((source.name, source.document, self._sentence_starts[sentence],
+                             self._sentence_ends[sentence], score))
+
+        return [
+            {"source": name, "sentence": document.chunk_text(start, end), "score": round(score, 4)}
+            for name, document, start, end, score in hits
+        ]
+
+    def stats_summary(self) -> dict:
+        with self._lock:
+            return {
+                "sources": len(self._sources) - self._removed,
+                "terms": len(self._terms),
+                "sentences": len(self._sentence_sources),
+                "postings": sum(len(p) for p in self._postings),
+                "sentence_postings": sum(len(p) for p in self._sentence_postings),
+            }
+
+    def _term_id(self, term: str) -> int:
+        term_id = self._terms.get(term)
+        if term_id is None:
+            term_id = len(self._term_names)
+            self._terms[term] = term_id
+            self._term_names.append(term)
+            self._postings.append(array("I"))
+            self._frequencies.append(array("I"))
+            self._sentence_postings.append(array("I"))
+        return term_id
+
+    def _numbers(self, keys) -> set:
+        """Source numbers for keys (aliases expanded); every live source when keys is None."""
+        if keys is None:
+            return {s.number for s in self._sources if not s.removed}
+        numbers = set()
+        for key in keys:
+            for part in self._aliases.get(key, ([key],))[0]:
+                source = self._by_key.get(part)
+                if source is not None:
+                    numbers.add(source.number)
+        return numbers
+
+    def _remove(self, key):
+        source = self._by_key.pop(key, None)
+        if source is None:
+            return
+        source.removed = True
+        source.document = None
+        self._removed += 1
+        if self._removed * 2 > len(self._sources):
+            self._compact()
+
+    def _compact(self):
+        """Rebuild postings without removed sources, renumbering the live ones."""
+        live = [s for s in self._sources if not s.removed]
+        renumber = {s.number: n for n, s in enumerate(live)}
+        for source in live:
+            source.number = renumber[source.number]
+
+        for term_id in range(len(self._term_names)):
+            postings, frequencies = array("I"), array("I")
+            for number, count in zip(self._postings[term_id], self._frequencies[term_id]):
+                if number in renumber:
+                    postings.append(renumber[number])
+                    frequencies.append(count)
+            self._postings[term_id], self._frequencies[term_id] = postings, frequencies
+
+        sentences = {}
+        sources, starts, ends = array("I"), array("Q"), array("Q")
+        for sentence, number in enumerate(self._sentence_sources):
+            if number in renumber:
+                sentences[sentence] = len(sources)
+                sources.append(renumber[number])
+                starts.append(self._sentence_starts[sentence])
+                ends.append(self._sentence_ends[sentence])
+        self._sentence_sources, self._sentence_starts, self._sentence_ends = sources, starts, ends
+        for term_id, postings in enumerate(self._sentence_postings):
+            self._sentence_postings[term_id] = array("I", (sentences[s] for s in postings if s in sentences))
+
+        self._sources = live
+        self._removed = 0
@@ -0,0 +1,242 @@
+import copy
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+# Upper bounds (characters) of the document size buckets plans are indexed by,
+# one per factor of 4 so that documents of very different cost don't share plans
+SIZE_BUCKETS = (
+    (0, "empty"),
+    (4 * 1024, "4KB"), (16 * 1024, "16KB"), (64 * 1024, "64KB"), (256 * 1024, "256KB"),
+    (1024 * 1024, "1MB"), (4 * 1024 * 1024, "4MB"), (16 * 1024 * 1024, "16MB"),
+    (64 * 1024 * 1024, "64MB"), (256 * 1024 * 1024, "256MB"),
+)
+
+# Cost estimates the Planner refreshes whenever it reuses a plan; they don't make a new variant
+_ESTIMATES = ("estimated_s", "estimated_makespan_s")
+
+_WORD = re.compile(r"\w+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS plans (
+    plan_id TEXT NOT NULL,
+    intent_key TEXT NOT NULL,
+    num_sources INTEGER NOT NULL,
+    size_bucket TEXT NOT NULL,
+    patterns_version TEXT NOT NULL,
+    plan_json TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    runs INTEGER NOT NULL DEFAULT 0,
+    total_latency REAL NOT NULL DEFAULT 0,
+    total_confidence REAL NOT NULL DEFAULT 0,
+    total_failure_rate REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (plan_id, intent_key, num_sources, size_bucket)
+);
+CREATE INDEX IF NOT EXISTS plans_lookup
+    ON plans (intent_key, num_sources, size_bucket, patterns_version);
+"""
+
+# Best plan first: highest mean confidence discounted by failure rate, then fastest
+_RANK = """
+    CASE WHEN runs = 0 THEN 0.0
+         ELSE (total_confidence / runs) * (1.0 - total_failure_rate / runs) END DESC,
+    CASE WHEN runs = 0 THEN 0.0 ELSE total_latency / runs END ASC,
+    created_at ASC
+"""
+
+
+def normalize_intent(intent: str) -> str:
+    """Case- and punctuation-insensitive form of an intent used as the lookup key."""
+    return " ".join(_WORD.findall(intent.lower()))
+
+
+def size_bucket(size: int) -> str:
+    for limit, name in SIZE_BUCKETS:
+        if size <= limit:
+            return name
+    return "huge"
+
+
+def plan_id(plan: dict) -> str:
+    """
+    Content hash of a plan's tasks and policy, cost estimates aside, so an
+    edited plan is a distinct variant.
+    """
+    content = json.dumps(
+        {
+            "tasks": [_without_estimates(task) for task in plan.get("tasks", [])],
+            "execution_policy": _without_estimates(plan.get("execution_policy", {})),
+        },
+        sort_keys=True,
+    )
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+
+
+def _without_estimates(fields: dict) -> dict:
+    return {name: value for name, value in fields.items() if name not in _ESTIMATES}
+
+
+class PlanStore:
+    """
+    Episodic memory: plans persisted in SQLite, keyed by normalized intent plus
+    document characteristics (source count and size bucket), with per-plan
+    execution stats. Lookups return the best-performing plan for a key, served
+    from an in-memory LRU tier when possible.
+
+    Variants compete: a variant without runs is returned first so it gets
+    stats, and when the best one scores below min_score (mean confidence
+    discounted by failure rate) over at least min_runs runs, lookup returns
+    None so the caller plans again and saves the result as another variant,
+    up to max_variants per key.
+
+    Plans are tagged with the Planner's patterns_version; plans made from other
+    task patterns are never returned and are dropped by invalidate().
+    """
+
+    def __init__(self, path=":memory:", patterns_version="", lru_size=256, min_score=0.5, min_runs=3,
+                 max_variants=4):
+        self.path = path
+        self.patterns_version = patterns_version
+        self.lru_size = lru_size
+        self.min_score = min_score
+        self.min_runs = min_runs
+        self.max_variants = max_variants
+        self._lru = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._db.executescript(_SCHEMA)
+        # Plans filed under size buckets that no longer exist can never be looked up
+        buckets = [name for _, name in SIZE_BUCKETS] + ["huge"]
+        self._db.execute(
+            f"DELETE FROM plans WHERE size_bucket NOT IN ({', '.join('?' * len(buckets))})", buckets,
+        )
+        self._db.commit()
+
+    def lookup(self, intent: str, num_sources: int, document_size: int):
+        """
+        Stored plan to run for these characteristics (a copy): an untried
+        variant, else the best one. None if nothing is stored, or if the best
+        variant scores too low and another may still be added.
+        """
+        key = self._key(intent, num_sources, document_size)
+        with self._lock:
+            plan = self._lru.get(key)
+            if plan is not None:
+                self._lru.move_to_end(key)
+            else:
+                rows = self._db.execute(
+                    f"SELECT plan_json, runs, total_confidence, total_failure_rate FROM plans "
+                    f"WHERE intent_key = ? AND num_sources = ? AND size_bucket = ? AND patterns_version = ? "
+                    f"ORDER BY {_RANK}",
+                    key,
+                ).fetchall()
+                if not rows:
+                    return None
+                untried = [row for row in rows if row[1] == 0]
+                plan_json, runs, confidence, failures = untried[0] if untried else rows[0]
+                score = (confidence / runs) * (1.0 - failures / runs) if runs else None
+                if (score is not None and score < self.min_score and runs >= self.min_runs
+                        and len(rows) < self.max_variants):
+                    return None
+                plan = json.loads(plan_json)
+                self._remember(key, plan)
+
+            self._db.execute(
+                "UPDATE plans SET last_used = ? WHERE plan_id = ? AND intent_key = ? "
+                "AND num_sources = ? AND size_bucket = ?",
+                (time.time(), plan["plan_id"], *key[:3]),
+            )
+            self._db.commit()
+            return copy.deepcopy(plan)
+
+    def save(self, intent: str, num_sources: int, document_size: int, plan: dict) -> str:
+        """Store plan under these characteristics (no-op if already stored); returns its plan_id."""
+        plan.setdefault("plan_id", plan_id(plan))
+        key = self._key(intent, num_sources, document_size)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR IGNORE INTO plans (plan_id, intent_key, num_sources, size_bucket, "
+                "patterns_version, plan_json, created_at, last_used) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (plan["plan_id"], *key[:3], self.patterns_version, json.dumps(plan), now, now),
+            )
+            self._db.commit()
+            self._lru.pop(key, None)
+        return plan["plan_id"]
+
+    def record_run(self, plan: dict, num_sources: int, document_size: int,
+                   latency: float, confidence: float, failure_rate: float):
+        """
+        Add one execution's stats to the plan's record. Only plans the Planner
+        saved under these characteristics are recorded: a plan edited or
+        written by a client (its plan_id missing or no longer matching its
+        content) never enters the ranking. Returns whether stats were recorded.
+        """
+        if plan.get("plan_id") is None or plan["plan_id"] != plan_id(plan):
+            return False
+        plan_key = self._key(plan.get("intent", ""), num_sources, document_size)
+
+        with self._lock:
+            updated = self._db.execute(
+                "UPDATE plans SET runs = runs + 1, total_latency = total_latency + ?, "
+                "total_confidence = total_confidence + ?, total_failure_rate = total_failure_rate + ?, "
+                "last_used = ? WHERE plan_id = ? AND intent_key = ? AND num_sources = ? AND size_bucket = ? "
+                "AND patterns_version = ?",
+                (latency, confidence, failure_rate, time.time(), plan["plan_id"], *plan_key),
+            ).rowcount
+            self._db.commit()
+            # The ranking may have changed
+            self._lru.pop(plan_key, None)
+        return updated > 0
+
+    def stats(self, intent: str, num_sources: int, document_size: int) -> list:
+        """Every stored variant for these characteristics with its mean stats, best first."""
+        key = self._key(intent, num_sources, document_size)
+        with self._lock:
+            rows = self._db.execute(
+                f"SELECT plan_id, runs, total_latency, total_confidence, total_failure_rate FROM plans "
+                f"WHERE intent_key = ? AND num_sources = ? AND size_bucket = ? AND patterns_version = ? "
+                f"ORDER BY {_RANK}",
+                key,
+            ).fetchall()
+        return [
+            {
+                "plan_id": pid,
+                "runs": runs,
+                "mean_latency": latency / runs if runs else None,
+                "mean_confidence": confidence / runs if runs else None,
+                "failure_rate": failures / runs if runs else None,
+            }
+            for pid, runs, latency, confidence, failures in rows
+        ]
+
+    def invalidate(self, patterns_version=None):
+        """
+        Hook for task pattern changes: adopt patterns_version (if given) and
+        drop every plan made from other patterns, in memory and on disk.
+        """
+        with self._lock:
+            if patterns_version is not None:
+                self.patterns_version = patterns_version
+            self._db.execute("DELETE FROM plans WHERE patterns_version != ?", (self.patterns_version,))
+            self._db.commit()
+            self._lru.clear()
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+    def _key(self, intent, num_sources, document_size):
+        return (normalize_intent(intent), num_sources, size_bucket(document_size), self.patterns_version)
+
+    def _remember(self, key, plan):
+        self._lru[key] = plan
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
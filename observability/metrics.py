@@ -0,0 +1,122 @@
+import bisect
+import threading
+
+
+# Latency buckets (seconds), from sub-millisecond handlers up to multi-minute map-reduce runs
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+class Counter:
+    """Monotonic counter, one value per label set."""
+
+    def __init__(self, name, description):
+        self.name = name
+        self.description = description
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        return self._values.get(tuple(sorted(labels.items())), 0)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_text(key)} {value}")
+        return lines
+
+
+class Histogram:
+    """Cumulative-bucket histogram, one series per label set."""
+
+    def __init__(self, name, description, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # Per-bucket counts (last slot is +Inf), then sum and count
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect.bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (counts, total, count) in sorted(self._series.items()):
+                cumulative = 0
+                for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                    cumulative += bucket_count
+                    labels = _label_text(key + (("le", bound),))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                lines.append(f"{self.name}_sum{_label_text(key)} {total:.6f}")
+                lines.append(f"{self.name}_count{_label_text(key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """In-process metrics, rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name, description="") -> Counter:
+        return self._get(name, lambda: Counter(name, description))
+
+    def histogram(self, name, description="", buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._get(name, lambda: Histogram(name, description, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def _get(self, name, create):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = create()
+            return metric
+
+
+# Process-wide registry served by GET /metrics
+registry = MetricsRegistry()
+
+STAGE_SECONDS = registry.histogram(
+    "orchestrator_stage_duration_seconds", "Wall time per pipeline stage (plan, task, handler, assemble, sse)"
+)
+TASKS_RUN = registry.counter("orchestrator_tasks_run_total", "Task attempts executed, by task type")
+TASK_RETRIES = registry.counter("orchestrator_task_retries_total", "Task attempts retried for low confidence")
+TASK_HEDGES = registry.counter(
+    "orchestrator_task_hedges_total", "Duplicate attempts of slow tasks, by task type and outcome (launched, won)"
+)
+LOW_CONFIDENCE = registry.counter(
+    "orchestrator_low_confidence_failures_total", "Tasks still below the confidence threshold after all retries"
+)
+CACHE_LOOKUPS = registry.counter("orchestrator_cache_lookups_total", "Result cache lookups, by hit or miss")
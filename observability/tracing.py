@@ -0,0 +1,87 @@
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from .metrics import STAGE_SECONDS
+
+
+class Span:
+    """One timed stage of a run; attributes carry task ID, worker ID, attempt and document size."""
+
+    def __init__(self, tracer, name, trace_id, parent_id, attributes):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.start_time = time.time()
+        self.duration = None
+        self._started = time.perf_counter()
+
+    def end(self, **attributes):
+        if self.duration is not None:
+            return
+        self.duration = time.perf_counter() - self._started
+        self.attributes.update(attributes)
+        self.tracer._finish(self)
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start": self.start_time,
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "attributes": self.attributes,
+        }
+
+
+class Tracer:
+    """
+    Records structured spans for every pipeline stage.
+    Finished spans feed the stage latency histogram, are kept in a bounded
+    in-memory buffer, and are appended as JSON lines to path when set.
+    """
+
+    def __init__(self, path=None, keep=1000):
+        self.path = path
+        self._recent = deque(maxlen=keep)
+        self._lock = threading.Lock()
+
+    def start(self, name, parent=None, **attributes) -> Span:
+        """Open a span; spans without a parent start a new trace."""
+        trace_id = parent.trace_id if parent is not None else uuid.uuid4().hex
+        parent_id = parent.span_id if parent is not None else None
+        return Span(self, name, trace_id, parent_id, attributes)
+
+    @contextmanager
+    def span(self, name, parent=None, **attributes):
+        span = self.start(name, parent, **attributes)
+        try:
+            yield span
+        except Exception as e:
+            span.attributes["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            span.end()
+
+    def recent(self) -> list:
+        with self._lock:
+            return [s.to_dict() for s in self._recent]
+
+    def _finish(self, span):
+        STAGE_SECONDS.observe(span.duration, stage=span.name)
+        with self._lock:
+            self._recent.append(span)
+            if self.path:
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(span.to_dict(), default=str) + "\n")
+
+
+# Process-wide tracer; set ORCHESTRATOR_TRACE_FILE to dump every span as JSON lines
+tracer = Tracer(os.environ.get("ORCHESTRATOR_TRACE_FILE"))
@@ -1,6 +1,127 @@
+import heapq
+import threading
 import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from worker.cancellation import DEADLINE_EXCEEDED, Cancelled, CancellationToken
+from worker.document import Document
+from worker.hedging import HedgePolicy, LatencyHistory
+from worker.retry import RetryPolicy
 from worker.worker import Worker
 from assembler.assembler import Assembler
+from observability.metrics import LOW_CONFIDENCE, TASK_HEDGES, TASK_RETRIES, TASKS_RUN
+from observability.tracing import tracer
+from planner.cost_model import available_cores
+
+
+# Threads in the orchestrator's shared pool when max_workers isn't given
+THREAD_POOL_SIZE = 32
+
+# Documents a process-pool worker keeps tokenized, most recently used last
+PROCESS_DOCUMENTS = 4
+_process_documents = OrderedDict()
+
+
+def _process_document(document):
+    """
+    This process's copy of document, so every task a pool process runs on one
+    document shares its tokenization. Spool files never change, so mapped
+    documents are keyed by path; others by content hash.
+    """
+    key = getattr(document, "path", None) or document.digest
+    cached = _process_documents.get(key)
+    if cached is None:
+        cached = _process_documents[key] = document
+        while len(_process_documents) > PROCESS_DOCUMENTS:
+            _process_documents.popitem(last=False)
+    _process_documents.move_to_end(key)
+    return cached
+
+
+def _task_document(task, document, sources):
+    """The per-source Document for source-scoped tasks, else the whole document."""
+    source = task.get("source")
+    if isinstance(source, int) and 0 <= source < len(sources):
+        return sources[source]
+    return document
+
+
+def _compute_task(worker_name, temperature, task, document, deadline=None):
+    """
+    Compute a task's deterministic output inside a process-pool worker,
+    raising Cancelled if its deadline (a time.time() value) has passed.
+    """
+    worker = Worker(name=worker_name, temperature=temperature)
+    cancel = None if deadline is None else CancellationToken(time.monotonic() + deadline - time.time())
+    return worker.compute(task, _process_document(document), cancel)
+
+
+def _wall_deadline(token):
+    """token's nearest deadline as a time.time() value another process can read, or None."""
+    remaining = token.remaining()
+    return None if remaining is None else time.time() + remaining
+
+
+def _traced_compute(span, worker, task, document, cancel=None):
+    """Worker.compute inside a handler span, on whichever thread runs it."""
+    with tracer.span("handler", parent=span, worker=worker.name, task_type=task.get("type", "")):
+        return worker.compute(task, document, cancel)
+
+
+def _resolved(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+def _failed(exception):
+    future = Future()
+    future.set_exception(exception)
+    return future
+
+
+def _chain(inner, outer):
+    """Settle outer with inner's outcome."""
+    if inner.cancelled():
+        outer.set_exception(Cancelled())
+    elif inner.exception() is not None:
+        outer.set_exception(inner.exception())
+    else:
+        outer.set_result(inner.result())
+
+
+def critical_path_priorities(tasks: list, weights: dict = None) -> dict:
+    """
+    Length of the longest dependency chain starting at each task (inclusive),
+    counting each task as 1 or, given weights, as its weight (e.g. estimated
+    seconds). Tasks on the critical path get the highest priority in the ready queue.
+    Raises ValueError if the plan's depends_on edges contain a cycle.
+    """
+    ids = {t["id"] for t in tasks}
+    dependents = {t["id"]: [] for t in tasks}
+    pending = {}
+    for task in tasks:
+        deps = [d for d in task.get("depends_on", []) if d in ids]
+        pending[task["id"]] = len(deps)
+        for dep in deps:
+            dependents[dep].append(task["id"])
+
+    # Kahn's algorithm for a topological order, then walk it backwards
+    order = [tid for tid, count in pending.items() if count == 0]
+    for tid in order:
+        for child in dependents[tid]:
+            pending[child] -= 1
+            if pending[child] == 0:
+                order.append(child)
+
+    if len(order) != len(tasks):
+        raise ValueError("Plan dependencies contain a cycle")
+
+    priorities = {}
+    for tid in reversed(order):
+        weight = weights[tid] if weights is not None else 1
+        priorities[tid] = weight + max((priorities[c] for c in dependents[tid]), default=0)
+    return priorities
 
 
 class Orchestrator:
@@ -9,132 +130,132 @@ class Orchestrator:
     Yields progress updates for SSE streaming.
     """
 
-    def __init__(self, confidence_threshold=0.6, max_retries=2):
+    def __init__(self, confidence_threshold=0.6, max_retries=2, executor="thread", max_workers=None,
+                 cache=None, map_reduce=None, plan_store=None, index=None, cost_model=None, backend=None):
         self.confidence_threshold = confidence_threshold
         self.max_retries = max_retries
+        # Pool used when a plan's execution_policy asks for parallel execution:
+        # "thread" for I/O-bound handlers, "process" for CPU-bound work on large documents.
+        # Each kind is created on first use and shared by every run until shutdown()
+        self.executor = executor
+        # Size of those pools (default: THREAD_POOL_SIZE threads, or one process per
+        # available core) and the slots a plan gets unless its policy sets max_workers
+        self.max_workers = max_workers
+        self._pools = {}
+        self._pools_lock = threading.Lock()
+        # Optional ResultCache shared by every run; retries and re-runs on an
+        # unchanged document then only redraw confidence noise
+        self.cache = cache
+        # Optional MapReduceRunner; documents above its threshold are processed
+        # chunk by chunk across its own process pool
+        self.map_reduce = map_reduce
+        # Optional PlanStore; every finished run of a plan the Planner stored
+        # adds its latency, confidence and failure rate to that plan's stats
+        self.plan_store = plan_store
+        # Optional CorpusIndex; analyze and validate on indexed documents become lookups
+        self.index = index
+        # Optional CostModel; ready tasks are then ordered by their estimated
+        # remaining chain cost, and every handler run calibrates it
+        self.cost_model = cost_model
+        # Optional backend every Worker calls before its handler (see worker.backend.FakeBackend)
+        self.backend = backend
+        # Latencies of pool-run attempts by task type, which hedging thresholds come from
+        self.latencies = LatencyHistory()
 
-    def run(self, plan: dict, document_text: str):
+    def run(self, plan: dict, document_text, sources=None, cancel=None):
         """
-        Execute a plan against the given document text.
+        Execute a plan against the given document text (or a pre-built Document).
+        The document is tokenized once here and shared by every task and retry.
+        Tasks with a "source" index run against that entry of sources (a list of
+        per-source Documents) instead, so sources are processed individually.
+
+        Tasks form a DAG through their "depends_on" ids. A ready-queue scheduler
+        starts each task once its dependencies have results, critical path first,
+        and hands upstream outputs to the task as its "inputs".
         Yields progress dicts for each step, then a final result dict.
 
+        execution_policy may set "deadline_s" (whole plan) and "task_deadline_s"
+        (each task, retries included). Tasks still unfinished when their deadline
+        passes, or when the optional CancellationToken is cancelled, are stopped
+        and reported by the Assembler alongside the partial results.
+
+        Parallel plans may opt into hedging with "hedge_percentile" (e.g. 95):
+        an attempt running longer than that percentile of recent latencies for
+        its task type gets a duplicate, and the first copy to finish at or above
+        the confidence threshold wins (see HedgePolicy). "hedge_min_samples"
+        and "max_hedges" tune it.
+
+        With the "process" executor, handlers run in pool processes while the
+        backend call still waits here, under the attempt's token. A handler
+        already running in a process only sees its deadline, though: a
+        cancellation or lost hedge can't interrupt it, so it runs to the end
+        and its output is discarded.
+
         Yields:
             {"type": "worker_update", "worker_id": int, "status": str, ...}
+            {"type": "partial", "task_id": str, "output": str, "failed": bool, ...}
             {"type": "result", "assembled": dict, "overall_confidence": float}
         """
-        tasks = plan.get("tasks", [])
+        tasks = self._plan_tasks(plan)
         policy = plan.get("execution_policy", {})
         threshold = policy.get("confidence_threshold", self.confidence_threshold)
-        max_retries = policy.get("max_retries", self.max_retries)
+        retry = RetryPolicy(
+            policy.get("max_retries", self.max_retries),
+            backoff_base=policy.get("backoff_base", 0.5),
+            backoff_max=policy.get("backoff_max", 10.0),
+        )
+        hedge = HedgePolicy(
+            policy.get("hedge_percentile"),
+            min_samples=policy.get("hedge_min_samples", 20),
+            max_hedges=policy.get("max_hedges", 1),
+        )
+        token = (cancel or CancellationToken()).child(policy.get("deadline_s"))
 
-        # Group tasks by worker
-        worker_tasks = {}
-        for task in tasks:
-            wid = task.get("worker", 1)
-            worker_tasks.setdefault(wid, []).append(task)
-
-        # Create worker instances
-        workers = {}
-        for wid in worker_tasks:
-            workers[wid] = Worker(name=f"Worker-{wid}", temperature=0.3)
+        document = document_text
+        if not isinstance(document, Document):
+            document = Document(document_text)
+        sources = [s if isinstance(s, Document) else Document(s) for s in sources or []]
 
         worker_outputs = {}
-        all_confidences = []
-
-        # Execute tasks per worker
-        for wid, task_list in worker_tasks.items():
-            worker = workers[wid]
-            total = len(task_list)
-
-            yield {
-                "type": "worker_update",
-                "worker_id": wid,
-                "status": "running",
-                "current_task": 0,
-                "total_tasks": total,
-                "task_description": "Starting...",
-                "confidence": 0,
-                "progress": 0,
-            }
+        incomplete = {}
+        assembler = Assembler(confidence_threshold=threshold, total_tasks=len(tasks))
+        started = time.perf_counter()
 
-            for idx, task in enumerate(task_list):
-                task_id = task.get("id", f"t{idx}")
-
-                yield {
-                    "type": "worker_update",
-                    "worker_id": wid,
-                    "status": "running",
-                    "current_task": idx + 1,
-                    "total_tasks": total,
-                    "task_description": task.get("description", "Processing..."),
-                    "confidence": 0,
-                    "progress": int(((idx + 1) / total) * 100),
-                }
-
-                # Execute with retries
-                result = None
-                for attempt in range(max_retries + 1):
-                    result = worker.execute(task, document_text)
-
-                    if result["confidence"] >= threshold:
-                        break
+        run_span = tracer.start(
+            "run", tasks=len(tasks), sources=len(sources), document_size=len(document),
+        )
+        try:
+            yield from self._schedule(
+                tasks, document, sources, threshold, retry, hedge, policy, token,
+                worker_outputs, incomplete, assembler, run_span,
+            )
 
-                    if attempt < max_retries:
-                        yield {
-                            "type": "worker_update",
-                            "worker_id": wid,
-                            "status": "running",
-                            "current_task": idx + 1,
-                            "total_tasks": total,
-                            "task_description": f"Retrying ({attempt + 1}/{max_retries}): {task.get('description', '')}",
-                            "confidence": int(result["confidence"] * 100),
-                            "progress": int(((idx + 1) / total) * 100),
-                        }
-
-                worker_outputs[task_id] = result
-                all_confidences.append(result["confidence"])
-
-                yield {
-                    "type": "worker_update",
-                    "worker_id": wid,
-                    "status": "running",
-                    "current_task": idx + 1,
-                    "total_tasks": total,
-                    "task_description": task.get("description", "Done"),
-                    "confidence": int(result["confidence"] * 100),
-                    "progress": int(((idx + 1) / total) * 100),
-                }
-
-            # Worker done
-            avg_conf = sum(
-                worker_outputs[t["id"]]["confidence"]
-                for t in task_list
-                if t["id"] in worker_outputs
-            ) / max(1, len(task_list))
-
-            final_status = "complete" if avg_conf >= threshold else "failed"
-
-            yield {
-                "type": "worker_update",
-                "worker_id": wid,
-                "status": final_status,
-                "current_task": total,
-                "total_tasks": total,
-                "task_description": "Complete" if final_status == "complete" else "Failed — low confidence",
-                "confidence": int(avg_conf * 100),
-                "progress": 100,
-            }
+            # Keep assembled output in plan order regardless of completion order
+            worker_outputs = {t["id"]: worker_outputs[t["id"]] for t in tasks if t["id"] in worker_outputs}
+            incomplete = {t["id"]: incomplete[t["id"]] for t in tasks if t["id"] in incomplete}
 
-        # Assemble results
-        assembler = Assembler(confidence_threshold=threshold)
-        assembled = assembler.assemble(worker_outputs)
+            # Assemble results
+            with tracer.span("assemble", parent=run_span, tasks=len(worker_outputs)):
+                assembled = assembler.assemble(worker_outputs, incomplete)
+        finally:
+            # Stops anything still running if the caller abandoned this generator
+            token.cancel()
+            run_span.end(incomplete=len(incomplete))
 
         # Compute overall confidence
-        overall = 0
-        if all_confidences:
-            overall = round(sum(all_confidences) / len(all_confidences), 2)
+        overall = assembler.overall_confidence
 
         warnings = len(assembled.get("failed_tasks", []))
+        cancelled = any(not r.endswith(DEADLINE_EXCEEDED) for r in incomplete.values())
+
+        if self.plan_store is not None and tasks and not cancelled:
+            document_size = sum(len(s) for s in sources) if sources else len(document)
+            self.plan_store.record_run(
+                plan, len(sources), document_size,
+                latency=time.perf_counter() - started,
+                confidence=overall,
+                failure_rate=warnings / len(tasks),
+            )
 
         yield {
             "type": "result",
@@ -143,4 +264,493 @@ class Orchestrator:
             "total_tasks": len(tasks),
             "completed_tasks": len(tasks) - warnings,
             "warnings": warnings,
+            "timed_out": any(r.endswith(DEADLINE_EXCEEDED) for r in incomplete.values()),
+            "cancelled": cancelled,
+        }
+
+    def validate_plan(self, plan: dict):
+        """Raise ValueError if the plan's tasks cannot be scheduled."""
+        critical_path_priorities(self._plan_tasks(plan))
+
+    def _plan_tasks(self, plan):
+        return [
+            task if "id" in task else dict(task, id=f"t{idx}")
+            for idx, task in enumerate(plan.get("tasks", []))
+        ]
+
+    def _schedule(self, tasks, document, sources, threshold, retry, hedge, policy, token,
+                  worker_outputs, incomplete, assembler, run_span):
+        """
+        Ready-queue scheduler over the plan's dependency graph.
+        Sequential plans run one task at a time inline; parallel plans dispatch
+        every ready task to a thread or process pool, so independent branches
+        overlap and progress events interleave across workers.
+        Each attempt is traced as a "task" span from dispatch to result.
+
+        Low-confidence results are retried per the RetryPolicy: deterministic
+        handlers only have their confidence noise redrawn, non-deterministic
+        ones are re-executed once their backoff elapses.
+
+        Each task runs under a child of token carrying its own deadline. A task
+        whose token fires is recorded in incomplete (its dependents are skipped);
+        when token itself fires, every unfinished task is.
+
+        Every task result or stop is also folded into assembler and yielded as
+        a "partial" event, so clients see assembled output as it arrives.
+
+        With hedging on, each pool attempt runs under its own child token and
+        the pool gets max_hedges slots beyond max_workers, so even a plan whose
+        tasks fill every slot (e.g. a chain on one worker) can be hedged. An
+        attempt running past its HedgePolicy delay is duplicated into a free
+        slot; the first copy to finish at or above threshold is used (the last
+        one regardless) and the other copies are cancelled.
+        """
+        weights = None
+        if self.cost_model is not None:
+            weights = {
+                t["id"]: self.cost_model.estimate(t.get("type", ""), len(_task_document(t, document, sources)))
+                for t in tasks
+            }
+        priorities = critical_path_priorities(tasks, weights)
+        task_index = {t["id"]: i for i, t in enumerate(tasks)}
+        deps = {
+            t["id"]: [d for d in t.get("depends_on", []) if d in task_index]
+            for t in tasks
+        }
+        dependents = {t["id"]: [] for t in tasks}
+        for tid, task_deps in deps.items():
+            for dep in task_deps:
+                dependents[dep].append(tid)
+        waiting = {tid: len(task_deps) for tid, task_deps in deps.items()}
+
+        # Group tasks by worker
+        worker_tasks = {}
+        for task in tasks:
+            worker_tasks.setdefault(task.get("worker", 1), []).append(task)
+
+        # Create worker instances
+        workers = {}
+        for wid in worker_tasks:
+            workers[wid] = Worker(
+                name=f"Worker-{wid}", temperature=0.3, cache=self.cache, map_reduce=self.map_reduce,
+                index=self.index, cost_model=self.cost_model, backend=self.backend,
+            )
+
+        hedge_slots = hedge.max_hedges if hedge.enabled and policy.get("parallel") else 0
+        pool, slots, kind = self._plan_pool(tasks, document, policy)
+        if kind != "process":
+            self._rank_sources(tasks, document, sources, workers, run_span)
+
+        started = {wid: 0 for wid in worker_tasks}
+        completed = {wid: 0 for wid in worker_tasks}
+
+        ready = []
+        for task in tasks:
+            if waiting[task["id"]] == 0:
+                heapq.heappush(ready, (-priorities[task["id"]], task_index[task["id"]]))
+
+        task_timeout = policy.get("task_deadline_s")
+        task_tokens = {}
+        hedging = hedge.enabled and pool is not None
+        # Pool-run attempts: future -> (start time, attempt token, whether it is a hedge)
+        attempts = {}
+        # When each hedgeable attempt gets its next hedge, and hedges launched per task
+        hedge_due = {}
+        hedges = {}
+
+        def submit(task, attempt, span, task_token):
+            worker = workers[task.get("worker", 1)]
+            run_task = dict(task, inputs=[
+                dict(worker_outputs[dep], id=dep, type=tasks[task_index[dep]].get("type", ""))
+                for dep in deps[task["id"]]
+            ])
+            task_document = _task_document(task, document, sources)
+            span.attributes["document_size"] = len(task_document)
+            TASKS_RUN.inc(type=task.get("type", ""))
+            if pool is None:
+                try:
+                    return _resolved(_traced_compute(span, worker, run_task, task_document, task_token))
+                except Cancelled as e:
+                    return _failed(e)
+            if kind != "process":
+                return pool.submit(_traced_compute, span, worker, run_task, task_document, task_token)
+
+            # Process workers can't see the index, cache or backend, so consult them from here;
+            # the token only reaches them as its deadline
+            output = worker.indexed_output(run_task, task_document)
+            if output is not None:
+                return _resolved(output)
+            key = worker.cache_key(run_task, task_document)
+            if key is not None:
+                cached = self.cache.get(key)
+                if cached is not None:
+                    return _resolved(cached)
+            # Mapped documents pickle as their path; pool processes keep what they've tokenized
+            compute = lambda: pool.submit(
+                _compute_task, worker.name, worker.temperature, run_task, task_document,
+                _wall_deadline(task_token),
+            )
+            future = compute() if self.backend is None else self._after_backend(run_task, task_token, compute)
+            if key is not None:
+                future.add_done_callback(lambda f: self._store(key, f))
+            if self.cost_model is not None:
+                # Slots fit in the pool, so submit-to-done is close to run time unless other runs fill it
+                submitted = time.perf_counter()
+                future.add_done_callback(lambda f: self._record_cost(run_task, task_document, submitted, f))
+            return future
+
+        def launch(task, attempt, span, is_hedge=False):
+            """Submit an attempt and track it in running."""
+            attempt_token = task_tokens[task["id"]].child() if hedging else task_tokens[task["id"]]
+            future = submit(task, attempt, span, attempt_token)
+            running[future] = (task, attempt, span)
+            if pool is not None and not future.done():
+                now = time.monotonic()
+                attempts[future] = (now, attempt_token, is_hedge)
+                delay = hedge.delay(self.latencies, task.get("type", "")) if hedging and not is_hedge else None
+                if delay is not None:
+                    hedge_due[future] = now + delay
+
+        def forget(future):
+            attempts.pop(future, None)
+            hedge_due.pop(future, None)
+
+        def has_slot():
+            """Whether a task may start: hedges don't count against slots, only the reserve."""
+            hedging_now = sum(1 for f in running if f in attempts and attempts[f][2])
+            return len(running) - hedging_now < slots and len(running) < slots + hedge_slots
+
+        def start_span(task, attempt):
+            return tracer.start(
+                "task", parent=run_span, task_id=task["id"], task_type=task.get("type", ""),
+                worker_id=task.get("worker", 1), attempt=attempt,
+            )
+
+        def count_done(task):
+            wid = task.get("worker", 1)
+            completed[wid] += 1
+            if completed[wid] == len(worker_tasks[wid]):
+                yield self._worker_done(wid, worker_tasks[wid], worker_outputs, threshold, incomplete)
+
+        def stop(task, reason):
+            """Record task as stopped without a result and skip everything downstream of it."""
+            incomplete[task["id"]] = reason
+            yield assembler.stop(task["id"], reason, task_type=task.get("type", ""))
+            wid = task.get("worker", 1)
+            yield self._worker_update(
+                wid, started[wid], len(worker_tasks[wid]),
+                f"Stopped ({reason}): {task.get('description', '')}",
+                progress=int((completed[wid] / len(worker_tasks[wid])) * 100),
+            )
+            yield from count_done(task)
+            for child in dependents[task["id"]]:
+                if child not in incomplete:
+                    upstream = reason if reason.startswith("upstream") else f"upstream {reason}"
+                    yield from stop(tasks[task_index[child]], upstream)
+
+        running = {}
+        # Re-executions waiting out their backoff: (due, task index, attempt)
+        delayed = []
+
+        try:
+            while ready or running or delayed:
+                if token.cancelled:
+                    # Plan deadline or cancellation: stop every unfinished task
+                    reason = token.reason
+                    for task in tasks:
+                        if task["id"] not in worker_outputs and task["id"] not in incomplete:
+                            yield from stop(task, reason)
+                    break
+
+                # Stop running tasks whose own deadline has passed
+                for future, (task, attempt, span) in list(running.items()):
+                    if task_tokens[task["id"]].cancelled:
+                        del running[future]
+                        forget(future)
+                        future.cancel()
+                        span.end(stopped=task_tokens[task["id"]].reason)
+                        if task["id"] not in incomplete:
+                            yield from stop(task, task_tokens[task["id"]].reason)
+
+                # Re-execute retries whose backoff has elapsed, then start ready
+                # tasks in the remaining slots, critical path first
+                while delayed and delayed[0][0] <= time.monotonic() and has_slot():
+                    _, idx, attempt = heapq.heappop(delayed)
+                    launch(tasks[idx], attempt, start_span(tasks[idx], attempt))
+
+                while ready and has_slot():
+                    _, idx = heapq.heappop(ready)
+                    task = tasks[idx]
+                    if task["id"] in incomplete:
+                        continue
+                    wid = task.get("worker", 1)
+                    total = len(worker_tasks[wid])
+
+                    if started[wid] == 0:
+                        yield self._worker_update(wid, 0, total, "Starting...")
+                    started[wid] += 1
+
+                    yield self._worker_update(
+                        wid, started[wid], total, task.get("description", "Processing..."),
+                        progress=int((completed[wid] / total) * 100),
+                    )
+                    task_tokens[task["id"]] = token.child(task_timeout)
+                    launch(task, 0, start_span(task, 0))
+
+                # Duplicate attempts running past their hedge delay into the
+                # reserved slots and any others nothing else needs
+                now = time.monotonic()
+                for future, due in sorted(hedge_due.items(), key=lambda item: item[1]):
+                    if due > now or len(running) >= slots + hedge_slots:
+                        break
+                    task, attempt, _ = running[future]
+                    hedges[task["id"]] = hedges.get(task["id"], 0) + 1
+                    if hedges[task["id"]] < hedge.max_hedges:
+                        hedge_due[future] = now + (due - attempts[future][0])
+                    else:
+                        del hedge_due[future]
+                    TASK_HEDGES.inc(type=task.get("type", ""), outcome="launched")
+                    wid = task.get("worker", 1)
+                    yield self._worker_update(
+                        wid, started[wid], len(worker_tasks[wid]), f"Hedging slow attempt: {task.get('description', '')}",
+                        progress=int((completed[wid] / len(worker_tasks[wid])) * 100),
+                    )
+                    span = start_span(task, attempt)
+                    span.attributes["hedge"] = True
+                    launch(task, attempt, span, is_hedge=True)
+
+                # Wake up for the next backoff expiry, hedge or deadline, whichever is first
+                wakeups = [d[0] - time.monotonic() for d in delayed[:1]]
+                wakeups += [min(hedge_due.values()) - time.monotonic()] if hedge_due else []
+                wakeups += [task_tokens[t["id"]].remaining() for t, _, _ in running.values()]
+                wakeups.append(token.remaining())
+                wakeups = [max(0.0, w) for w in wakeups if w is not None]
+                timeout = min(wakeups) if wakeups else None
+
+                if not running:
+                    if delayed:
+                        time.sleep(timeout or 0.0)
+                    continue
+
+                if pool is None:
+                    done = list(running)
+                else:
+                    done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+
+                for future in done:
+                    if future not in running:
+                        continue  # A copy that lost to a rival earlier in this batch
+                    task, attempt, span = running.pop(future)
+                    wid = task.get("worker", 1)
+                    total = len(worker_tasks[wid])
+                    worker = workers[wid]
+                    task_token = task_tokens[task["id"]]
+                    started_at, _, is_hedge = attempts.get(future, (None, None, False))
+                    forget(future)
+                    rivals = [f for f, (t, _, _) in running.items() if t["id"] == task["id"]]
+
+                    try:
+                        output = future.result()
+                    except Cancelled as e:
+                        span.end(stopped=e.reason)
+                        if not rivals:
+                            yield from stop(task, e.reason)
+                        continue
+
+                    if started_at is not None:
+                        self.latencies.record(task.get("type", ""), time.monotonic() - started_at)
+                    deterministic = worker.is_deterministic(task)
+                    result = worker.apply_confidence(output)
+                    first_attempt = attempt
+
+                    if rivals:
+                        if result["confidence"] < threshold:
+                            # Another copy may still finish above the threshold
+                            span.end(confidence=result["confidence"], hedge="superseded")
+                            continue
+                        for rival in rivals:
+                            _, _, rival_span = running.pop(rival)
+                            if rival in attempts:
+                                attempts[rival][1].cancel("hedge lost")
+                            forget(rival)
+                            rival.cancel()
+                            rival_span.end(hedge="lost")
+                        if is_hedge:
+                            TASK_HEDGES.inc(type=task.get("type", ""), outcome="won")
+                    hedges.pop(task["id"], None)
+
+                    while (result["confidence"] < threshold and not task_token.cancelled
+                           and retry.can_retry(output, attempt, threshold, deterministic)):
+                        if not deterministic:
+                            # Only re-execute if the backoff still leaves time before the deadline
+                            backoff = retry.backoff(attempt)
+                            remaining = task_token.remaining()
+                            if remaining is not None and backoff >= remaining:
+                                break
+                        TASK_RETRIES.inc(type=task.get("type", ""))
+                        yield self._worker_update(
+                            wid, started[wid], total,
+                            f"Retrying ({attempt + 1}/{retry.max_retries}): {task.get('description', '')}",
+                            confidence=result["confidence"],
+                            progress=int((completed[wid] / total) * 100),
+                        )
+                        attempt += 1
+                        if not deterministic:
+                            break
+                        # Same output every run: redraw only the confidence noise
+                        result = worker.apply_confidence(output)
+
+                    span.end(
+                        confidence=result["confidence"],
+                        redraws=attempt - first_attempt if deterministic else 0,
+                    )
+                    if not deterministic and attempt > first_attempt:
+                        heapq.heappush(delayed, (time.monotonic() + backoff, task_index[task["id"]], attempt))
+                        continue
+
+                    if result["confidence"] < threshold:
+                        LOW_CONFIDENCE.inc(type=task.get("type", ""))
+
+                    worker_outputs[task["id"]] = result
+                    yield assembler.add(task["id"], result, task_type=task.get("type", ""))
+
+                    yield self._worker_update(
+                        wid, started[wid], total, task.get("description", "Done"),
+                        confidence=result["confidence"],
+                        progress=int(((completed[wid] + 1) / total) * 100),
+                    )
+                    yield from count_done(task)
+
+                    # Release dependents whose inputs are now all available
+                    for child in dependents[task["id"]]:
+                        waiting[child] -= 1
+                        if waiting[child] == 0:
+                            heapq.heappush(ready, (-priorities[child], task_index[child]))
+        finally:
+            # Running attempts stop at their next cancellation check; queued ones never start
+            token.cancel()
+            for future in running:
+                future.cancel()
+
+    def _rank_sources(self, tasks, document, sources, workers, run_span):
+        """
+        Rank the sentences of every source a per-source extract task scores in
+        one batch up front (see Worker.rank_extracts), rather than one source
+        per task. Pool processes get their own copy of each source, so process
+        plans don't share the rankings and skip this.
+        """
+        extracts = [
+            (task, _task_document(task, document, sources))
+            for task in tasks
+            if task.get("type") == "extract" and _task_document(task, document, sources) is not document
+        ]
+        if len(extracts) > 1:
+            with tracer.span("rank", parent=run_span, sources=len(extracts)):
+                workers[extracts[0][0].get("worker", 1)].rank_extracts(extracts)
+
+    def _plan_pool(self, tasks, document, policy):
+        """Return (shared pool, slots, kind) for a plan; pool is None for sequential plans."""
+        if not policy.get("parallel"):
+            return None, 1, None
+
+        kind = policy.get("executor", self.executor)
+        if self.map_reduce is not None and self.map_reduce.applies(document):
+            # Chunks already fan out to the runner's processes; tasks only coordinate
+            kind = "thread"
+        pool, size = self._pool(kind)
+        slots = policy.get("max_workers", self.max_workers) or min(len(tasks), size)
+        return pool, max(1, slots), kind
+
+    def _pool(self, kind):
+        """The shared pool of this kind and its size, created on first use (or after it broke)."""
+        with self._pools_lock:
+            pool, size = self._pools.get(kind, (None, 0))
+            # A pool whose worker died rejects all further work; replace it
+            if pool is None or getattr(pool, "_broken", False):
+                if kind == "process":
+                    size = self.max_workers or available_cores()
+                    pool = ProcessPoolExecutor(max_workers=size)
+                else:
+                    size = self.max_workers or THREAD_POOL_SIZE
+                    pool = ThreadPoolExecutor(max_workers=size, thread_name_prefix="orchestrator")
+                self._pools[kind] = (pool, size)
+            return pool, size
+
+    def shutdown(self, wait=True):
+        """Shut down the shared pools; a later parallel run creates new ones."""
+        with self._pools_lock:
+            pools, self._pools = self._pools, {}
+        for pool, _ in pools.values():
+            pool.shutdown(wait=wait, cancel_futures=True)
+
+    def _after_backend(self, task, cancel, compute):
+        """
+        Future settled like the one compute() returns, which is only called once
+        the backend call for task has returned on a shared pool thread. The call
+        waits on the attempt's own token, so a deadline, cancellation or lost
+        hedge stops it there before any process work is queued.
+        """
+        outer = Future()
+        threads, _ = self._pool("thread")
+
+        def call():
+            if not outer.set_running_or_notify_cancel():
+                return
+            try:
+                self.backend.call(task.get("type", ""), cancel)
+                cancel.raise_if_cancelled()
+                inner = compute()
+            except Exception as e:
+                outer.set_exception(e)
+                return
+            inner.add_done_callback(lambda f: _chain(f, outer))
+
+        threads.submit(call)
+        return outer
+
+    def _record_cost(self, task, document, submitted, future):
+        if not future.cancelled() and future.exception() is None:
+            self.cost_model.record(task.get("type", ""), len(document), time.perf_counter() - submitted)
+
+    def _store(self, key, future):
+        if not future.cancelled() and future.exception() is None:
+            self.cache.put(key, future.result())
+
+    def _worker_update(self, wid, current_task, total, description, confidence=0, progress=0):
+        return {
+            "type": "worker_update",
+            "worker_id": wid,
+            "status": "running",
+            "current_task": current_task,
+            "total_tasks": total,
+            "task_description": description,
+            "confidence": int(confidence * 100),
+            "progress": progress,
+        }
+
+    def _worker_done(self, wid, task_list, worker_outputs, threshold, incomplete=None):
+        """Final status event for a worker once all of its tasks have a result or were stopped."""
+        total = len(task_list)
+        avg_conf = sum(
+            worker_outputs[t["id"]]["confidence"]
+            for t in task_list
+            if t["id"] in worker_outputs
+        ) / max(1, total)
+
+        final_status = "complete" if avg_conf >= threshold else "failed"
+        description = "Complete" if final_status == "complete" else "Failed — low confidence"
+        stopped = [incomplete[t["id"]] for t in task_list if t["id"] in (incomplete or {})]
+        if stopped:
+            final_status = "failed"
+            description = f"Stopped — {stopped[0]}"
+
+        return {
+            "type": "worker_update",
+            "worker_id": wid,
+            "status": final_status,
+            "current_task": total,
+            "total_tasks": total,
+            "task_description": description,
+            "confidence": int(avg_conf * 100),
+            "progress": 100,
         }
@@ -0,0 +1,126 @@
+import os
+import threading
+
+
+# Prior cost per task type as (fixed seconds, seconds per document character),
+# measured on the built-in handlers; calibrated online from recorded timings
+PRIORS = {
+    "summarize": (2e-4, 4e-8),
+    "extract": (2e-4, 6e-8),
+    "analyze": (2e-4, 9e-8),
+    "validate": (2e-4, 7e-8),
+    "generate": (2e-4, 7e-8),
+}
+DEFAULT_PRIOR = (2e-4, 8e-8)
+
+# Sizes (characters) of the pseudo-observations that anchor each type's fit to its prior
+PRIOR_SIZES = (1024, 1024 * 1024)
+
+
+def available_cores() -> int:
+    """CPUs this process may run on (respects affinity masks, e.g. in containers)."""
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return os.cpu_count() or 1
+
+
+class CostModel:
+    """
+    Estimated seconds per task as fixed + per_char * document size, by task type.
+    Each type's line is an exponentially decayed least-squares fit over recorded
+    (size, seconds) timings, seeded with pseudo-observations from PRIORS so
+    estimates are sensible before any run and drift toward measured costs.
+    """
+
+    def __init__(self, priors=None, prior_weight=2.0, decay=0.98):
+        self.priors = dict(PRIORS, **(priors or {}))
+        self.prior_weight = prior_weight
+        self.decay = decay
+        self._sums = {}
+        self._lock = threading.Lock()
+
+    def estimate(self, task_type: str, size: int) -> float:
+        with self._lock:
+            fixed, per_char = self._fit(task_type)
+        return fixed + per_char * max(0, size)
+
+    def record(self, task_type: str, size: int, seconds: float):
+        """Add one measured handler timing."""
+        with self._lock:
+            sums = self._sums_for(task_type)
+            for i in range(len(sums)):
+                sums[i] *= self.decay
+            self._add(sums, float(size), seconds, 1.0)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                task_type: {"fixed_s": fixed, "per_mb_s": per_char * 1024 * 1024, "samples": round(sums[0], 2)}
+                for task_type, sums in self._sums.items()
+                for fixed, per_char in [self._fit(task_type)]
+            }
+
+    def _sums_for(self, task_type):
+        sums = self._sums.get(task_type)
+        if sums is None:
+            # [weight, Σx, Σy, Σxx, Σxy] over the prior's pseudo-observations
+            sums = [0.0] * 5
+            fixed, per_char = self.priors.get(task_type, DEFAULT_PRIOR)
+            for size in PRIOR_SIZES:
+                self._add(sums, size, fixed + per_char * size, self.prior_weight / len(PRIOR_SIZES))
+            self._sums[task_type] = sums
+        return sums
+
+    @staticmethod
+    def _add(sums, x, y, weight):
+        sums[0] += weight
+        sums[1] += weight * x
+        sums[2] += weight * y
+        sums[3] += weight * x * x
+        sums[4] += weight * x * y
+
+    def _fit(self, task_type):
+        """(fixed, per_char) of the weighted least-squares line, both kept non-negative."""
+        weight, sx, sy, sxx, sxy = self._sums_for(task_type)
+        denominator = weight * sxx - sx * sx
+        if denominator <= 0:
+            return max(0.0, sy / weight), 0.0
+        per_char = max(0.0, (weight * sxy - sx * sy) / denominator)
+        fixed = max(0.0, (sy - per_char * sx) / weight)
+        return fixed, per_char
+
+
+def schedule(tasks: list, costs: dict, num_workers: int):
+    """
+    List-schedule a task DAG onto num_workers identical workers.
+    Tasks are taken by cost-weighted critical path (the longest remaining
+    chain of estimated costs), so expensive chains start first and, among
+    independent tasks, the longest runs first (LPT); each goes to the worker
+    that can start it earliest.
+    Returns ({task_id: worker number from 1}, estimated makespan in seconds).
+    """
+    ids = {t["id"] for t in tasks}
+    deps = {t["id"]: [d for d in t.get("depends_on", []) if d in ids] for t in tasks}
+    dependents = {t["id"]: [] for t in tasks}
+    for tid, task_deps in deps.items():
+        for dep in task_deps:
+            dependents[dep].append(tid)
+
+    # Walk dependents-first; plans list dependencies before dependents
+    rank = {}
+    for task in reversed(tasks):
+        tid = task["id"]
+        rank[tid] = costs[tid] + max((rank[c] for c in dependents[tid] if c in rank), default=0.0)
+
+    free = [0.0] * max(1, num_workers)
+    finish = {}
+    assignment = {}
+    position = {t["id"]: i for i, t in enumerate(tasks)}
+    for tid in sorted(rank, key=lambda t: (-rank[t], position[t])):
+        ready = max((finish.get(d, 0.0) for d in deps[tid]), default=0.0)
+        worker = min(range(len(free)), key=lambda w: (max(free[w], ready), w))
+        finish[tid] = max(free[worker], ready) + costs[tid]
+        free[worker] = finish[tid]
+        assignment[tid] = worker + 1
+
+    return assignment, max(finish.values(), default=0.0)
@@ -0,0 +1,224 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+
+class Rule:
+    """
+    One planning rule. keywords lists the rule's requirements: each entry is a
+    keyword, or a list of synonyms any one of which satisfies it; all entries
+    must occur in the intent (as substrings, case-insensitive) for the rule to
+    match. The highest-priority matching rule with a pattern picks the task
+    pattern; tags of every matching rule apply (e.g. "ssot").
+    """
+
+    def __init__(self, keywords, pattern=None, priority=0, tags=(), name=None):
+        self.requirements = [
+            tuple(k.lower() for k in ([entry] if isinstance(entry, str) else entry))
+            for entry in keywords
+        ]
+        self.pattern = pattern
+        self.priority = priority
+        self.tags = frozenset(tags)
+        self.name = name or pattern or "+".join(r[0] for r in self.requirements)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Rule":
+        """Build a rule from its JSON form; raises ValueError if it is malformed."""
+        if not isinstance(data, dict):
+            raise ValueError(f"Rule must be an object, not {type(data).__name__}")
+        keywords = data.get("keywords")
+        if not isinstance(keywords, list) or not keywords:
+            raise ValueError("Rule needs a non-empty 'keywords' list")
+        for entry in keywords:
+            synonyms = [entry] if isinstance(entry, str) else entry
+            if not isinstance(synonyms, list) or not synonyms or not all(isinstance(k, str) and k for k in synonyms):
+                raise ValueError(f"Rule keyword {entry!r} must be a non-empty string or list of them")
+        pattern, priority = data.get("pattern"), data.get("priority", 0)
+        if pattern is not None and not isinstance(pattern, str):
+            raise ValueError(f"Rule pattern {pattern!r} must be a string")
+        if not isinstance(priority, (int, float)):
+            raise ValueError(f"Rule priority {priority!r} must be a number")
+        return cls(keywords, pattern, priority, data.get("tags", ()), data.get("name"))
+
+
+def validate_patterns(patterns):
+    """
+    Check task patterns ({name: [task templates]}) as the Planner reads them:
+    each template needs a "type" and "description", "after" may only name
+    earlier templates (so every pattern is a DAG) and "per_source" must be a
+    format string taking {n}. Raises ValueError on the first problem.
+    """
+    if not isinstance(patterns, dict):
+        raise ValueError("Patterns must be an object of name -> task templates")
+    for name, templates in patterns.items():
+        if not isinstance(templates, list):
+            raise ValueError(f"Pattern '{name}' must be a list of task templates")
+        for i, template in enumerate(templates):
+            where = f"Pattern '{name}' template {i}"
+            if not isinstance(template, dict):
+                raise ValueError(f"{where} must be an object")
+            for field in ("type", "description"):
+                if not isinstance(template.get(field), str):
+                    raise ValueError(f"{where} needs a string '{field}'")
+            after = template.get("after", [])
+            if not isinstance(after, list) or not all(type(j) is int and 0 <= j < i for j in after):
+                raise ValueError(f"{where} 'after' must list indices of earlier templates")
+            per_source = template.get("per_source")
+            if per_source is not None:
+                try:
+                    per_source.format(n=1)
+                except (AttributeError, KeyError, IndexError, ValueError):
+                    raise ValueError(f"{where} 'per_source' must be a format string using {{n}}") from None
+
+
+class Match:
+    def __init__(self, rule=None, tags=frozenset()):
+        self.rule = rule
+        self.pattern = rule.pattern if rule is not None else None
+        self.tags = tags
+
+
+class _Automaton:
+    """Aho-Corasick automaton: finds every keyword in one pass over the text."""
+
+    def __init__(self, keywords):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [()]
+
+        for keyword in keywords:
+            state = 0
+            for ch in keyword:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(())
+                state = nxt
+            self.out[state] = (keyword,)
+
+        # Breadth-first failure links; each state also reports its suffixes' keywords
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                target = self.goto[fallback].get(ch, 0)
+                self.fail[nxt] = target if target != nxt else 0
+                if self.out[self.fail[nxt]]:
+                    self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def find(self, text: str) -> set:
+        goto, fail, out = self.goto, self.fail, self.out
+        found = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+
+class RuleMatcher:
+    """
+    Compiled intent matcher. All rule keywords go into one Aho-Corasick
+    automaton, so matching costs one pass over the intent plus work for the
+    keywords actually found, however many rules there are.
+    """
+
+    def __init__(self, rules):
+        self.rules = list(rules)
+        # keyword → [(rule index, requirement index)]
+        self._index = {}
+        for r, rule in enumerate(self.rules):
+            for q, synonyms in enumerate(rule.requirements):
+                for keyword in synonyms:
+                    self._index.setdefault(keyword, []).append((r, q))
+        self._automaton = _Automaton(self._index)
+
+    def match(self, intent: str) -> Match:
+        """Best rule for the intent (highest priority, then earliest) and all matched tags."""
+        satisfied = {}
+        for keyword in self._automaton.find(intent.lower()):
+            for r, q in self._index[keyword]:
+                satisfied.setdefault(r, set()).add(q)
+
+        best = None
+        tags = set()
+        for r, requirements in satisfied.items():
+            rule = self.rules[r]
+            if len(requirements) < len(rule.requirements):
+                continue
+            tags |= rule.tags
+            if rule.pattern is not None and (best is None or (-rule.priority, r) < (-best[1].priority, best[0])):
+                best = (r, rule)
+
+        return Match(best[1] if best else None, frozenset(tags))
+
+
+class RulesFile:
+    """
+    Rules loaded from a JSON file and reloaded when it changes on disk
+    (checked at most every check_interval seconds). The file holds
+    {"patterns": {name: [task templates]}, "rules": [{keywords, pattern, priority, tags}]}.
+    The whole file is validated before any of it is used, including the
+    optional validate(patterns, rules) callback (raising ValueError). If a
+    reload fails, the previous rules stay in effect, the error is kept in
+    last_error and the file is read again on the next check.
+    """
+
+    def __init__(self, path, check_interval=1.0, validate=None):
+        self.path = path
+        self.check_interval = check_interval
+        self.validate = validate
+        self.patterns = {}
+        self.rules = []
+        self.version = 0
+        self.last_error = None
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.refresh(force=True)
+
+    def refresh(self, force=False) -> bool:
+        """Reload the file if it changed; returns True when new rules were loaded."""
+        now = time.monotonic()
+        if not force and now - self._checked_at < self.check_interval:
+            return False
+        with self._lock:
+            self._checked_at = now
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+                if mtime == self._mtime:
+                    return False
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if not isinstance(data, dict):
+                    raise ValueError("Rules file must hold a JSON object")
+                patterns = data.get("patterns", {})
+                validate_patterns(patterns)
+                if not isinstance(data.get("rules", []), list):
+                    raise ValueError("'rules' must be a list")
+                rules = [Rule.from_dict(r) for r in data.get("rules", [])]
+                if self.validate is not None:
+                    self.validate(patterns, rules)
+            except (OSError, ValueError) as e:
+                self.last_error = f"{type(e).__name__}: {e}"
+                return False
+
+            self.patterns = patterns
+            self.rules = rules
+            self._mtime = mtime
+            self.version += 1
+            self.last_error = None
+            return True
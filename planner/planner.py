@@ -1,9 +1,39 @@
+import hashlib
+import json
 import uuid
+from memory.plan_store import plan_id
+from observability.tracing import tracer
+from planner.cost_model import available_cores, schedule
+from planner.matcher import Rule, RuleMatcher, RulesFile, validate_patterns
+
+
+# Intent keywords that switch every task to source-of-truth mode
+SSOT_KEYWORDS = ["latest", "current", "verify", "fact", "validate", "source"]
+
+# Worker lanes a plan may use (the UI shows one per worker)
+MAX_WORKERS = 5
+
+
+def _rules_version(patterns, matcher) -> str:
+    """Hash of a build's task patterns and rules (see Planner.patterns_version)."""
+    content = json.dumps({
+        "patterns": patterns,
+        "rules": [
+            [rule.requirements, rule.pattern, rule.priority, sorted(rule.tags)]
+            for rule in matcher.rules
+        ],
+    }, sort_keys=True)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
 
 
 class Planner:
-    def __init__(self):
-        # Keywords mapped to task types
+    def __init__(self, store=None, rules_path=None, cost_model=None):
+        # Keywords mapped to task types; "after" lists the indices of the
+        # templates whose outputs a task builds on (its "inputs", so only for
+        # Worker.UPSTREAM_CONSUMERS), making each pattern a small DAG; the
+        # other tasks read the document itself and run independently.
+        # "per_source" templates fan out into one task per uploaded source,
+        # described by the given format string.
         self._task_patterns = {
             "summarize": [
                 {"type": "extract", "description": "Extract key information from sources"},
@@ -12,13 +42,14 @@ class Planner:
             "analyze": [
                 {"type": "extract", "description": "Extract relevant data points"},
                 {"type": "analyze", "description": "Analyze patterns and trends"},
-                {"type": "generate", "description": "Generate analysis report"},
+                {"type": "generate", "description": "Generate analysis report", "after": [0, 1]},
             ],
             "compare": [
-                {"type": "extract", "description": "Extract data from all sources"},
+                {"type": "extract", "description": "Extract data from all sources",
+                 "per_source": "Extract data from source {n}"},
                 {"type": "analyze", "description": "Compare findings across sources"},
                 {"type": "validate", "description": "Cross-validate comparisons"},
-                {"type": "generate", "description": "Generate comparison report"},
+                {"type": "generate", "description": "Generate comparison report", "after": [0, 1, 2]},
             ],
             "extract": [
                 {"type": "extract", "description": "Extract key entities and data"},
@@ -27,70 +58,205 @@ class Planner:
             "validate": [
                 {"type": "extract", "description": "Extract claims from content"},
                 {"type": "validate", "description": "Validate claims against sources"},
-                {"type": "generate", "description": "Generate validation report"},
+                {"type": "generate", "description": "Generate validation report", "after": [0, 1]},
             ],
         }
 
-    def create_plan(self, user_intent: str, num_sources: int = 0) -> dict:
+        # Optional rules file (see RulesFile) adding patterns and matching rules;
+        # it is reloaded when it changes on disk, unless it fails validation
+        self._rules_file = RulesFile(rules_path, validate=self._check_rules) if rules_path else None
+
+        # Optional PlanStore: repeated intents reuse the best-performing stored plan
+        self.store = store
+        # Optional CostModel: tasks are then assigned to workers by estimated
+        # cost rather than round-robin, on no more workers than available cores
+        self.cost_model = cost_model
+        self._build()
+
+    @property
+    def patterns_version(self) -> str:
+        """Hash of the task patterns and rules; stored plans made from others are stale."""
+        return _rules_version(*self._rules)
+
+    def update_patterns(self, patterns: dict):
+        """
+        Replace the task patterns and invalidate plans stored from the old ones.
+        Raises ValueError, keeping the current patterns, if the new ones are
+        malformed or drop a pattern a rule names.
+        """
+        validate_patterns(patterns)
+        previous = self._task_patterns
+        self._task_patterns = patterns
+        try:
+            self._build()
+        except ValueError:
+            self._task_patterns = previous
+            raise
+
+    def _build(self):
+        """
+        Compile the built-in and file rules into one matcher.
+        Built-in rules match each pattern's name, first pattern first, as before.
+        Raises ValueError if a rule names an unknown pattern.
+        """
+        task_patterns = self._task_patterns
+        patterns = dict(task_patterns)
+        rules = [Rule([keyword], keyword) for keyword in task_patterns]
+        rules.append(Rule([SSOT_KEYWORDS], tags=["ssot"], name="ssot"))
+        if self._rules_file is not None:
+            patterns.update(self._rules_file.patterns)
+            rules.extend(self._rules_file.rules)
+
+        for rule in rules:
+            if rule.pattern is not None and rule.pattern not in patterns:
+                raise ValueError(f"Rule '{rule.name}' names unknown pattern '{rule.pattern}'")
+
+        # Swapped as one tuple, so a concurrent plan never pairs this matcher with other patterns
+        built = (patterns, RuleMatcher(rules))
+        self._rules = built
+        if self.store is not None:
+            self.store.invalidate(_rules_version(*built))
+
+    def _check_rules(self, patterns: dict, rules: list):
+        """RulesFile validation: every rule must name a built-in or file pattern."""
+        for rule in rules:
+            if rule.pattern is not None and rule.pattern not in patterns and rule.pattern not in self._task_patterns:
+                raise ValueError(f"Rule '{rule.name}' names unknown pattern '{rule.pattern}'")
+
+    def _reload_rules(self):
+        """Pick up an edited rules file; a bad file is rejected by RulesFile and changes nothing."""
+        if self._rules_file is not None and self._rules_file.refresh():
+            self._build()
+
+    def create_plan(self, user_intent: str, num_sources: int = 0, document_size: int = 0) -> dict:
         """
         Convert user intent into structured tasks with reliability signals.
+        With a store, a plan stored for the same intent and document
+        characteristics is reused instead of planning again.
+        With a cost model, workers are balanced by estimated task cost and
+        execution_policy gets "max_workers" and "estimated_makespan_s";
+        reused plans are rebalanced with the current estimates.
         """
-        tasks = self._decompose_intent(user_intent, num_sources)
+        self._reload_rules()
+
+        with tracer.span("plan", intent_length=len(user_intent), num_sources=num_sources) as span:
+            if self.store is not None:
+                plan = self.store.lookup(user_intent, num_sources, document_size)
+                span.attributes["reused"] = plan is not None
+                if plan is not None:
+                    plan["intent"] = user_intent
+                    if self.cost_model is not None:
+                        self._rebalance(plan, num_sources, document_size)
+                    return plan
+
+            tasks = self._decompose_intent(user_intent, num_sources)
+            span.attributes["tasks"] = len(tasks)
 
         plan = {
             "intent": user_intent,
             "tasks": tasks,
             "execution_policy": {
-                "parallel": len(tasks) > 4,
+                "parallel": len(tasks) > 1,
                 "max_retries": 2,
                 "confidence_threshold": 0.6
             }
         }
+        if self.cost_model is not None:
+            plan["execution_policy"].update(self._balance(tasks, num_sources, document_size))
+
+        if self.store is not None:
+            self.store.save(user_intent, num_sources, document_size, plan)
 
         return plan
 
     def _decompose_intent(self, intent: str, num_sources: int = 0) -> list:
         """
-        Keyword-driven decomposition into typed tasks with worker assignments.
+        Keyword-driven decomposition into typed tasks with worker assignments
+        and depends_on edges between them.
         """
-        intent_lower = intent.lower()
-        matched_tasks = []
-
-        # Check for keyword matches
-        for keyword, task_templates in self._task_patterns.items():
-            if keyword in intent_lower:
-                matched_tasks = list(task_templates)
-                break
+        # One pass over the intent finds the best pattern rule and any tags
+        patterns, matcher = self._rules
+        match = matcher.match(intent)
+        matched_tasks = list(patterns[match.pattern]) if match.pattern else []
 
         # Default fallback
         if not matched_tasks:
             matched_tasks = [
                 {"type": "extract", "description": "Extract key data from sources"},
                 {"type": "analyze", "description": "Analyze content"},
-                {"type": "generate", "description": "Generate response"},
+                {"type": "generate", "description": "Generate response", "after": [0, 1]},
             ]
 
         # Determine truth mode based on keywords
-        uses_ssot = any(
-            kw in intent_lower
-            for kw in ["latest", "current", "verify", "fact", "validate", "source"]
-        )
+        uses_ssot = "ssot" in match.tags
 
-        # Build final task list with IDs, worker assignments, truth_mode
+        # Expand per-source templates so each source is processed individually
+        expanded = []
+        for i, template in enumerate(matched_tasks):
+            if template.get("per_source") and num_sources > 1:
+                expanded.extend((i, template, source) for source in range(num_sources))
+            else:
+                expanded.append((i, template, None))
+
+        task_ids = [str(uuid.uuid4())[:8] for _ in expanded]
+        template_ids = {}
+        for task_id, (i, _, _) in zip(task_ids, expanded):
+            template_ids.setdefault(i, []).append(task_id)
+
+        # Build final task list with IDs, dependencies, worker assignments, truth_mode
         tasks = []
-        num_workers = min(len(matched_tasks), 5)
+        num_workers = min(len(expanded), MAX_WORKERS)
 
-        for i, template in enumerate(matched_tasks):
-            worker_id = (i % num_workers) + 1
+        for n, (i, template, source) in enumerate(expanded):
+            worker_id = (n % num_workers) + 1
             truth_mode = "ssot" if (uses_ssot or template["type"] == "validate") else "model"
 
-            tasks.append({
-                "id": str(uuid.uuid4())[:8],
+            task = {
+                "id": task_ids[n],
                 "type": template["type"],
                 "description": template["description"],
+                "depends_on": [tid for j in template.get("after", []) for tid in template_ids[j]],
                 "worker": worker_id,
                 "truth_mode": truth_mode,
                 "confidence_threshold": 0.7 if truth_mode == "ssot" else 0.6,
-            })
+            }
+            if source is not None:
+                task["description"] = template["per_source"].format(n=source + 1)
+                task["source"] = source
+
+            tasks.append(task)
 
         return tasks
+
+    def _rebalance(self, plan: dict, num_sources: int, document_size: int):
+        """
+        Balance a stored plan with the cost model's current estimates. A
+        different worker assignment is saved as a new variant of the plan,
+        so its runs are ranked against the stored one's.
+        """
+        plan["execution_policy"].update(self._balance(plan["tasks"], num_sources, document_size))
+        variant = plan_id(plan)
+        if variant != plan["plan_id"]:
+            plan["plan_id"] = variant
+            self.store.save(plan["intent"], num_sources, document_size, plan)
+
+    def _balance(self, tasks: list, num_sources: int, document_size: int) -> dict:
+        """
+        Reassign workers by estimated cost: list scheduling with the longest
+        cost-weighted chain first (LPT among independent tasks), onto at most
+        one worker per task, MAX_WORKERS and the available cores.
+        Per-source tasks are estimated on an even share of the document.
+        """
+        source_size = document_size // num_sources if num_sources > 1 else document_size
+        costs = {}
+        for task in tasks:
+            size = source_size if "source" in task else document_size
+            costs[task["id"]] = self.cost_model.estimate(task["type"], size)
+            task["estimated_s"] = round(costs[task["id"]], 6)
+
+        num_workers = max(1, min(len(tasks), MAX_WORKERS, available_cores()))
+        assignment, makespan = schedule(tasks, costs, num_workers)
+        for task in tasks:
+            task["worker"] = assignment[task["id"]]
+        # Narrow plans leave some workers idle; the pool only needs the ones used
+        return {"max_workers": len(set(assignment.values())), "estimated_makespan_s": round(makespan, 6)}
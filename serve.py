@@ -0,0 +1,207 @@
+"""
+Production serving: the app behind an ASGI server (uvicorn).
+
+Ordinary requests run the Flask app on a bounded thread pool. SSE progress
+streams (/run, /jobs/<id>/events) are handed back to the event loop once
+the job is queued, so an open stream holds a coroutine rather than an OS
+thread and one process can keep thousands of them open. Components are
+built on first use (see app.Services), so workers start accepting
+connections immediately.
+
+On shutdown (SIGTERM / Ctrl+C) the server stops accepting connections and
+gives open streams up to --drain-timeout seconds to see their jobs finish;
+the job queue then gets as long again to drain any jobs still queued.
+
+Each server worker process keeps its own documents and jobs in memory, so
+with --workers > 1 a session must stick to one process (e.g. by the
+orchestrator_session cookie at the load balancer).
+
+Usage:
+    python serve.py --host 0.0.0.0 --port 8000 --workers 1 --job-workers 4
+    uvicorn --factory serve:create_asgi_app    (settings from ORCHESTRATOR_* env vars)
+"""
+import argparse
+import asyncio
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing
+from tempfile import SpooledTemporaryFile
+
+from app import ASYNC_SSE, create_app
+
+# Request bodies above this many bytes are buffered on disk instead of in memory
+SPOOL_LIMIT = 1 << 20
+
+
+class AsgiApp:
+    """
+    ASGI adapter for the Flask app: WSGI calls on a thread pool, async SSE
+    through the app.ASYNC_SSE handoff, and lifespan startup/shutdown.
+    """
+
+    def __init__(self, flask_app, threads=32, drain_timeout=30.0):
+        self.flask_app = flask_app
+        self.drain_timeout = drain_timeout
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="wsgi")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+        elif scope["type"] == "http":
+            await self._http(scope, receive, send)
+
+    async def _lifespan(self, receive, send):
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                services = self.flask_app.extensions["orchestrator"]
+                await loop.run_in_executor(None, services.shutdown, self.drain_timeout)
+                self._executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _http(self, scope, receive, send):
+        with SpooledTemporaryFile(max_size=SPOOL_LIMIT) as body:
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    return
+                body.write(message.get("body", b""))
+                if not message.get("more_body"):
+                    break
+            body.seek(0)
+
+            environ = self._environ(scope, body)
+            loop = asyncio.get_running_loop()
+            status, headers, content, frames = await loop.run_in_executor(self._executor, self._call, environ)
+
+        if frames is not None:
+            # The empty WSGI body got a Content-Length; the frames follow it
+            headers = [(name, value) for name, value in headers if name.lower() != "content-length"]
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers],
+        })
+        if frames is None:
+            await send({"type": "http.response.body", "body": content})
+        else:
+            await self._stream(receive, send, frames)
+
+    def _call(self, environ):
+        """Run the Flask app; returns (status, headers, body, SSE frame factory or None)."""
+        response = {}
+        handoff = []
+        environ[ASYNC_SSE] = handoff.append
+
+        def start_response(status, headers, exc_info=None):
+            response["status"] = int(status.split(" ", 1)[0])
+            response["headers"] = headers
+
+        result = self.flask_app(environ, start_response)
+        try:
+            content = b"".join(result)
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        return response["status"], response["headers"], content, handoff[0] if handoff else None
+
+    async def _stream(self, receive, send, frames):
+        """Send SSE frames until the stream ends or the client disconnects."""
+        async def pump():
+            async with aclosing(frames()) as stream:
+                async for frame in stream:
+                    await send({"type": "http.response.body", "body": frame.encode("utf-8"), "more_body": True})
+            await send({"type": "http.response.body", "body": b""})
+
+        async def disconnected():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+
+        tasks = [asyncio.ensure_future(pump()), asyncio.ensure_future(disconnected())]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            # Cancelling the pump closes the job subscription, which starts its abandonment grace
+            for task in tasks:
+                task.cancel()
+            outcome = await asyncio.gather(*tasks, return_exceptions=True)
+        if isinstance(outcome[0], Exception):
+            raise outcome[0]
+
+    @staticmethod
+    def _environ(scope, body) -> dict:
+        environ = {
+            "REQUEST_METHOD": scope["method"],
+            "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+            "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+            "QUERY_STRING": scope["query_string"].decode("latin-1"),
+            "SERVER_PROTOCOL": f"HTTP/{scope['http_version']}",
+            "SERVER_NAME": scope.get("server", ("localhost", 80))[0],
+            "SERVER_PORT": str(scope.get("server", ("localhost", 80))[1]),
+            "wsgi.version": (1, 0),
+            "wsgi.url_scheme": scope.get("scheme", "http"),
+            "wsgi.input": body,
+            # The whole body is buffered, so it can be read to EOF even without a Content-Length
+            "wsgi.input_terminated": True,
+            "wsgi.errors": sys.stderr,
+            "wsgi.multithread": True,
+            "wsgi.multiprocess": True,
+            "wsgi.run_once": False,
+        }
+        if scope.get("client"):
+            environ["REMOTE_ADDR"] = scope["client"][0]
+        for name, value in scope.get("headers", []):
+            name, value = name.decode("latin-1"), value.decode("latin-1")
+            if name == "content-length":
+                key = "CONTENT_LENGTH"
+            elif name == "content-type":
+                key = "CONTENT_TYPE"
+            else:
+                key = "HTTP_" + name.upper().replace("-", "_")
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+        return environ
+
+
+def create_asgi_app() -> AsgiApp:
+    """ASGI application factory, configured from ORCHESTRATOR_* environment variables."""
+    return AsgiApp(
+        create_app(),
+        threads=int(os.environ.get("ORCHESTRATOR_HTTP_THREADS", 32)),
+        drain_timeout=float(os.environ.get("ORCHESTRATOR_DRAIN_TIMEOUT", 30)),
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the orchestrator with an ASGI server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=1, help="server processes (default: 1)")
+    parser.add_argument("--job-workers", type=int, default=4, help="threads executing plans, per process")
+    parser.add_argument("--threads", type=int, default=32, help="threads for non-streaming requests, per process")
+    parser.add_argument("--executor", choices=("thread", "process"), default="thread",
+                        help="pool running the tasks of parallel plans, per process")
+    parser.add_argument("--drain-timeout", type=float, default=30.0, help="seconds to finish running jobs on shutdown")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args(argv)
+
+    import uvicorn
+
+    # Worker processes build their app from the environment
+    os.environ["ORCHESTRATOR_JOB_WORKERS"] = str(args.job_workers)
+    os.environ["ORCHESTRATOR_HTTP_THREADS"] = str(args.threads)
+    os.environ["ORCHESTRATOR_EXECUTOR"] = args.executor
+    os.environ["ORCHESTRATOR_DRAIN_TIMEOUT"] = str(args.drain_timeout)
+    uvicorn.run(
+        "serve:create_asgi_app", factory=True, host=args.host, port=args.port, workers=args.workers,
+        timeout_graceful_shutdown=args.drain_timeout, log_level=args.log_level,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
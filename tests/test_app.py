@@ -0,0 +1,130 @@
+import os
+import time
+
+import pytest
+
+from app import create_app
+from worker.backend import FakeBackend
+
+TEXT = (
+    "Revenue growth continued across every region this quarter. "
+    "Logistics contracts lowered operating costs considerably. "
+    "Customer retention improved after support hours expanded. "
+)
+SESSION = {"X-Session-ID": "session-a"}
+
+
+@pytest.fixture
+def app(tmp_path):
+    app = create_app({"plan_db": str(tmp_path / "plans.db"), "job_workers": 2})
+    yield app
+    app.extensions["orchestrator"].shutdown(timeout=5)
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def upload(client, text=TEXT, headers=SESSION):
+    response = client.post("/upload", json={"text": text, "name": "report.txt"}, headers=headers)
+    assert response.status_code == 200
+    return response.get_json()["document_id"]
+
+
+def test_delete_document_removes_files_and_index_entries(app, client):
+    document_id = upload(client)
+    services = app.extensions["orchestrator"]
+    paths = services.documents.get("session-a", document_id).paths
+    assert client.get("/index/terms", query_string={"document_id": document_id}, headers=SESSION).status_code == 200
+
+    # Other sessions can't delete it
+    assert client.delete(f"/documents/{document_id}", headers={"X-Session-ID": "session-b"}).status_code == 404
+
+    response = client.delete(f"/documents/{document_id}", headers=SESSION)
+    assert response.status_code == 200
+    assert response.get_json() == {"document_id": document_id, "deleted": True}
+    assert not any(os.path.exists(path) for path in paths)
+    assert services.corpus.stats(paths[0]) is None
+    assert client.get("/index/terms", query_string={"document_id": document_id}, headers=SESSION).status_code == 404
+    assert client.delete(f"/documents/{document_id}", headers=SESSION).status_code == 404
+
+
+def test_delete_multi_source_document_removes_combined_views(app, client):
+    document_id = upload(client)
+    client.post("/upload", json={"text": TEXT, "document_id": document_id}, headers=SESSION)
+    stored = app.extensions["orchestrator"].documents.get("session-a", document_id)
+    stored.document()
+    client.post("/upload", json={"text": TEXT, "document_id": document_id}, headers=SESSION)
+    stored.document()
+    paths = stored.paths
+    assert len(paths) == 5  # three sources, a stale and a current combined file
+
+    assert client.delete(f"/documents/{document_id}", headers=SESSION).status_code == 200
+    assert not any(os.path.exists(path) for path in paths)
+
+
+def test_delete_document_in_use_by_a_job_conflicts(app, client):
+    document_id = upload(client)
+    services = app.extensions["orchestrator"]
+    services.orchestrator.backend = FakeBackend(latency=30)
+    plan = client.post("/plan", json={"intent": "summarize", "document_id": document_id}, headers=SESSION)
+    job_id = client.post(
+        "/jobs", json={"plan": plan.get_json()["plan"], "document_id": document_id}, headers=SESSION,
+    ).get_json()["job_id"]
+
+    response = client.delete(f"/documents/{document_id}", headers=SESSION)
+    assert response.status_code == 409
+    assert response.get_json()["job_ids"] == [job_id]
+
+    client.delete(f"/jobs/{job_id}", headers=SESSION)
+    deadline = time.monotonic() + 5
+    while services.jobs.active("session-a") and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert client.delete(f"/documents/{document_id}", headers=SESSION).status_code == 200
+
+
+def test_executor_is_selected_from_config(tmp_path):
+    app = create_app({"plan_db": str(tmp_path / "plans.db"), "executor": "process"})
+    services = app.extensions["orchestrator"]
+    try:
+        assert services.orchestrator.executor == "process"
+    finally:
+        services.shutdown(timeout=5)
+
+
+@pytest.mark.parametrize("limits, sessions, message", [
+    ({"job_max_per_client": 1}, ["session-a", "session-a"], "Too many outstanding jobs"),
+    ({"job_max_depth": 1}, ["session-a", "session-b", "session-c"], "Job queue is full"),
+])
+def test_run_rejects_jobs_over_the_queue_limits(tmp_path, limits, sessions, message):
+    app = create_app({"plan_db": str(tmp_path / "plans.db"), "job_workers": 1, **limits})
+    client = app.test_client()
+    services = app.extensions["orchestrator"]
+    services.orchestrator.backend = FakeBackend(latency=30)
+    try:
+        plan = client.post("/plan", json={"intent": "summarize"}, headers=SESSION).get_json()["plan"]
+        bodies = {}
+        for session in set(sessions):
+            document_id = upload(client, headers={"X-Session-ID": session})
+            bodies[session] = {"plan": plan, "document_id": document_id}
+
+        *admitted, rejected = sessions
+        for session in admitted:
+            response = client.post("/run", json=bodies[session], headers={"X-Session-ID": session})
+            assert response.status_code == 200
+            response.close()
+            # The first job has to be running, not queued, for the depth limit to bite
+            deadline = time.monotonic() + 5
+            while services.jobs.stats()["running"] == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+        response = client.post("/run", json=bodies[rejected], headers={"X-Session-ID": rejected})
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "5"
+        assert message in response.get_json()["error"]
+    finally:
+        for session in set(sessions):
+            for job in services.jobs.active(session):
+                job.cancel()
+        services.shutdown(timeout=5)
@@ -0,0 +1,71 @@
+from assembler.assembler import Assembler
+from orchestrator import Orchestrator
+from worker.backend import FakeBackend
+from worker.cancellation import DEADLINE_EXCEEDED
+
+
+def test_partials_keep_running_totals_in_arrival_order():
+    assembler = Assembler(confidence_threshold=0.6, total_tasks=4)
+    events = [
+        assembler.add("b", {"result": "second task", "confidence": 0.9}, task_type="analyze"),
+        assembler.stop("c", DEADLINE_EXCEEDED, task_type="extract"),
+        assembler.add("a", {"result": "first task", "confidence": 0.4}, task_type="summarize"),
+        assembler.stop("d", f"upstream {DEADLINE_EXCEEDED}", task_type="generate"),
+    ]
+
+    assert [e["task_id"] for e in events] == ["b", "c", "a", "d"]
+    assert [e["task_type"] for e in events] == ["analyze", "extract", "summarize", "generate"]
+    assert [e["done_tasks"] for e in events] == [1, 2, 3, 4]
+    assert [e["successful_tasks"] for e in events] == [1, 1, 1, 1]
+    assert [e["failed_tasks"] for e in events] == [0, 1, 2, 3]
+    assert [e["failed"] for e in events] == [False, True, True, True]
+    assert all(e["total_tasks"] == 4 for e in events)
+    # Stopped tasks carry no confidence and leave the running average alone
+    assert [e["confidence"] for e in events] == [90, None, 40, None]
+    assert [e["overall_confidence"] for e in events] == [90, 90, 65, 65]
+    assert events[0]["output"] == "second task"
+    assert events[1]["output"] == f"{DEADLINE_EXCEEDED.upper()} — No output"
+    assert events[2]["output"] == "LOW CONFIDENCE (40%) — first task"
+
+
+def test_assemble_after_stop_agrees_with_the_partials():
+    assembler = Assembler(confidence_threshold=0.6, total_tasks=3)
+    outputs = {"a": {"result": "kept", "confidence": 0.8}, "b": {"result": "weak", "confidence": 0.5}}
+    partials = [assembler.add(task_id, result) for task_id, result in outputs.items()]
+    partials.append(assembler.stop("c", "cancelled"))
+
+    assembled = assembler.assemble(outputs, {"c": "cancelled"})
+
+    assert assembled["assembled_output"] == {p["task_id"]: p["output"] for p in partials}
+    assert list(assembled["assembled_output"]) == ["a", "b", "c"]
+    assert assembled["failed_tasks"] == ["b", "c"]
+    assert assembled["incomplete_tasks"] == {"c": "cancelled"}
+    assert assembled["total_tasks"] == partials[-1]["done_tasks"] == 3
+    assert assembled["successful_tasks"] == partials[-1]["successful_tasks"] == 1
+    assert assembler.overall_confidence == 0.65
+
+
+def test_run_streams_partials_before_the_result():
+    plan = {
+        "tasks": [
+            {"id": "slow", "type": "extract", "worker": 1},
+            {"id": "after", "type": "summarize", "worker": 2, "depends_on": ["slow"]},
+            {"id": "fast", "type": "analyze", "worker": 3},
+        ],
+        "execution_policy": {"parallel": True, "confidence_threshold": 0.0, "deadline_s": 0.3},
+    }
+    orchestrator = Orchestrator(backend=FakeBackend(latencies={"extract": 5.0, "analyze": 0.01}))
+    try:
+        events = list(orchestrator.run(plan, "Some text to analyze here. Another sentence follows."))
+    finally:
+        orchestrator.shutdown()
+
+    partials = [e for e in events if e["type"] == "partial"]
+    result = events[-1]
+    assert result["type"] == "result"
+    # The fast task is reported as it finishes; the stopped chain follows when the deadline hits
+    assert [p["task_id"] for p in partials] == ["fast", "slow", "after"]
+    assert [p["done_tasks"] for p in partials] == [1, 2, 3]
+    assert partials[-1]["failed_tasks"] == result["warnings"] == 2
+    assert partials[-1]["successful_tasks"] == result["completed_tasks"] == 1
+    assert {p["task_id"]: p["output"] for p in partials} == result["assembled"]["assembled_output"]
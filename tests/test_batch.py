@@ -0,0 +1,23 @@
+import json
+
+from batch import run_batch
+
+JOB = {"intent": "Summarize the report", "document": "Revenue grew across every region this quarter. Costs fell."}
+
+
+def test_malformed_lines_get_error_records_and_the_rest_still_runs(tmp_path):
+    jobs = tmp_path / "jobs.jsonl"
+    jobs.write_text("\n".join([json.dumps(JOB), "{not json", "", "[1, 2]", json.dumps(dict(JOB, id="last"))]) + "\n")
+    output = tmp_path / "results.jsonl"
+
+    summary = run_batch(str(jobs), str(output), workers=1)
+    records = {r["id"]: r for r in map(json.loads, output.read_text().splitlines())}
+
+    assert (summary["ok"], summary["errors"]) == (2, 2)
+    assert records["1"]["status"] == records["last"]["status"] == "ok"
+    assert records["2"]["status"] == "error" and records["2"]["line"] == 2
+    assert records["2"]["error"].startswith("JSONDecodeError")
+    assert records["4"]["error"] == "Expected a JSON object, got list"
+
+    # Error records are checkpointed like any other, so a resumed run skips them
+    assert run_batch(str(jobs), str(output), workers=1)["skipped"] == 4
@@ -0,0 +1,20 @@
+from benchmarks import bench_load
+from benchmarks.common import percentile
+
+
+def test_percentile_is_nearest_rank():
+    values = list(range(10, 0, -1))
+    assert percentile(values, 50) == 5
+    assert percentile(values, 95) == 10
+    assert percentile(values, 0) == 1
+    assert percentile([], 50) == 0.0
+
+
+def test_load_benchmark_serves_its_own_app(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    [record] = bench_load.run(1024, clients=2, requests=4)
+
+    assert record["errors"] == 0
+    assert record["iterations"] == 4
+    # The plan database lives in a temporary directory, not the working directory
+    assert list(tmp_path.iterdir()) == []
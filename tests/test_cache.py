@@ -0,0 +1,93 @@
+import pytest
+
+import worker.cache
+from worker.cache import ResultCache
+from worker.document import Document
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(worker.cache, "time", clock)
+    return clock
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ResultCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # b is now the least recently used
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats() == {
+        "entries": 2, "max_entries": 2, "hits": 3, "misses": 1, "evictions": 1, "hit_rate": 0.75,
+    }
+
+
+def test_contains_leaves_lru_order_and_stats_alone():
+    cache = ResultCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert "a" in cache and "missing" not in cache
+    cache.put("c", 3)
+
+    # Checking "a" didn't refresh it, so it was evicted first
+    assert "a" not in cache and "b" in cache
+    assert cache.stats()["hits"] == cache.stats()["misses"] == 0
+
+
+def test_put_refreshes_an_existing_key():
+    cache = ResultCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.put("a", 10)
+    cache.put("c", 3)
+
+    assert cache.get("a") == 10
+    assert "b" not in cache
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = ResultCache(ttl=10)
+    cache.put("a", 1)
+    clock.now += 9
+    assert "a" in cache
+    assert cache.get("a") == 1
+
+    # Hits don't extend an entry's life; only put does
+    clock.now += 1
+    assert "a" not in cache
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 0
+
+    cache.put("a", 2)
+    clock.now += 5
+    cache.put("a", 3)
+    clock.now += 9
+    assert cache.get("a") == 3
+
+
+def test_entries_never_expire_without_ttl(clock):
+    cache = ResultCache()
+    cache.put("a", 1)
+    clock.now += 10 ** 9
+    assert cache.get("a") == 1
+
+
+def test_keys_follow_document_content():
+    first, same, other = Document("Same text."), Document("Same text."), Document("Other text.")
+
+    assert ResultCache.make_key(first, "analyze") == ResultCache.make_key(same, "analyze")
+    assert ResultCache.make_key(first, "analyze") != ResultCache.make_key(other, "analyze")
+    assert ResultCache.make_key(first, "analyze") != ResultCache.make_key(first, "validate")
+    assert ResultCache.make_key(first, "extract", "centroid").endswith(":extract:centroid")
@@ -0,0 +1,97 @@
+import threading
+import time
+
+import pytest
+
+from orchestrator import Orchestrator
+from worker.backend import FakeBackend
+from worker.cancellation import CANCELLED, DEADLINE_EXCEEDED, Cancelled, CancellationToken
+
+TEXT = "Some text here that is long enough to analyze. Another sentence follows it here."
+
+
+def make_plan(parallel=True, **policy):
+    return {
+        "tasks": [
+            {"id": "slow", "type": "extract", "worker": 1},
+            {"id": "after", "type": "summarize", "worker": 2, "depends_on": ["slow"]},
+            {"id": "fast", "type": "analyze", "worker": 3},
+        ],
+        "execution_policy": dict(parallel=parallel, confidence_threshold=0.0, **policy),
+    }
+
+
+def slow_extract():
+    return FakeBackend(latencies={"extract": 5.0, "summarize": 0.01, "analyze": 0.01})
+
+
+def run(plan, cancel=None, backend=None):
+    orchestrator = Orchestrator(backend=backend or slow_extract())
+    try:
+        started = time.monotonic()
+        events = list(orchestrator.run(plan, TEXT, cancel=cancel))
+        return events, time.monotonic() - started
+    finally:
+        orchestrator.shutdown()
+
+
+def test_child_token_fires_with_parent_or_own_deadline():
+    parent = CancellationToken()
+    child = parent.child(timeout=0.05)
+    assert not child.cancelled
+    assert 0 < child.remaining() <= 0.05
+
+    time.sleep(0.06)
+    assert child.reason == DEADLINE_EXCEEDED
+    assert not parent.cancelled
+
+    other = parent.child()
+    parent.cancel()
+    assert other.reason == CANCELLED
+    with pytest.raises(Cancelled):
+        other.raise_if_cancelled()
+
+
+def test_sleep_stops_when_cancelled():
+    token = CancellationToken()
+    threading.Timer(0.05, token.cancel).start()
+    started = time.monotonic()
+    with pytest.raises(Cancelled):
+        token.sleep(5)
+    assert time.monotonic() - started < 1
+
+
+@pytest.mark.parametrize("parallel", [True, False])
+def test_plan_deadline_stops_unfinished_tasks_and_their_dependents(parallel):
+    events, elapsed = run(make_plan(parallel, deadline_s=0.2))
+    result = events[-1]
+
+    assert elapsed < 2
+    assert result["timed_out"] and not result["cancelled"]
+    incomplete = {"slow": DEADLINE_EXCEEDED, "after": f"upstream {DEADLINE_EXCEEDED}"}
+    if not parallel:
+        # The critical path runs first, so the independent task never got its turn
+        incomplete["fast"] = DEADLINE_EXCEEDED
+    assert result["assembled"]["incomplete_tasks"] == incomplete
+    assert result["completed_tasks"] == 3 - len(incomplete)
+
+
+def test_task_deadline_only_stops_that_task():
+    events, _ = run(make_plan(task_deadline_s=0.2))
+    result = events[-1]
+
+    assert result["timed_out"]
+    assert set(result["assembled"]["incomplete_tasks"]) == {"slow", "after"}
+    assert result["completed_tasks"] == 1
+
+
+def test_cancelling_a_run_reports_partial_results_once():
+    token = CancellationToken()
+    threading.Timer(0.2, token.cancel).start()
+    events, elapsed = run(make_plan(), cancel=token)
+    result = events[-1]
+
+    assert elapsed < 2
+    assert result["cancelled"] and not result["timed_out"]
+    partials = [e["task_id"] for e in events if e["type"] == "partial"]
+    assert sorted(partials) == ["after", "fast", "slow"]
@@ -0,0 +1,103 @@
+import os
+import re
+
+import pytest
+
+from memory.document_store import DocumentStore
+from worker.document import TERM_PATTERN, Document, MappedDocument
+from worker.mapreduce import MapReduceRunner
+from worker.worker import Worker
+
+TEXT = "First sentence is here. Second one follows it! Is this the third? " * 50
+
+
+def open_fds() -> int:
+    return len(os.listdir("/proc/self/fd"))
+
+
+def write(tmp_path, text, name="doc.txt"):
+    path = tmp_path / name
+    path.write_bytes(text.encode("utf-8"))
+    return str(path)
+
+
+def test_mapped_document_reads_match_and_hold_no_descriptor(tmp_path):
+    document = MappedDocument(write(tmp_path, TEXT))
+    before = open_fds()
+
+    assert document.digest == Document(TEXT).digest
+    assert len(document) == len(TEXT)
+    assert not document.is_empty
+    spans = document.chunk_spans(100)
+    assert "".join(document.chunk_text(start, end) for start, end in spans) == TEXT
+    assert document.text == TEXT
+
+    assert open_fds() == before
+
+
+def test_empty_mapped_document(tmp_path):
+    document = MappedDocument(write(tmp_path, ""))
+
+    assert document.is_empty
+    assert len(document) == 0
+    assert document.chunk_spans(100) == []
+
+
+def test_stored_documents_do_not_leak_descriptors(tmp_path):
+    store = DocumentStore(spool_dir=str(tmp_path))
+    before = open_fds()
+
+    for i in range(20):
+        source = store.spool_source(f"doc{i}.txt", "file", TEXT)
+        stored = store.add_sources("session", [source])
+        stored.document().digest
+        stored.document().chunk_spans(256)
+
+    assert open_fds() == before
+
+
+@pytest.fixture(scope="module")
+def map_reduce():
+    runner = MapReduceRunner(threshold=1024, chunk_size=512, max_workers=2)
+    yield runner
+    runner.shutdown()
+
+
+@pytest.mark.parametrize("task_type", ["summarize", "extract", "analyze", "validate", "generate"])
+def test_large_mapped_documents_are_read_chunk_by_chunk(tmp_path, map_reduce, task_type):
+    text = "".join(f"Sentence number {i} talks about topic {i % 7} at some length. " for i in range(300))
+    document = MappedDocument(write(tmp_path, text))
+
+    output = Worker("w", map_reduce=map_reduce).compute({"type": task_type}, document)
+
+    assert output == Worker("w").compute({"type": task_type}, Document(text))
+    assert document.resident_size() == 0
+    assert "sentences" not in document.__dict__
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "   ",
+    "...!?",
+    TEXT,
+    "  Leading space.Trailing space  !\n\nNo terminator at the end",
+    "Tabs\tand\u3000wide\xa0spaces.\u2028 Line separators?\u0085 \u212aelvin signs and \u0130stanbul terms!",
+    "Digits9like this_word, abcd5efgh; Über naïve café words. That with these those!",
+])
+def test_whole_text_tokenization_matches_per_sentence_definitions(text):
+    document = Document(text)
+    pieces = []
+    start = 0
+    for match in re.finditer(r"[.!?]+", text):
+        pieces.append(text[start:match.start()])
+        start = match.end()
+    pieces.append(text[start:])
+
+    assert document.sentences == [piece.strip() for piece in pieces]
+    assert [text[s:e] for s, e in document.sentence_offsets] == document.sentences
+    assert list(document.sentence_word_counts) == [len(s.split()) for s in document.sentences]
+
+    rows, ids, vocabulary = document.sentence_terms
+    expected = [(row, term) for row, s in enumerate(document.sentences) for term in TERM_PATTERN.findall(s.lower())]
+    assert [(int(row), vocabulary[i]) for row, i in zip(rows, ids)] == expected
+    assert vocabulary == list(dict.fromkeys(term for _, term in expected))
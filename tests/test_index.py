@@ -0,0 +1,97 @@
+import pytest
+
+from memory.index import CorpusIndex
+from worker.document import MappedDocument
+from worker.worker import Worker
+
+TEXTS = [
+    "Revenue growth continued across every region this quarter. "
+    "Logistics contracts lowered operating costs considerably! "
+    "Did customer retention improve after support hours expanded? It did.\n\n"
+    "Margins held steady   despite   higher freight rates. ",
+    "Café owners reported naïve forecasts — résumé reviews followed. "
+    "Ünïcödé terms count too. Line separators split nothing here. "
+    "Growth, growth and more growth",
+    "no boundary at all just words and more words and the end",
+    "Short. Tiny. A. ",
+    "",
+    "   \n\t  ",
+]
+SEPARATORS = ["\n\n---\n\n", " ", "\n", " . ", " x "]
+
+
+def write(tmp_path, name, text):
+    path = tmp_path / name
+    path.write_bytes(text.encode("utf-8"))
+    return MappedDocument(str(path))
+
+
+def assert_matches_scan(index, document):
+    indexed = Worker("indexed", index=index)
+    scanned = Worker("scanned")
+    for task_type in sorted(Worker.INDEXED):
+        task = {"id": "t", "type": task_type}
+        assert indexed.indexed_output(task, document) == scanned.compute(task, document), task_type
+
+
+@pytest.mark.parametrize("window", [16, 64, 1 << 20])
+@pytest.mark.parametrize("number", range(len(TEXTS)))
+def test_stats_match_a_full_scan(tmp_path, window, number):
+    index = CorpusIndex(window=window)
+    document = write(tmp_path, "source.txt", TEXTS[number] * (3 if TEXTS[number].strip() else 1))
+    index.add(document.path, document)
+
+    assert_matches_scan(index, document)
+
+
+@pytest.mark.parametrize("window", [16, 1 << 20])
+@pytest.mark.parametrize("separator", SEPARATORS)
+@pytest.mark.parametrize("numbers", [range(len(TEXTS)), [3, 0, 2], [4, 5]])
+def test_alias_stats_match_a_scan_of_the_joined_text(tmp_path, window, separator, numbers):
+    index = CorpusIndex(window=window)
+    parts = [write(tmp_path, f"part{i}.txt", TEXTS[i]) for i in numbers]
+    for part in parts:
+        index.add(part.path, part)
+    combined = write(tmp_path, "combined.txt", separator.join(TEXTS[i] for i in numbers))
+    index.alias(combined.path, [part.path for part in parts], separator)
+
+    assert index.covers(combined.path)
+    assert_matches_scan(index, combined)
+
+
+@pytest.mark.parametrize("separator", ["", ". ", " .", "---"])
+def test_alias_separators_must_not_glue_words(separator):
+    with pytest.raises(ValueError, match="whitespace"):
+        CorpusIndex().alias("combined", ["a", "b"], separator)
+
+
+def test_removed_sources_are_compacted_away(tmp_path):
+    index = CorpusIndex(window=64)
+    documents = [write(tmp_path, f"source{i}.txt", text) for i, text in enumerate(TEXTS[:5])]
+    for document in documents:
+        index.add(document.path, document)
+    index.alias("combined", [documents[0].path, documents[1].path], " ")
+
+    index.remove(documents[1].path)
+    index.remove(documents[2].path)
+    assert index.stats(documents[1].path) is None
+    assert index.stats("combined") is None
+    assert len(index._sources) == 5
+    assert index.stats_summary()["sources"] == 3
+    assert index.sources_mentioning("words") == []
+
+    # A third removal leaves tombstones outnumbering live sources
+    index.remove(documents[4].path)
+    assert [(source.key, source.number) for source in index._sources] == [
+        (documents[0].path, 0), (documents[3].path, 1),
+    ]
+    assert index.sources_mentioning("customer") == [(documents[0].path, 1)]
+    assert {hit["source"] for hit in index.search("revenue tiny")} == {documents[0].path, documents[3].path}
+    for document in (documents[0], documents[3]):
+        assert_matches_scan(index, document)
+
+    # Re-adding after compaction numbers the source after the live ones
+    index.add(documents[1].path, documents[1])
+    assert index._by_key[documents[1].path].number == 2
+    assert index.sources_mentioning("growth") == [(documents[1].path, 3), (documents[0].path, 1)]
+    assert_matches_scan(index, documents[1])
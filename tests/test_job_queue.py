@@ -0,0 +1,63 @@
+import threading
+
+import pytest
+
+from jobs.job_queue import JobQueue, QueueFull
+
+
+class GatedOrchestrator:
+    """Records the order plans start in; each run waits until the gate opens."""
+
+    def __init__(self):
+        self.started = []
+        self.first_started = threading.Event()
+        self.gate = threading.Event()
+
+    def run(self, plan, document, sources, cancel):
+        self.started.append(plan["id"])
+        self.first_started.set()
+        self.gate.wait(5)
+        yield {"type": "result", "id": plan["id"]}
+
+
+@pytest.fixture
+def orchestrator():
+    return GatedOrchestrator()
+
+
+def test_burst_from_one_client_does_not_delay_another(orchestrator):
+    queue = JobQueue(orchestrator, workers=1)
+    try:
+        queue.submit("a", {"id": "a1"}, None)
+        assert orchestrator.first_started.wait(5)
+        for i in range(2, 6):
+            queue.submit("a", {"id": f"a{i}"}, None)
+        queue.submit("b", {"id": "b1"}, None)
+        assert queue.stats()["clients_waiting"] == 2
+        orchestrator.gate.set()
+    finally:
+        queue.shutdown(timeout=5)
+
+    # b1 arrived after a's whole burst but only waits for one of a's jobs
+    assert orchestrator.started == ["a1", "a2", "b1", "a3", "a4", "a5"]
+
+
+def test_admission_limits(orchestrator):
+    queue = JobQueue(orchestrator, workers=1, max_depth=2, max_per_client=2)
+    try:
+        queue.submit("a", {"id": "a1"}, None)
+        assert orchestrator.first_started.wait(5)
+        queue.submit("a", {"id": "a2"}, None)
+        with pytest.raises(QueueFull, match="Too many outstanding jobs"):
+            queue.submit("a", {"id": "a3"}, None)
+
+        queue.submit("b", {"id": "b1"}, None)
+        with pytest.raises(QueueFull, match="full"):
+            queue.submit("c", {"id": "c1"}, None)
+        orchestrator.gate.set()
+    finally:
+        queue.shutdown(timeout=5)
+
+    assert orchestrator.started == ["a1", "a2", "b1"]
+    with pytest.raises(QueueFull, match="shutting down"):
+        queue.submit("c", {"id": "c1"}, None)
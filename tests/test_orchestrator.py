@@ -0,0 +1,180 @@
+import threading
+import time
+
+import pytest
+
+from orchestrator import Orchestrator, _compute_task
+from planner.cost_model import CostModel
+from planner.planner import Planner
+from worker.document import Document
+from worker.backend import FakeBackend
+from worker.cancellation import DEADLINE_EXCEEDED, Cancelled, CancellationToken
+
+TEXT = (
+    "The quarterly report covers revenue growth across every region this year. "
+    "Operating costs fell because the new logistics contracts took effect early. "
+    "Customer retention improved after the support team expanded its hours. "
+) * 20
+
+
+class StragglingBackend:
+    """Backend whose first call of each task type straggles; every later call is fast."""
+
+    def __init__(self, straggler=5.0, latency=0.005):
+        self.straggler = straggler
+        self.latency = latency
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def call(self, task_type, cancel=None):
+        with self._lock:
+            first = task_type not in self.calls
+            self.calls.append(task_type)
+        cancel.sleep(self.straggler if first else self.latency)
+
+
+def test_hedging_fires_for_planner_chain_plan():
+    plan = Planner(cost_model=CostModel()).create_plan("summarize the report", document_size=len(TEXT))
+    policy = plan["execution_policy"]
+    # A chain of tasks balances onto a single worker lane
+    assert policy["parallel"] and policy["max_workers"] == 1
+    policy.update(hedge_percentile=90, hedge_min_samples=5, confidence_threshold=0.0)
+
+    backend = StragglingBackend()
+    orchestrator = Orchestrator(backend=backend)
+    for task in plan["tasks"]:
+        for _ in range(5):
+            orchestrator.latencies.record(task["type"], 0.01)
+
+    started = time.monotonic()
+    events = list(orchestrator.run(plan, TEXT))
+    elapsed = time.monotonic() - started
+    orchestrator.shutdown()
+
+    result = events[-1]
+    assert result["type"] == "result"
+    assert result["completed_tasks"] == len(plan["tasks"])
+    assert elapsed < backend.straggler
+    # Each straggling attempt got a hedge that won
+    assert sorted(backend.calls) == sorted(t["type"] for t in plan["tasks"] for _ in range(2))
+    assert any("Hedging" in e.get("task_description", "") for e in events)
+
+
+def test_hedging_off_waits_for_stragglers_without_extra_calls():
+    plan = Planner(cost_model=CostModel()).create_plan("summarize the report", document_size=len(TEXT))
+    plan["execution_policy"]["confidence_threshold"] = 0.0
+
+    backend = StragglingBackend(straggler=0.2)
+    orchestrator = Orchestrator(backend=backend)
+    events = list(orchestrator.run(plan, TEXT))
+    orchestrator.shutdown()
+
+    assert events[-1]["completed_tasks"] == len(plan["tasks"])
+    assert len(backend.calls) == len(plan["tasks"])
+
+
+def parallel_plan(executor, tasks=4):
+    types = ("extract", "analyze", "validate", "summarize")
+    return {
+        "tasks": [{"id": f"t{i}", "type": types[i % len(types)], "worker": i + 1} for i in range(tasks)],
+        "execution_policy": {"parallel": True, "executor": executor, "confidence_threshold": 0.0},
+    }
+
+
+def pool_threads():
+    return [t for t in threading.enumerate() if t.name.startswith("orchestrator")]
+
+
+def test_thread_pool_is_shared_across_runs():
+    orchestrator = Orchestrator()
+    before = len(pool_threads())
+    try:
+        list(orchestrator.run(parallel_plan("thread"), TEXT))
+        pool = orchestrator._pools["thread"][0]
+        for _ in range(5):
+            assert list(orchestrator.run(parallel_plan("thread"), TEXT))[-1]["completed_tasks"] == 4
+        assert orchestrator._pools["thread"][0] is pool
+        # Runs reuse the pool's threads rather than each starting their own
+        assert len(pool_threads()) - before <= 4 + 1
+    finally:
+        orchestrator.shutdown()
+    assert orchestrator._pools == {}
+
+
+def test_process_pool_is_shared_and_matches_thread_results():
+    orchestrator = Orchestrator(max_workers=2)
+    try:
+        expected = list(orchestrator.run(parallel_plan("thread"), TEXT))[-1]["assembled"]
+        first = list(orchestrator.run(parallel_plan("process"), TEXT))[-1]
+        pool = orchestrator._pools["process"][0]
+        second = list(orchestrator.run(parallel_plan("process"), TEXT))[-1]
+
+        assert orchestrator._pools["process"][0] is pool
+        assert first["completed_tasks"] == second["completed_tasks"] == 4
+        assert first["assembled"]["assembled_output"] == expected["assembled_output"]
+        assert second["assembled"]["assembled_output"] == expected["assembled_output"]
+    finally:
+        orchestrator.shutdown()
+
+
+def test_process_executor_calls_the_backend():
+    backend = FakeBackend(latency=0.01)
+    orchestrator = Orchestrator(max_workers=2, backend=backend)
+    try:
+        result = list(orchestrator.run(parallel_plan("process"), TEXT))[-1]
+    finally:
+        orchestrator.shutdown()
+
+    assert result["completed_tasks"] == 4
+    assert backend.calls == 4
+
+
+@pytest.mark.parametrize("stop", ["deadline", "cancel"])
+def test_process_executor_stops_slow_backend_calls(stop):
+    plan = parallel_plan("process")
+    cancel = CancellationToken()
+    if stop == "deadline":
+        plan["execution_policy"]["deadline_s"] = 0.2
+    else:
+        threading.Timer(0.2, cancel.cancel).start()
+    orchestrator = Orchestrator(max_workers=2, backend=FakeBackend(latencies={"extract": 5.0}))
+    try:
+        started = time.monotonic()
+        result = list(orchestrator.run(plan, TEXT, cancel=cancel))[-1]
+        elapsed = time.monotonic() - started
+    finally:
+        orchestrator.shutdown()
+
+    assert elapsed < 2
+    assert result["timed_out"] == (stop == "deadline")
+    assert result["cancelled"] == (stop == "cancel")
+    assert list(result["assembled"]["incomplete_tasks"]) == ["t0"]
+    assert result["completed_tasks"] == 3
+
+
+def test_process_executor_hedges_straggling_backend_calls():
+    plan = parallel_plan("process", tasks=2)
+    plan["execution_policy"].update(hedge_percentile=90, hedge_min_samples=5)
+    backend = StragglingBackend()
+    orchestrator = Orchestrator(backend=backend)
+    for task in plan["tasks"]:
+        for _ in range(5):
+            orchestrator.latencies.record(task["type"], 0.01)
+    try:
+        started = time.monotonic()
+        result = list(orchestrator.run(plan, TEXT))[-1]
+        elapsed = time.monotonic() - started
+    finally:
+        orchestrator.shutdown()
+
+    assert result["completed_tasks"] == 2
+    assert elapsed < backend.straggler
+    assert sorted(backend.calls) == ["analyze", "analyze", "extract", "extract"]
+
+
+def test_process_tasks_past_their_deadline_are_not_computed():
+    task, document = {"id": "t0", "type": "analyze"}, Document(TEXT)
+    assert _compute_task("Worker-1", 0.3, task, document, deadline=time.time() + 60)["result"]
+    with pytest.raises(Cancelled) as raised:
+        _compute_task("Worker-1", 0.3, task, document, deadline=time.time() - 1)
+    assert raised.value.reason == DEADLINE_EXCEEDED
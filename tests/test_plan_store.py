@@ -0,0 +1,125 @@
+import copy
+
+from memory.plan_store import PlanStore, size_bucket
+from planner.cost_model import CostModel
+from planner.planner import Planner
+
+INTENT = "Summarize the quarterly report"
+
+
+def make_planner():
+    store = PlanStore()
+    return Planner(store=store), store
+
+
+def test_planner_plans_are_recorded_and_reused():
+    planner, store = make_planner()
+    plan = planner.create_plan(INTENT, 1, 5000)
+
+    assert store.record_run(plan, 1, 5000, latency=0.5, confidence=0.8, failure_rate=0.0)
+    [stats] = store.stats(INTENT, 1, 5000)
+    assert stats["plan_id"] == plan["plan_id"]
+    assert stats["runs"] == 1
+    assert planner.create_plan(INTENT, 1, 5000)["plan_id"] == plan["plan_id"]
+
+
+def test_client_plans_never_enter_the_ranking():
+    planner, store = make_planner()
+    plan = planner.create_plan(INTENT, 1, 5000)
+    store.record_run(plan, 1, 5000, latency=0.5, confidence=0.7, failure_rate=0.0)
+
+    # A one-task plan would otherwise outrank the planner's on latency
+    client = {"intent": INTENT, "tasks": plan["tasks"][:1], "execution_policy": plan["execution_policy"]}
+    assert not store.record_run(client, 1, 5000, latency=0.01, confidence=0.95, failure_rate=0.0)
+
+    # Nor may a client edit a stored plan while keeping its plan_id
+    edited = copy.deepcopy(plan)
+    edited["tasks"].pop()
+    assert not store.record_run(edited, 1, 5000, latency=0.01, confidence=0.95, failure_rate=0.0)
+
+    # Or credit a stored plan under an intent it wasn't planned for
+    renamed = dict(plan, intent="Analyze the quarterly report")
+    assert not store.record_run(renamed, 1, 5000, latency=0.01, confidence=0.95, failure_rate=0.0)
+
+    assert [s["plan_id"] for s in store.stats(INTENT, 1, 5000)] == [plan["plan_id"]]
+    assert store.stats(INTENT, 1, 5000)[0]["runs"] == 1
+    assert store.lookup(INTENT, 1, 5000)["tasks"] == plan["tasks"]
+
+
+def test_best_performing_planner_variant_ranks_first():
+    store = PlanStore()
+    slow = {"tasks": [{"id": "a", "type": "extract"}], "execution_policy": {"parallel": False}}
+    fast = {"tasks": [{"id": "b", "type": "summarize"}], "execution_policy": {"parallel": False}}
+    for plan in (slow, fast):
+        plan["intent"] = INTENT
+        store.save(INTENT, 0, 100, plan)
+
+    store.record_run(slow, 0, 100, latency=2.0, confidence=0.9, failure_rate=0.0)
+    store.record_run(fast, 0, 100, latency=0.1, confidence=0.9, failure_rate=0.0)
+    assert store.lookup(INTENT, 0, 100)["plan_id"] == fast["plan_id"]
+
+    store.record_run(fast, 0, 100, latency=0.1, confidence=0.9, failure_rate=1.0)
+    assert store.lookup(INTENT, 0, 100)["plan_id"] == slow["plan_id"]
+
+
+def test_reused_plans_are_rebalanced_with_current_estimates(monkeypatch):
+    monkeypatch.setattr("planner.planner.available_cores", lambda: 4)
+    store, cost_model = PlanStore(), CostModel()
+    planner = Planner(store=store, cost_model=cost_model)
+    plan = planner.create_plan("Compare the reports", 3, 300000)
+
+    for _ in range(50):
+        cost_model.record("analyze", 100000, 5.0)
+    reused = planner.create_plan("Compare the reports", 3, 300000)
+    [analyze] = [task for task in reused["tasks"] if task["type"] == "analyze"]
+    assert analyze["estimated_s"] == round(cost_model.estimate("analyze", 300000), 6)
+    assert reused["execution_policy"]["estimated_makespan_s"] > plan["execution_policy"]["estimated_makespan_s"]
+
+    # Fresh estimates alone leave the variant as stored
+    assert reused["plan_id"] == plan["plan_id"]
+    assert store.record_run(reused, 3, 300000, latency=0.5, confidence=0.8, failure_rate=0.0)
+
+
+def test_rebalanced_worker_assignment_is_a_new_variant(monkeypatch):
+    monkeypatch.setattr("planner.planner.available_cores", lambda: 4)
+    store = PlanStore()
+    plan = Planner(store=store).create_plan("Compare the reports", 3, 300000)
+
+    reused = Planner(store=store, cost_model=CostModel()).create_plan("Compare the reports", 3, 300000)
+    assert reused["plan_id"] != plan["plan_id"]
+    assert "max_workers" in reused["execution_policy"]
+    assert store.record_run(reused, 3, 300000, latency=0.5, confidence=0.8, failure_rate=0.0)
+    assert {s["plan_id"] for s in store.stats("Compare the reports", 3, 300000)} == {plan["plan_id"], reused["plan_id"]}
+
+
+def test_low_scoring_plans_make_way_for_new_variants():
+    planner, store = make_planner()
+    plan = planner.create_plan(INTENT, 1, 5000)
+    for _ in range(store.min_runs):
+        store.record_run(plan, 1, 5000, latency=0.5, confidence=0.4, failure_rate=0.5)
+
+    variant = planner.create_plan(INTENT, 1, 5000)
+    assert variant["plan_id"] != plan["plan_id"]
+    # The new variant gets its runs before the stored one is judged again
+    assert planner.create_plan(INTENT, 1, 5000)["plan_id"] == variant["plan_id"]
+    store.record_run(variant, 1, 5000, latency=0.5, confidence=0.9, failure_rate=0.0)
+    assert planner.create_plan(INTENT, 1, 5000)["plan_id"] == variant["plan_id"]
+    assert [s["plan_id"] for s in store.stats(INTENT, 1, 5000)] == [variant["plan_id"], plan["plan_id"]]
+
+
+def test_replanning_stops_at_max_variants():
+    store = PlanStore(max_variants=2)
+    planner = Planner(store=store)
+    for _ in range(3):
+        plan = planner.create_plan(INTENT, 1, 5000)
+        for _ in range(store.min_runs):
+            assert store.record_run(plan, 1, 5000, latency=0.5, confidence=0.2, failure_rate=0.0)
+
+    assert len(store.stats(INTENT, 1, 5000)) == 2
+
+
+def test_size_buckets_separate_documents_of_different_cost():
+    assert size_bucket(0) == "empty"
+    assert size_bucket(1024 * 1024) != size_bucket(8 * 1024 * 1024)
+    assert size_bucket(5000) != size_bucket(100 * 1024)
+    assert size_bucket(1 << 40) == "huge"
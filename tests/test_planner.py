@@ -0,0 +1,153 @@
+import json
+import os
+import threading
+
+import pytest
+
+from planner.matcher import RulesFile, validate_patterns
+from planner.planner import Planner
+from worker.worker import Worker
+
+REVIEW = [
+    {"type": "extract", "description": "Extract the clauses"},
+    {"type": "validate", "description": "Check the clauses", "after": [0]},
+]
+
+
+def write_rules(path, data, bump=0):
+    path.write_text(json.dumps(data) if not isinstance(data, str) else data)
+    # Make each write visible to the mtime check regardless of timestamp resolution
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + bump * 1_000_000_000))
+
+
+def make_planner(tmp_path, data):
+    path = tmp_path / "rules.json"
+    write_rules(path, data)
+    planner = Planner(rules_path=str(path))
+    planner._rules_file.check_interval = 0
+    return planner, path
+
+
+def task_types(plan):
+    return [t["type"] for t in plan["tasks"]]
+
+
+def test_rules_file_adds_patterns_and_rules(tmp_path):
+    planner, _ = make_planner(tmp_path, {
+        "patterns": {"review": REVIEW},
+        "rules": [{"keywords": ["contract", ["review", "audit"]], "pattern": "review", "priority": 5}],
+    })
+
+    assert task_types(planner.create_plan("Audit this contract")) == ["extract", "validate"]
+    assert task_types(planner.create_plan("Summarize this")) == ["extract", "summarize"]
+
+
+@pytest.mark.parametrize("bad", [
+    "{not json",
+    [],
+    {"patterns": {"review": [{"description": "No type"}]}},
+    {"patterns": {"review": [{"type": "extract", "description": "Forward", "after": [1]}, REVIEW[0]]}},
+    {"patterns": {"review": [{"type": "extract", "description": "Self", "after": [0]}]}},
+    {"patterns": {"review": [dict(REVIEW[0], per_source="Source {m}")]}},
+    {"patterns": {"review": REVIEW}, "rules": [{"keywords": "contract", "pattern": "review"}]},
+    {"patterns": {"review": REVIEW}, "rules": [{"keywords": ["contract"], "pattern": "missing"}]},
+    {"patterns": {"review": REVIEW}, "rules": [{"pattern": "review"}]},
+])
+def test_bad_reload_keeps_previous_rules(tmp_path, bad):
+    planner, path = make_planner(tmp_path, {
+        "patterns": {"review": REVIEW},
+        "rules": [{"keywords": ["contract"], "pattern": "review", "priority": 5}],
+    })
+    version = planner.patterns_version
+
+    write_rules(path, bad, bump=1)
+    plan = planner.create_plan("Summarize this contract")
+
+    assert task_types(plan) == ["extract", "validate"]
+    assert planner._rules_file.last_error is not None
+    assert planner.patterns_version == version
+    # Nothing of the rejected file lingers to break later rebuilds
+    planner.update_patterns(dict(planner._task_patterns))
+
+    # Fixing the file is picked up on the next check
+    write_rules(path, {"rules": [{"keywords": ["contract"], "pattern": "analyze", "priority": 5}]}, bump=2)
+    assert task_types(planner.create_plan("Summarize this contract")) == ["extract", "analyze", "generate"]
+    assert planner._rules_file.last_error is None
+
+
+def test_invalid_rules_file_at_startup_is_ignored(tmp_path):
+    planner, _ = make_planner(tmp_path, {"rules": [{"keywords": ["contract"], "pattern": "missing"}]})
+
+    assert planner._rules_file.rules == []
+    assert "missing" in planner._rules_file.last_error
+    assert task_types(planner.create_plan("Summarize this contract")) == ["extract", "summarize"]
+
+
+def test_update_patterns_rejects_dropping_a_pattern_a_rule_needs(tmp_path):
+    planner, _ = make_planner(tmp_path, {"rules": [{"keywords": ["contract"], "pattern": "extract", "priority": 5}]})
+    patterns = dict(planner._task_patterns)
+    kept = dict(patterns)
+    del patterns["extract"]
+
+    with pytest.raises(ValueError):
+        planner.update_patterns(patterns)
+    assert planner._task_patterns == kept
+    assert task_types(planner.create_plan("Summarize this contract")) == ["extract", "validate"]
+
+
+def test_plans_see_patterns_and_rules_from_one_build():
+    planner = Planner()
+    with_audit = dict(planner._task_patterns, audit=REVIEW)
+    without_audit = dict(planner._task_patterns)
+    versions = set()
+    errors = []
+    stop = threading.Event()
+
+    def plan():
+        while not stop.is_set():
+            try:
+                # Only "audit" builds have the rule matching this intent, and the pattern it names
+                assert task_types(planner.create_plan("audit the terms")) in (
+                    ["extract", "validate"], ["extract", "analyze", "generate"],
+                )
+            except Exception as e:
+                errors.append(e)
+                return
+
+    threads = [threading.Thread(target=plan) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    try:
+        for i in range(300):
+            planner.update_patterns(with_audit if i % 2 else without_audit)
+            versions.add(planner.patterns_version)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+    assert errors == []
+    assert len(versions) == 2
+
+
+def test_builtin_patterns_are_valid():
+    validate_patterns(Planner()._task_patterns)
+
+
+def test_builtin_patterns_only_wait_for_outputs_they_consume():
+    planner = Planner()
+    for pattern in planner._task_patterns.values():
+        for template in pattern:
+            assert not template.get("after") or template["type"] in Worker.UPSTREAM_CONSUMERS
+
+    tasks = planner.create_plan("Compare the reports", num_sources=3)["tasks"]
+    [report] = [task for task in tasks if task["type"] == "generate"]
+    assert report["depends_on"] == [task["id"] for task in tasks if task is not report]
+
+
+def test_rules_file_without_validator(tmp_path):
+    path = tmp_path / "rules.json"
+    write_rules(path, {"rules": [{"keywords": ["x"], "pattern": "anything"}]})
+
+    assert [rule.pattern for rule in RulesFile(str(path)).rules] == ["anything"]
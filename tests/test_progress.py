@@ -0,0 +1,105 @@
+import base64
+import gzip
+import json
+
+import pytest
+
+from jobs.job_queue import Job
+from jobs.progress import ProgressStream
+
+
+def update(worker_id, **fields):
+    return {"type": "worker_update", "worker_id": worker_id, **fields}
+
+
+EVENTS = [
+    update(1, status="running", current_task="t1", total_tasks=2, progress=0.0),
+    update(2, status="running", current_task="t2", total_tasks=2, progress=0.0),
+    update(1, status="running", current_task="t1", total_tasks=2, progress=0.5),
+    {"type": "partial", "task_id": "t1", "text": "first"},
+    update(1, status="complete", current_task="t1", total_tasks=2, progress=1.0, confidence=0.9),
+    update(2, status="running", current_task="t2", total_tasks=2, progress=0.5),
+    update(2, status="complete", current_task="t2", total_tasks=2, progress=1.0, confidence=0.8),
+    {"type": "result", "output": "summary " * 200},
+]
+
+
+@pytest.fixture
+def job():
+    job = Job("session-a", {}, None, [])
+    for event in EVENTS:
+        job.publish(event)
+    job.finish("complete")
+    return job
+
+
+def parse(frames):
+    """(id, data) of each data frame, skipping the retry preamble and heartbeats."""
+    parsed = []
+    for frame in frames:
+        if not frame.startswith("id: "):
+            continue
+        id_line, data_line = frame.strip().split("\n")
+        parsed.append((int(id_line[4:]), json.loads(data_line[6:])))
+    return parsed
+
+
+def fold(parsed, state=None):
+    """Client-side view: worker fields with deltas applied, plus the decoded result."""
+    state = state or {"workers": {}, "other": []}
+    for _, data in parsed:
+        if data["type"] == "progress":
+            for wid, delta in data["workers"].items():
+                state["workers"].setdefault(wid, {}).update(delta)
+        elif data.get("encoding") == "gzip+base64":
+            state["other"].append(json.loads(gzip.decompress(base64.b64decode(data["payload"]))))
+        else:
+            state["other"].append(data)
+    return state
+
+
+def test_updates_are_coalesced_within_a_window(job):
+    parsed = parse(ProgressStream(window=60).frames(job))
+
+    assert [data["type"] for _, data in parsed] == ["progress", "partial", "progress", "result"]
+    # One frame per run of updates, carrying each worker's latest state
+    assert parsed[0] == (2, {"type": "progress", "workers": {
+        "1": {"status": "running", "current_task": "t1", "total_tasks": 2, "progress": 0.5},
+        "2": {"status": "running", "current_task": "t2", "total_tasks": 2, "progress": 0.0},
+    }})
+    assert parsed[1][0] == 3
+    assert parsed[2] == (6, {"type": "progress", "workers": {
+        "1": {"status": "complete", "progress": 1.0, "confidence": 0.9},
+        "2": {"status": "complete", "progress": 1.0, "confidence": 0.8},
+    }})
+    assert parsed[3][0] == 7
+
+
+def test_progress_frames_carry_only_changed_fields(job):
+    parsed = parse(ProgressStream(window=0).frames(job))
+
+    progress = [(index, data["workers"]) for index, data in parsed if data["type"] == "progress"]
+    assert progress[2] == (2, {"1": {"progress": 0.5}})
+    assert progress[4] == (5, {"2": {"progress": 0.5}})
+
+
+@pytest.mark.parametrize("window", [0, 60])
+def test_resumed_stream_folds_to_the_full_state(job, window):
+    stream = ProgressStream(window=window)
+    full = parse(stream.frames(job))
+    expected = fold(full)
+
+    for position, (last_event_id, _) in enumerate(full):
+        resumed = parse(stream.frames(job, last_event_id=last_event_id))
+        assert all(index > last_event_id for index, _ in resumed)
+        assert fold(resumed, fold(full[:position + 1])) == expected
+
+
+def test_large_results_are_compressed(job):
+    compressed = parse(ProgressStream(compress_above=1024).frames(job))[-1][1]
+    plain = parse(ProgressStream().frames(job))[-1][1]
+
+    assert compressed["encoding"] == "gzip+base64"
+    assert len(compressed["payload"]) < len(json.dumps(EVENTS[-1]))
+    assert plain == EVENTS[-1]
+    assert fold([(7, compressed)])["other"] == [EVENTS[-1]]
@@ -0,0 +1,71 @@
+import pytest
+
+from orchestrator import Orchestrator
+from worker.cache import ResultCache
+from worker.document import Document
+from worker.retry import RetryPolicy
+from worker.worker import Worker
+
+TEXT = (
+    "Revenue growth continued across every region this quarter. "
+    "Logistics contracts lowered operating costs considerably. "
+    "Customer retention improved after support hours expanded. "
+)
+
+
+class CountingBackend:
+    def __init__(self):
+        self.calls = []
+
+    def call(self, task_type, cancel=None):
+        self.calls.append(task_type)
+
+
+def plan(parallel):
+    return {
+        "tasks": [{"id": "t0", "type": "extract", "worker": 1}],
+        "execution_policy": {
+            "parallel": parallel, "max_retries": 2, "confidence_threshold": 0.99,
+            "backoff_base": 0.01, "backoff_max": 0.02,
+        },
+    }
+
+
+@pytest.mark.parametrize("parallel", [False, True])
+def test_non_deterministic_handlers_re_execute_after_backoff(monkeypatch, parallel):
+    monkeypatch.setattr(Worker, "NON_DETERMINISTIC", frozenset({"extract"}))
+    backoffs = []
+    backoff = RetryPolicy.backoff
+    monkeypatch.setattr(RetryPolicy, "backoff", lambda self, attempt: backoffs.append(attempt) or backoff(self, attempt))
+    backend = CountingBackend()
+    cache = ResultCache()
+    orchestrator = Orchestrator(cache=cache, backend=backend)
+    try:
+        events = list(orchestrator.run(plan(parallel), TEXT))
+    finally:
+        orchestrator.shutdown()
+
+    # Every retry ran the handler again instead of replaying a cached output
+    assert backend.calls == ["extract"] * 3
+    assert backoffs == [0, 1]
+    assert cache.stats()["hits"] == 0 and cache.stats()["entries"] == 0
+    assert sum("Retrying" in e.get("task_description", "") for e in events) == 2
+    # Still below the 0.99 threshold after every retry
+    assert events[-1]["warnings"] == 1
+
+
+def test_deterministic_handlers_only_redraw_confidence():
+    backend = CountingBackend()
+    orchestrator = Orchestrator(cache=ResultCache(), backend=backend)
+    events = list(orchestrator.run(plan(False), TEXT))
+
+    assert backend.calls == ["extract"]
+    assert sum("Retrying" in e.get("task_description", "") for e in events) == 0
+
+
+def test_non_deterministic_types_are_not_cached(monkeypatch):
+    monkeypatch.setattr(Worker, "NON_DETERMINISTIC", frozenset({"extract"}))
+    worker = Worker("w", cache=ResultCache())
+
+    assert worker.cache_key({"type": "extract"}, TEXT) is None
+    assert worker.cache_key({"type": "analyze"}, Document(TEXT)) is not None
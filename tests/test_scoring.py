@@ -0,0 +1,86 @@
+import numpy as np
+
+from worker.document import Document
+import worker.scoring
+from orchestrator import Orchestrator
+from planner.planner import Planner
+from worker.scoring import SCORERS, centroid_scores, length_scores, rank_batch, top_k
+from worker.worker import Worker
+
+TEXT = (
+    "Short one. "
+    "Revenue growth continued across every region this quarter. "
+    "Logistics contracts lowered operating costs considerably across the region. "
+    "Costs fell. "
+    "Customer retention improved after support hours expanded this quarter. "
+    "Revenue and costs and retention were reviewed by the board this quarter."
+)
+
+
+def test_top_k_matches_stable_descending_sort():
+    rng = np.random.default_rng(3)
+    scores = rng.integers(0, 5, size=200).astype(np.float64)
+    eligible = rng.random(200) > 0.3
+    expected = sorted(np.flatnonzero(eligible), key=lambda i: -scores[i])
+
+    for k in (0, 1, 5, 50, 500):
+        assert list(top_k(scores, k, eligible)) == expected[:k]
+    assert list(top_k(scores[:0], 3)) == []
+
+
+def test_rank_batch_matches_top_k_per_document():
+    documents = [Document(TEXT), Document(""), Document(TEXT[::-1]), Document(TEXT.upper() + TEXT)]
+    for scoring, scorer in SCORERS.items():
+        features = [Document(d.text).sentence_features for d in documents]
+        rankings = rank_batch(features, 3, scoring, 10)
+
+        for f, ranking in zip(features, rankings):
+            assert list(ranking) == list(top_k(scorer(f), 3, f.lengths > 10))
+            assert f.ranking(scoring, 3, 10) is ranking
+    assert rank_batch([], 3) == []
+
+
+def test_per_source_extracts_are_ranked_in_one_batch(monkeypatch):
+    calls = []
+
+    def counted(features_list, *args):
+        calls.append(len(features_list))
+        return rank_batch(features_list, *args)
+
+    monkeypatch.setattr(worker.scoring, "rank_batch", counted)
+    monkeypatch.setattr("worker.worker.rank_batch", counted)
+    sources = [TEXT, TEXT[::-1], "Nothing much here at all, really. " * 3]
+    plan = Planner().create_plan("Compare these reports", num_sources=len(sources))
+    plan["execution_policy"]["parallel"] = False
+    result = list(Orchestrator().run(plan, " ".join(sources), sources=sources))[-1]
+
+    assert calls == [len(sources)]
+    extracts = [t for t in plan["tasks"] if t["type"] == "extract"]
+    for task in extracts:
+        expected = Worker("w").compute(task, Document(sources[task["source"]]))["result"]
+        assert result["assembled"]["assembled_output"][task["id"]].endswith(expected)
+
+
+def test_extract_ranks_longest_sentences_in_document_order_on_ties():
+    document = Document(TEXT)
+    by_words = sorted(document.sentences_longer_than(10), key=lambda s: -len(s.split()))
+    result = Worker("w").compute({"type": "extract"}, document)["result"]
+
+    assert result == "\n".join(f"• {s}." for s in by_words[:5])
+
+
+def test_centroid_scoring_prefers_central_sentences():
+    features = Document(TEXT).sentence_features
+    scores = centroid_scores(features)
+
+    assert scores.shape == (len(features),)
+    assert np.all((scores >= 0) & (scores <= 1 + 1e-9))
+    # The sentence sharing the most terms with the rest scores highest
+    assert features.sentence(int(np.argmax(scores))).startswith("Revenue and costs")
+    assert set(SCORERS) == {"length", "centroid"}
+    assert list(length_scores(features)) == [len(s.split()) for s in Document(TEXT).sentences]
+
+
+def test_unknown_scoring_is_reported():
+    output = Worker("w").compute({"type": "extract", "scoring": "nope"}, Document(TEXT))
+    assert output == {"result": "Unsupported scoring: nope", "confidence": 0.0}
@@ -0,0 +1,83 @@
+from functools import cached_property
+
+from worker.cache import ResultCache
+from worker.document import Document
+from worker.worker import Worker
+
+TEXT = (
+    "The quarterly report covers revenue growth across every region this year. "
+    "Operating costs fell because the new logistics contracts took effect early. "
+    "Customer retention improved after the support team expanded its hours."
+)
+
+
+def generate_task(**input_fields):
+    item = {"type": "extract", "result": "• Revenue grew.", "confidence": 0.8}
+    item.update(input_fields)
+    return {"type": "generate", "inputs": [item]}
+
+
+def test_generate_cache_key_covers_input_confidence_and_type():
+    worker = Worker("w", cache=ResultCache())
+    document = Document(TEXT)
+    key = worker.cache_key(generate_task(), document)
+
+    assert worker.cache_key(generate_task(), document) == key
+    assert worker.cache_key(generate_task(confidence=0.4), document) != key
+    assert worker.cache_key(generate_task(type="summarize"), document) != key
+    assert worker.cache_key(generate_task(result="• Costs fell."), document) != key
+
+
+def test_generate_does_not_replay_report_for_changed_upstream_confidence():
+    worker = Worker("w", cache=ResultCache())
+    document = Document(TEXT)
+
+    first = worker.compute(generate_task(confidence=0.9), document)
+    second = worker.compute(generate_task(confidence=0.3), document)
+
+    assert "(90% confidence)" in first["result"]
+    assert "(30% confidence)" in second["result"]
+    assert second["confidence"] < first["confidence"]
+    assert worker.cache.stats()["hits"] == 0
+    assert worker.compute(generate_task(confidence=0.3), document) == second
+    assert worker.cache.stats()["hits"] == 1
+
+
+class UnreadDocument(Document):
+    """Document that fails the test if a handler tokenizes it."""
+
+    @cached_property
+    def words(self):
+        raise AssertionError("document was tokenized")
+
+    @cached_property
+    def sentence_arrays(self):
+        raise AssertionError("document was tokenized")
+
+
+def test_generate_reports_on_its_inputs_without_reading_the_document():
+    output = Worker("w").compute(generate_task(result="Revenue grew in every region."), UnreadDocument(TEXT))
+
+    assert "Input length: 5 words" in output["result"]
+    assert "Revenue grew in every region." in output["result"]
+
+
+class CountingDocument(Document):
+    """Document recording how often its text is split into sentences."""
+
+    tokenized = 0
+
+    @cached_property
+    def sentence_arrays(self):
+        self.tokenized += 1
+        return Document.sentence_arrays.func(self)
+
+
+def test_handlers_share_one_tokenization_per_document():
+    document = CountingDocument(TEXT)
+    worker = Worker("w")
+
+    for task_type in ("summarize", "extract", "validate", "generate", "summarize"):
+        worker.compute({"type": task_type}, document)
+    assert document.tokenized == 1
+    assert worker.compute({"type": "summarize"}, TEXT) == worker.compute({"type": "summarize"}, document)
@@ -0,0 +1,39 @@
+import random
+import threading
+import time
+
+
+class FakeBackend:
+    """
+    Local stand-in for a remote (e.g. LLM) backend behind the handlers: every
+    handler run first waits an injected delay, so latency variance, deadlines
+    and hedging can be exercised without a model. Delays are `latency` seconds
+    (or latencies[task_type]) plus up to `jitter` more, and with probability
+    straggler_rate an extra `straggler` seconds. Waits end early, raising
+    Cancelled, when the attempt's CancellationToken fires.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, straggler_rate=0.0, straggler=1.0, latencies=None, seed=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.straggler_rate = straggler_rate
+        self.straggler = straggler
+        self.latencies = latencies or {}
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self, task_type: str) -> float:
+        with self._lock:
+            self.calls += 1
+            delay = self.latencies.get(task_type, self.latency) + self._random.uniform(0, self.jitter)
+            if self._random.random() < self.straggler_rate:
+                delay += self.straggler
+        return delay
+
+    def call(self, task_type: str, cancel=None):
+        delay = self.delay(task_type)
+        if cancel is None:
+            time.sleep(delay)
+        else:
+            cancel.sleep(delay)
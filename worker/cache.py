@@ -0,0 +1,72 @@
+import threading
+import time
+from collections import OrderedDict
+from observability.metrics import CACHE_LOOKUPS
+
+
+class ResultCache:
+    """
+    Content-addressed cache for deterministic Worker output.
+    Keys combine the document's content hash with the task type, so a plan
+    re-run against an unchanged document skips the handlers entirely.
+    Size-bounded with LRU eviction and an optional TTL (seconds).
+    """
+
+    def __init__(self, max_entries=256, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(document, task_type: str, *params) -> str:
+        return ":".join([document.digest, task_type, *(str(p) for p in params)])
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss or expired entry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                if self.ttl is None or time.monotonic() - stored_at < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    CACHE_LOOKUPS.inc(result="hit")
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            CACHE_LOOKUPS.inc(result="miss")
+            return None
+
+    def __contains__(self, key):
+        """Whether get(key) would hit, without counting a lookup or touching LRU order."""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and (self.ttl is None or time.monotonic() - entry[1] < self.ttl)
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
@@ -0,0 +1,76 @@
+import threading
+import time
+
+
+DEADLINE_EXCEEDED = "deadline exceeded"
+CANCELLED = "cancelled"
+
+
+class Cancelled(Exception):
+    """Raised by Worker execution when its CancellationToken fires."""
+
+    def __init__(self, reason=CANCELLED):
+        super().__init__(reason)
+        self.reason = reason
+
+
+class CancellationToken:
+    """
+    Cooperative cancellation with an optional deadline (time.monotonic() value).
+    A child token fires when its parent does, so cancelling a run stops every
+    task under it, while a task's own deadline only stops that task.
+    """
+
+    def __init__(self, deadline=None, parent=None):
+        self.deadline = deadline
+        self.parent = parent
+        self._event = threading.Event()
+        self._reason = None
+
+    def child(self, timeout=None) -> "CancellationToken":
+        deadline = time.monotonic() + timeout if timeout else None
+        return CancellationToken(deadline, parent=self)
+
+    def cancel(self, reason=CANCELLED):
+        if not self._event.is_set():
+            self._reason = reason
+            self._event.set()
+
+    @property
+    def reason(self):
+        """Why the token fired, or None while it is live."""
+        if self._event.is_set():
+            return self._reason
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            return DEADLINE_EXCEEDED
+        if self.parent is not None:
+            return self.parent.reason
+        return None
+
+    @property
+    def cancelled(self) -> bool:
+        return self.reason is not None
+
+    def remaining(self):
+        """Seconds until the nearest deadline in the chain, or None without one."""
+        own = None if self.deadline is None else max(0.0, self.deadline - time.monotonic())
+        inherited = self.parent.remaining() if self.parent is not None else None
+        if own is None or inherited is None:
+            return own if inherited is None else inherited
+        return min(own, inherited)
+
+    def raise_if_cancelled(self):
+        reason = self.reason
+        if reason is not None:
+            raise Cancelled(reason)
+
+    def sleep(self, seconds: float):
+        """Wait up to seconds, raising Cancelled as soon as the token fires."""
+        end = time.monotonic() + seconds
+        while True:
+            self.raise_if_cancelled()
+            left = end - time.monotonic()
+            if left <= 0:
+                return
+            # Own cancellation wakes this at once; ancestors and deadlines are polled
+            self._event.wait(min(left, 0.01))
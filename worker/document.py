@@ -0,0 +1,306 @@
+import hashlib
+import mmap
+import os
+import re
+from collections import Counter
+from contextlib import contextmanager
+from functools import cached_property
+from itertools import compress
+
+import numpy as np
+
+
+SENTENCE_BOUNDARY = re.compile(r'[.!?]+')
+TERM_PATTERN = re.compile(r'\b[a-zA-Z]{4,}\b')
+
+# Common stop words filtered out of keyword analysis
+STOP_WORDS = frozenset({
+    "that", "this", "with", "from", "have", "been", "were", "they",
+    "their", "will", "would", "could", "should", "about", "which",
+    "what", "when", "where", "there", "these", "those", "than",
+    "then", "also", "into", "some", "such", "each", "only"
+})
+
+# Terms and sentence boundaries in one scan: each boundary between two terms
+# advances the sentence they belong to. Bytes patterns scan ASCII text faster
+TERM_OR_BOUNDARY = re.compile(r'\b[a-zA-Z]{4,}\b|[.!?]+')
+TERM_OR_BOUNDARY_BYTES = re.compile(rb'\b[a-zA-Z]{4,}\b|[.!?]+')
+
+# Character classes for vectorized tokenization, indexed by code point; every
+# Unicode whitespace character is below U+3001, which stands for all the rest
+_OTHER, _SPACE, _TERMINATOR = 0, 1, 2
+_CHAR_CLASSES = np.array(
+    [_TERMINATOR if chr(c) in ".!?" else _SPACE if chr(c).isspace() else _OTHER for c in range(0x3002)],
+    dtype=np.uint8,
+)
+_ASCII_CLASSES = _CHAR_CLASSES[:128].tobytes() + bytes(128)
+
+# A run of sentence terminators followed by whitespace; chunks are cut right
+# after it so no sentence or word ever straddles two chunks
+SENTENCE_BREAK = re.compile(r'[.!?]+\s+')
+SENTENCE_BREAK_BYTES = re.compile(rb'[.!?]+\s+')
+
+
+def chunk_spans(text, chunk_size: int, pattern=SENTENCE_BREAK) -> list:
+    """Split text (str or bytes-like) into sentence-aligned (start, end) spans of roughly chunk_size."""
+    spans = []
+    start = 0
+    while start < len(text):
+        end = start + chunk_size
+        if end >= len(text):
+            end = len(text)
+        else:
+            match = pattern.search(text, end)
+            end = match.end() if match else len(text)
+        spans.append((start, end))
+        start = end
+    return spans
+
+
+def char_classes(text: str):
+    """_OTHER, _SPACE or _TERMINATOR for every character of text, as a uint8 array."""
+    if text.isascii():
+        return np.frombuffer(text.encode("ascii").translate(_ASCII_CLASSES), dtype=np.uint8)
+    codes = np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype=np.uint32)
+    return _CHAR_CLASSES[np.minimum(codes, len(_CHAR_CLASSES) - 1)]
+
+
+def read_chunk(ref) -> str:
+    """Resolve a chunk reference from Document.chunk_ref into text."""
+    if isinstance(ref, str):
+        return ref
+    path, start, end = ref
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            return view[start:end].decode("utf-8", "surrogatepass")
+
+
+class Document:
+    """
+    Pre-tokenized view of a document, built once per upload.
+    Every Worker handler reads sentences, words and term counts from here,
+    so the text is tokenized at most once regardless of tasks or retries.
+    Each view is computed lazily on first access and then cached.
+    """
+
+    def __init__(self, text: str):
+        self.text = text or ""
+        self._sentence_indices = {}
+
+    def __len__(self):
+        return len(self.text)
+
+    def __getstate__(self):
+        # Ship only the text to pool processes; they tokenize it themselves
+        return {"text": self.text, "_sentence_indices": {}}
+
+    @cached_property
+    def digest(self) -> str:
+        """Content hash used to key cached results."""
+        return hashlib.sha256(self.text.encode("utf-8", "surrogatepass")).hexdigest()
+
+    @cached_property
+    def is_empty(self) -> bool:
+        return len(self.text.strip()) == 0
+
+    @cached_property
+    def sentence_arrays(self) -> tuple:
+        """
+        (starts, ends, word_counts) arrays for `sentences`: the stripped pieces
+        between sentence boundaries, found with vectorized passes over the
+        text's character classes.
+        """
+        classes = char_classes(self.text)
+        size = len(classes)
+        # Terminator runs alternate start, end; pieces lie between them
+        edges = np.flatnonzero(np.diff(classes == _TERMINATOR, prepend=False, append=False))
+        piece_starts = np.concatenate(([0], edges[1::2]))
+        piece_ends = np.concatenate((edges[0::2], [size]))
+
+        # Strip whitespace: a piece starting inside a whitespace run starts
+        # where the run ends, and one ending inside a run ends where it starts
+        # (the padding makes space[-1] and space[size] False)
+        space = np.append(classes == _SPACE, False)
+        runs = np.flatnonzero(np.diff(space, prepend=False))
+        run_starts, run_ends = runs[0::2], runs[1::2]
+        starts, ends = piece_starts.copy(), piece_ends.copy()
+        leading = np.flatnonzero(space[piece_starts] & (piece_starts < piece_ends))
+        run = np.searchsorted(run_starts, piece_starts[leading], side="right") - 1
+        starts[leading] = np.minimum(run_ends[run], piece_ends[leading])
+        trailing = np.flatnonzero(space[piece_ends - 1] & (starts < piece_ends))
+        run = np.searchsorted(run_starts, piece_ends[trailing] - 1, side="right") - 1
+        ends[trailing] = run_starts[run]
+
+        # Pieces hold no terminators, so a word starts at each character of
+        # neither class that doesn't follow another one
+        word = classes == _OTHER
+        word[1:] &= classes[:-1] != _OTHER
+        word_starts = np.flatnonzero(word)
+        word_counts = np.searchsorted(word_starts, ends) - np.searchsorted(word_starts, starts)
+        return starts, ends, word_counts
+
+    @cached_property
+    def _sentence_spans(self) -> list:
+        """(start, end) offsets of the stripped pieces between sentence boundaries."""
+        starts, ends, _ = self.sentence_arrays
+        return list(zip(starts.tolist(), ends.tolist()))
+
+    @cached_property
+    def sentences(self) -> list:
+        """Every piece between sentence boundaries, stripped (may include empty pieces)."""
+        return [self.text[start:end] for start, end in self._sentence_spans]
+
+    @cached_property
+    def sentence_offsets(self) -> list:
+        """Character offsets of each entry in `sentences`."""
+        return list(self._sentence_spans)
+
+    @cached_property
+    def sentence_word_counts(self) -> np.ndarray:
+        """Whitespace-separated words in each entry of `sentences`, as an array."""
+        return self.sentence_arrays[2]
+
+    @cached_property
+    def sentence_terms(self) -> tuple:
+        """
+        (rows, ids, vocabulary) for every 4+ letter term of the lowercased
+        sentences, in order and stop words included: the index of its sentence
+        and of the term in vocabulary, which lists terms by first appearance.
+        One scan over the whole text finds terms and boundaries alike; a
+        term's sentence is the number of boundaries before it.
+        """
+        text = self.text.lower()
+        ascii = text.isascii()
+        if ascii:
+            tokens = TERM_OR_BOUNDARY_BYTES.findall(text.encode("ascii"))
+        else:
+            tokens = TERM_OR_BOUNDARY.findall(text)
+        is_term = np.fromiter(map(bytes.isalpha if ascii else str.isalpha, tokens), dtype=bool, count=len(tokens))
+        rows = np.cumsum(~is_term)[is_term]
+        terms = list(compress(tokens, is_term))
+
+        # setdefault leaves each term at its first position; rank those densely
+        seen = {}
+        first = np.fromiter(map(seen.setdefault, terms, range(len(terms))), dtype=np.int64, count=len(terms))
+        positions = sorted(seen.values())
+        ids = np.zeros(len(terms), dtype=np.int64)
+        ids[positions] = np.arange(len(positions))
+        vocabulary = [terms[p].decode("ascii") if ascii else terms[p] for p in positions]
+        return rows, ids[first], vocabulary
+
+    def sentence_indices(self, min_length: int) -> list:
+        """Indices of sentences longer than min_length characters, in document order."""
+        indices = self._sentence_indices.get(min_length)
+        if indices is None:
+            indices = [i for i, s in enumerate(self.sentences) if len(s) > min_length]
+            self._sentence_indices[min_length] = indices
+        return indices
+
+    def sentences_longer_than(self, min_length: int) -> list:
+        return [self.sentences[i] for i in self.sentence_indices(min_length)]
+
+    @cached_property
+    def sentence_features(self):
+        """SentenceFeatures arrays for vectorized scoring, indexed like `sentences`."""
+        from .scoring import SentenceFeatures
+        return SentenceFeatures.from_document(self)
+
+    @cached_property
+    def words(self) -> list:
+        return self.text.split()
+
+    @cached_property
+    def word_count(self) -> int:
+        return len(self.words)
+
+    @cached_property
+    def term_counts(self) -> Counter:
+        """Lowercase counts of words with 4+ letters."""
+        return Counter(TERM_PATTERN.findall(self.text.lower()))
+
+    def chunk_spans(self, chunk_size: int) -> list:
+        """Sentence-aligned (start, end) spans for chunked processing."""
+        return chunk_spans(self.text, chunk_size)
+
+    def chunk_text(self, start: int, end: int) -> str:
+        return self.text[start:end]
+
+    def chunk_ref(self, start: int, end: int):
+        """Picklable handle to a chunk, resolved with read_chunk in another process."""
+        return self.text[start:end]
+
+
+class MappedDocument(Document):
+    """
+    Document backed by a UTF-8 spool file and read through mmap.
+    Chunked access (chunk_spans, chunk_text, chunk_ref) decodes only the
+    requested byte range; documents large enough for map-reduce are only read
+    that way, chunk by chunk, so they are never held as one Python str.
+    Smaller ones are tokenized from `text` like any Document. Spans are byte offsets.
+    The file is mapped only for the length of each read, so a stored document
+    holds no file descriptor between runs.
+    """
+
+    def __init__(self, path: str, length: int = None):
+        self.path = path
+        self._length = length
+        self._sentence_indices = {}
+
+    def __len__(self):
+        if self._length is None:
+            self._length = sum(len(self.chunk_text(start, end)) for start, end in self.chunk_spans(1 << 20))
+        return self._length
+
+    def __getstate__(self):
+        # Ship only the path to other processes; they map the file themselves
+        return {"path": self.path, "_length": self._length, "_sentence_indices": {}}
+
+    @contextmanager
+    def _mapped(self):
+        """The spool file mapped read-only (b"" when empty), unmapped on exit."""
+        with open(self.path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                yield b""
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                yield view
+
+    @cached_property
+    def text(self) -> str:
+        with self._mapped() as view:
+            return view[:].decode("utf-8", "surrogatepass")
+
+    @cached_property
+    def digest(self) -> str:
+        digest = hashlib.sha256()
+        with self._mapped() as view:
+            for start in range(0, len(view), 1 << 20):
+                digest.update(view[start:start + (1 << 20)])
+        return digest.hexdigest()
+
+    @cached_property
+    def is_empty(self) -> bool:
+        return all(not self.chunk_text(start, end).strip() for start, end in self.chunk_spans(1 << 20))
+
+    def chunk_spans(self, chunk_size: int) -> list:
+        with self._mapped() as view:
+            return chunk_spans(view, chunk_size, SENTENCE_BREAK_BYTES)
+
+    def chunk_text(self, start: int, end: int) -> str:
+        with self._mapped() as view:
+            return view[start:end].decode("utf-8", "surrogatepass")
+
+    def chunk_ref(self, start: int, end: int):
+        return (self.path, start, end)
+
+    def resident_size(self) -> int:
+        """Characters currently materialized in memory."""
+        return len(self.__dict__["text"]) if "text" in self.__dict__ else 0
+
+    def release(self):
+        """Drop the materialized text and derived views; the file stays on disk."""
+        for name in ("text", "sentence_arrays", "_sentence_spans", "sentences", "sentence_offsets",
+                     "sentence_word_counts", "sentence_terms", "sentence_features", "words", "word_count",
+                     "term_counts"):
+            self.__dict__.pop(name, None)
+        self._sentence_indices = {}
@@ -0,0 +1,60 @@
+import math
+import threading
+from collections import deque
+
+
+class LatencyHistory:
+    """Recent attempt latencies per task type, bounded to the last `window` of each."""
+
+    def __init__(self, window=256):
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, task_type: str, seconds: float):
+        with self._lock:
+            samples = self._samples.get(task_type)
+            if samples is None:
+                samples = self._samples[task_type] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def count(self, task_type: str) -> int:
+        with self._lock:
+            return len(self._samples.get(task_type, ()))
+
+    def percentile(self, task_type: str, percent: float):
+        """Nearest-rank percentile of the recorded latencies, or None without samples."""
+        with self._lock:
+            samples = sorted(self._samples.get(task_type, ()))
+        if not samples:
+            return None
+        rank = math.ceil(percent / 100 * len(samples))
+        return samples[min(len(samples), max(1, rank)) - 1]
+
+
+class HedgePolicy:
+    """
+    Decides when a slow task attempt gets a duplicate ("hedge") running
+    alongside it. An attempt still running past the given percentile of its
+    task type's recent latencies is hedged; whichever copy first finishes at
+    or above the confidence threshold is kept and the other is cancelled.
+    Hedging is off without a percentile, and waits for min_samples latencies
+    of a type before hedging it. Each task gets at most max_hedges copies,
+    spaced by the same delay.
+    """
+
+    def __init__(self, percentile=None, min_samples=20, max_hedges=1, min_delay=0.0):
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.max_hedges = max_hedges
+        self.min_delay = min_delay
+
+    @property
+    def enabled(self) -> bool:
+        return self.percentile is not None and self.max_hedges > 0
+
+    def delay(self, history: LatencyHistory, task_type: str):
+        """Seconds after an attempt starts before it is hedged, or None if it shouldn't be."""
+        if not self.enabled or history.count(task_type) < self.min_samples:
+            return None
+        return max(self.min_delay, history.percentile(task_type, self.percentile))
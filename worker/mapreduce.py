@@ -0,0 +1,162 @@
+import os
+import threading
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from .document import Document, read_chunk
+from .scoring import length_scores, top_k
+from .worker import STOP_WORDS
+
+
+def map_chunk(task_type: str, chunk, is_last: bool) -> dict:
+    """
+    Map step: compute a handler's partial result over one chunk.
+    Runs in a pool process, so memory is bounded by the chunk size; chunk is a
+    Document.chunk_ref, so memory-mapped documents are read by the pool process itself.
+    """
+    text = read_chunk(chunk)
+    doc = Document(text)
+    partial = {"length": len(doc), "empty": doc.is_empty}
+
+    if task_type == "summarize":
+        features = doc.sentence_features
+        indices = features.longer_than(15)
+        partial["count"] = len(indices)
+        partial["first"] = features.sentence(indices[0]) if len(indices) else None
+        partial["last"] = features.sentence(indices[-1]) if len(indices) else None
+        partial["head"] = text[:200]
+
+    elif task_type == "extract":
+        features = doc.sentence_features
+        top = top_k(length_scores(features), 5, features.lengths > 10)
+        partial["top"] = [(int(features.word_counts[i]), int(i), features.sentence(i)) for i in top]
+
+    elif task_type == "analyze":
+        terms = doc.term_counts.copy()
+        for word in STOP_WORDS:
+            terms.pop(word, None)
+        partial["terms"] = terms
+
+    elif task_type in ("validate", "generate"):
+        partial["words"] = doc.word_count
+        # Every chunk but the last ends in whitespace after a boundary, which
+        # splits off an empty piece that the whole document wouldn't have
+        partial["pieces"] = len(doc.sentences) - (0 if is_last else 1)
+        sentences = doc.sentences_longer_than(10)
+        partial["count"] = len(sentences)
+        partial["first"] = sentences[:5]
+
+    return partial
+
+
+class MapReduceRunner:
+    """
+    Runs Worker handlers over very large documents as map-reduce.
+    The document is split into sentence-aligned chunks, each chunk is mapped
+    in a shared process pool, and the partials are merged by a handler-specific
+    reducer. Output matches the single-pass handler exactly.
+    """
+
+    def __init__(self, threshold=8 * 1024 * 1024, chunk_size=2 * 1024 * 1024, max_workers=None):
+        self.threshold = threshold
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def applies(self, document) -> bool:
+        return len(document) >= max(1, self.threshold)
+
+    def compute(self, worker, task: dict, document: Document, cancel=None) -> dict:
+        """
+        Deterministic handler output for task, computed chunk by chunk.
+        Raises Cancelled between chunks if the optional CancellationToken fires.
+        """
+        task_type = task.get("type", "")
+        spans = document.chunk_spans(self.chunk_size)
+        partials = list(self._map(task_type, document, spans, cancel))
+
+        if all(p["empty"] for p in partials):
+            return worker.compute(task, Document(""))
+
+        length = sum(p["length"] for p in partials)
+        reducer = getattr(self, f"_reduce_{task_type}")
+        return reducer(worker, task, document, spans, partials, length)
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+    def _map(self, task_type, document, spans, cancel=None):
+        """Map every chunk, keeping at most two chunks per process in flight."""
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            pool = self._pool
+
+        in_flight = deque()
+        try:
+            for i, (start, end) in enumerate(spans):
+                if cancel is not None:
+                    cancel.raise_if_cancelled()
+                if len(in_flight) >= self.max_workers * 2:
+                    yield in_flight.popleft().result()
+                chunk = document.chunk_ref(start, end)
+                in_flight.append(pool.submit(map_chunk, task_type, chunk, i == len(spans) - 1))
+            while in_flight:
+                if cancel is not None:
+                    cancel.raise_if_cancelled()
+                yield in_flight.popleft().result()
+        finally:
+            # Drop queued chunks of an abandoned map so the shared pool moves on
+            for future in in_flight:
+                future.cancel()
+
+    def _reduce_summarize(self, worker, task, document, spans, partials, length):
+        total = sum(p["count"] for p in partials)
+        if total == 0:
+            head = "".join(p["head"] for p in partials)[:200]
+            return {"result": head.strip(), "confidence": 0.5}
+
+        nonempty = [p for p in partials if p["count"]]
+        picks = [nonempty[0]["first"]]
+        if total > 2:
+            # Locate the middle sentence's chunk and re-read only that chunk
+            index = total // 2
+            for (start, end), p in zip(spans, partials):
+                if index < p["count"]:
+                    chunk = Document(document.chunk_text(start, end))
+                    picks.append(chunk.sentences_longer_than(15)[index])
+                    break
+                index -= p["count"]
+        if total > 1:
+            picks.append(nonempty[-1]["last"])
+
+        return worker._summary_output(length, picks)
+
+    def _reduce_extract(self, worker, task, document, spans, partials, length):
+        # Top-k merge; ties keep document order like the single-pass stable sort
+        candidates = [
+            (-words, chunk, index, sentence)
+            for chunk, p in enumerate(partials)
+            for words, index, sentence in p["top"]
+        ]
+        top = [sentence for _, _, _, sentence in sorted(candidates)[:5]]
+        return worker._extract_output(length, top)
+
+    def _reduce_analyze(self, worker, task, document, spans, partials, length):
+        # Counter.update preserves first-seen order, so most_common tie-breaks match
+        terms = Counter()
+        for p in partials:
+            terms.update(p["terms"])
+        return worker._analyze_output(terms.most_common(10))
+
+    def _reduce_validate(self, worker, task, document, spans, partials, length):
+        words = sum(p["words"] for p in partials)
+        return worker._validate_output(words, sum(p["pieces"] for p in partials))
+
+    def _reduce_generate(self, worker, task, document, spans, partials, length):
+        words = sum(p["words"] for p in partials)
+        first = [s for p in partials for s in p["first"]][:5]
+        return worker._report_output(length, words, first, sum(p["count"] for p in partials))
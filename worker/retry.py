@@ -0,0 +1,35 @@
+import random
+
+
+class RetryPolicy:
+    """
+    Decides whether and how a low-confidence task result is retried.
+
+    Deterministic handlers produce the same output on every run; only the
+    temperature noise drawn in Worker.apply_confidence differs, so a retry
+    redraws that noise against the existing output instead of re-executing.
+    Since noise only lowers confidence, the base confidence is the best any
+    retry can reach; when it is below the threshold retries stop early.
+    Non-deterministic handlers are re-executed after an exponential backoff
+    with full jitter.
+    """
+
+    def __init__(self, max_retries=2, backoff_base=0.5, backoff_max=10.0):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+    def best_confidence(self, output: dict, deterministic: bool) -> float:
+        """Highest confidence a retry of this output could produce."""
+        if not deterministic:
+            return 1.0
+        confidence = output.get("confidence", 0.0)
+        # apply_confidence floors noisy confidence at 0.1
+        return max(0.1, confidence) if output.get("noise") else confidence
+
+    def can_retry(self, output: dict, attempt: int, threshold: float, deterministic: bool) -> bool:
+        return attempt < self.max_retries and self.best_confidence(output, deterministic) >= threshold
+
+    def backoff(self, attempt: int) -> float:
+        """Seconds to wait before re-executing attempt + 1 (full jitter)."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
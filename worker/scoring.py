@@ -0,0 +1,145 @@
+from functools import cached_property
+
+import numpy as np
+from .document import STOP_WORDS
+
+
+class SentenceFeatures:
+    """
+    Per-sentence features of a Document as parallel NumPy arrays, indexed
+    like Document.sentences: offsets, character length, word count and
+    relative position. Word counts and term weights are built on first use
+    by scorers that need them, and top-k rankings are kept once computed.
+    """
+
+    def __init__(self, doc, starts, ends):
+        self.doc = doc
+        self.text = doc.text
+        self.starts = starts
+        self.ends = ends
+        self.lengths = ends - starts
+        count = len(starts)
+        self.positions = np.arange(count) / max(1, count - 1)
+        # (scoring, k, min_length) -> ranking, filled by ranking() and rank_batch()
+        self.rankings = {}
+
+    def __len__(self):
+        return len(self.lengths)
+
+    @classmethod
+    def from_document(cls, doc) -> "SentenceFeatures":
+        starts, ends, _ = doc.sentence_arrays
+        return cls(doc, starts, ends)
+
+    @cached_property
+    def word_counts(self):
+        return np.array(self.doc.sentence_word_counts, dtype=np.int64)
+
+    def sentence(self, i) -> str:
+        return self.text[self.starts[i]:self.ends[i]]
+
+    def longer_than(self, min_length: int):
+        """Indices of sentences longer than min_length characters, in document order."""
+        return np.flatnonzero(self.lengths > min_length)
+
+    def ranking(self, scoring: str, k: int, min_length: int = 0):
+        """top_k of a scorer's scores among sentences longer than min_length characters."""
+        key = (scoring, k, min_length)
+        ranking = self.rankings.get(key)
+        if ranking is None:
+            ranking = self.rankings[key] = top_k(SCORERS[scoring](self), k, self.lengths > min_length)
+        return ranking
+
+    @cached_property
+    def term_weights(self):
+        """
+        Sparse tf-idf sentence-term matrix as (rows, columns, weights, width),
+        one entry per distinct term in each sentence, over 4+ letter non-stop words.
+        """
+        rows, ids, vocabulary = self.doc.sentence_terms
+        stop = np.fromiter((term in STOP_WORDS for term in vocabulary), dtype=bool, count=len(vocabulary))
+        # Renumber the remaining terms, keeping their order
+        columns = (np.cumsum(~stop) - 1)[ids]
+        kept = ~stop[ids]
+        rows, columns = rows[kept], columns[kept]
+
+        width = max(1, len(vocabulary) - int(stop.sum()))
+        keys, tf = np.unique(rows * width + columns, return_counts=True)
+        rows, columns = keys // width, keys % width
+        df = np.bincount(columns, minlength=width)
+        idf = np.log((1 + len(self)) / (1 + df)) + 1
+        return rows, columns, tf * idf[columns], width
+
+
+def length_scores(features: SentenceFeatures):
+    """Longer sentences are more informative: score by word count."""
+    return features.word_counts.astype(np.float64)
+
+
+def centroid_scores(features: SentenceFeatures):
+    """Cosine similarity of each sentence's tf-idf vector to the document centroid."""
+    rows, columns, weights, width = features.term_weights
+    count = len(features)
+    if not len(rows):
+        return np.zeros(count)
+    centroid = np.bincount(columns, weights, minlength=width) / max(1, count)
+    dots = np.bincount(rows, weights * centroid[columns], minlength=count)
+    norms = np.sqrt(np.bincount(rows, weights * weights, minlength=count)) * np.linalg.norm(centroid)
+    return np.divide(dots, norms, out=np.zeros(count), where=norms > 0)
+
+
+# Sentence scorers selectable per task through its "scoring" field
+SCORERS = {
+    "length": length_scores,
+    "centroid": centroid_scores,
+}
+
+DEFAULT_SCORER = "length"
+
+
+def top_k(scores, k: int, eligible=None):
+    """
+    Indices of the k highest scores among eligible entries, best first with
+    ties in index order (like a stable descending sort), via argpartition.
+    """
+    candidates = np.flatnonzero(eligible) if eligible is not None else np.arange(len(scores))
+    if k <= 0 or not len(candidates):
+        return candidates[:0]
+    values = scores[candidates]
+    if k < len(candidates):
+        # Keep everything tied with the k-th best so the tie-break stays exact
+        kth = -np.partition(-values, k - 1)[k - 1]
+        keep = values >= kth
+        candidates, values = candidates[keep], values[keep]
+    return candidates[np.argsort(-values, kind="stable")[:k]]
+
+
+
+def rank_batch(features_list: list, k: int, scoring=DEFAULT_SCORER, min_length=0) -> list:
+    """
+    Rankings of many documents in one pass: their scores are concatenated and
+    sorted together, grouped by source document. Returns one index array per
+    document, each ordered like top_k, and keeps it in that document's rankings.
+    """
+    if not features_list:
+        return []
+    scorer = SCORERS[scoring]
+    scores = np.concatenate([scorer(f) for f in features_list])
+    lengths = np.concatenate([f.lengths for f in features_list])
+    source = np.repeat(np.arange(len(features_list)), [len(f) for f in features_list])
+    index = np.concatenate([np.arange(len(f)) for f in features_list])
+
+    eligible = np.flatnonzero(lengths > min_length)
+    order = eligible[np.lexsort((index[eligible], -scores[eligible], source[eligible]))]
+    # Rank within each document: position in order minus where its group starts
+    groups = source[order]
+    first = np.searchsorted(groups, np.arange(len(features_list)))
+    selected = order[np.arange(len(order)) - first[groups] < k]
+    bounds = np.searchsorted(source[selected], np.arange(len(features_list) + 1))
+
+    rankings = []
+    for i, features in enumerate(features_list):
+        ranking = index[selected[bounds[i]:bounds[i + 1]]]
+        features.rankings[(scoring, k, min_length)] = ranking
+        rankings.append(ranking)
+    return rankings
@@ -1,18 +1,51 @@
+import hashlib
 import random
-import re
-from collections import Counter
+import time
+from .document import STOP_WORDS, Document
+from .scoring import DEFAULT_SCORER, SCORERS, rank_batch
 
 
 class Worker:
-    def __init__(self, name, temperature=0.5):
+    # Handlers that build on upstream task outputs (task["inputs"]) rather than the raw document
+    UPSTREAM_CONSUMERS = frozenset({"generate"})
+    # Handlers whose output can change between runs (e.g. model-backed); retries re-execute
+    # these, while every other handler only has its confidence noise redrawn
+    NON_DETERMINISTIC = frozenset()
+    # Handlers answered from the corpus index's term statistics when it covers the document
+    INDEXED = frozenset({"analyze", "validate"})
+
+    def __init__(self, name, temperature=0.5, cache=None, map_reduce=None, index=None, cost_model=None,
+                 backend=None):
         self.name = name
         self.temperature = temperature
+        # Optional ResultCache shared across workers for deterministic handler output
+        self.cache = cache
+        # Optional MapReduceRunner used instead of the handler for very large documents
+        self.map_reduce = map_reduce
+        # Optional CorpusIndex; indexed documents skip the rescan for INDEXED handlers
+        self.index = index
+        # Optional CostModel calibrated with the time of every handler run
+        self.cost_model = cost_model
+        # Optional backend called before each handler run (e.g. FakeBackend's injected delays)
+        self.backend = backend
 
-    def execute(self, task: dict, document_text: str) -> dict:
+    def execute(self, task: dict, document) -> dict:
         """
-        Execute a task on the given document text.
+        Execute a task on the given Document (or raw document text).
         Returns { "result": str, "confidence": float }
         """
+        return self.apply_confidence(self.compute(task, document))
+
+    def compute(self, task: dict, document, cancel=None) -> dict:
+        """
+        Deterministic part of execute: handler output with its base confidence,
+        before temperature noise. Served from the result cache when available.
+        Raises Cancelled if the optional CancellationToken fires first.
+        Returns { "result": str, "confidence": float, "noise": float }
+        """
+        if not isinstance(document, Document):
+            document = Document(document)
+
         task_type = task.get("type", "")
         handlers = {
             "summarize": self._summarize,
@@ -29,80 +62,212 @@ class Worker:
                 "confidence": 0.0
             }
 
-        return handler(document_text, task)
+        if cancel is not None:
+            cancel.raise_if_cancelled()
+
+        output = self.indexed_output(task, document)
+        if output is not None:
+            return output
+
+        # Map-reduce partials are ranked by word count, so other scorers see the whole
+        # document; reports built from upstream outputs don't read it at all
+        scored = task.get("scoring", DEFAULT_SCORER) != DEFAULT_SCORER
+        from_inputs = task_type in self.UPSTREAM_CONSUMERS and bool(task.get("inputs"))
+        if self.map_reduce is not None and not scored and not from_inputs and self.map_reduce.applies(document):
+            run = lambda: self.map_reduce.compute(self, task, document, cancel)
+        else:
+            run = lambda: handler(document, task)
+        if self.backend is not None:
+            run = self._via_backend(task_type, cancel, run)
+        run = self._timed(task_type, document, run)
+
+        key = self.cache_key(task, document)
+        if key is None:
+            return run()
+
+        output = self.cache.get(key)
+        if output is None:
+            output = run()
+            self.cache.put(key, output)
+        return output
+
+    def _via_backend(self, task_type, cancel, run):
+        """run, preceded by a backend call (which may raise Cancelled)."""
+        def call():
+            self.backend.call(task_type, cancel)
+            return run()
+        return call
+
+    def _timed(self, task_type, document, run):
+        """run, recording its duration in the cost model when there is one."""
+        if self.cost_model is None:
+            return run
+
+        def timed():
+            started = time.perf_counter()
+            output = run()
+            self.cost_model.record(task_type, len(document), time.perf_counter() - started)
+            return output
+        return timed
+
+    def indexed_output(self, task: dict, document):
+        """
+        Handler output computed from the corpus index instead of the text, or
+        None when the handler or document isn't indexed. Matches the handler exactly.
+        """
+        task_type = task.get("type", "")
+        path = getattr(document, "path", None)
+        if self.index is None or task_type not in self.INDEXED or path is None:
+            return None
+        stats = self.index.stats(path)
+        if stats is None:
+            return None
+
+        if task_type == "analyze":
+            if stats.empty:
+                return {"result": "No content to analyze.", "confidence": 0.1}
+            terms = stats.term_counts
+            for word in STOP_WORDS:
+                terms.pop(word, None)
+            return self._analyze_output(terms.most_common(10))
+
+        if stats.empty:
+            return {"result": "No content to validate.", "confidence": 0.1}
+        return self._validate_output(stats.words, stats.pieces)
+
+    def cache_key(self, task: dict, document):
+        """
+        Result-cache key for a task, or None when caching doesn't apply:
+        without a cache, or for non-deterministic handlers, whose retries
+        must re-execute rather than replay a cached output.
+        """
+        if self.cache is None or not self.is_deterministic(task):
+            return None
 
-    def _summarize(self, text: str, task: dict) -> dict:
+        task_type = task.get("type", "")
+        if task_type in self.UPSTREAM_CONSUMERS and task.get("inputs"):
+            # The report prints each input's type and confidence and averages the latter
+            digest = hashlib.sha256()
+            for item in task["inputs"]:
+                digest.update(str(item.get("type", "")).encode("utf-8", "surrogatepass"))
+                digest.update(b"\0")
+                digest.update(repr(float(item.get("confidence", 0))).encode("ascii"))
+                digest.update(b"\0")
+                digest.update(item.get("result", "").encode("utf-8", "surrogatepass"))
+                digest.update(b"\0")
+            return self.cache.make_key(document, task_type, digest.hexdigest())
+        if task.get("scoring", DEFAULT_SCORER) != DEFAULT_SCORER:
+            return self.cache.make_key(document, task_type, task["scoring"])
+        return self.cache.make_key(document, task_type)
+
+    def is_deterministic(self, task: dict) -> bool:
+        return task.get("type", "") not in self.NON_DETERMINISTIC
+
+    def apply_confidence(self, output: dict) -> dict:
+        """Apply temperature noise to a computed output's base confidence."""
+        confidence = output["confidence"]
+        noise_scale = output.get("noise", 0)
+        if noise_scale:
+            noise = random.uniform(0, self.temperature * noise_scale)
+            confidence = round(max(0.1, confidence - noise), 2)
+        return {"result": output["result"], "confidence": confidence}
+
+    def _summarize(self, doc: Document, task: dict) -> dict:
         """Extract a summary from the text."""
-        if not text or len(text.strip()) == 0:
+        if doc.is_empty:
             return {"result": "No content to summarize.", "confidence": 0.1}
 
-        sentences = re.split(r'[.!?]+', text)
-        sentences = [s.strip() for s in sentences if len(s.strip()) > 15]
+        features = doc.sentence_features
+        indices = features.longer_than(15)
 
-        if len(sentences) == 0:
-            return {"result": text[:200].strip(), "confidence": 0.5}
+        if len(indices) == 0:
+            return {"result": doc.text[:200].strip(), "confidence": 0.5}
 
         # Pick first + middle + last sentence for a simple summary
         picks = []
-        picks.append(sentences[0])
-        if len(sentences) > 2:
-            picks.append(sentences[len(sentences) // 2])
-        if len(sentences) > 1:
-            picks.append(sentences[-1])
+        picks.append(features.sentence(indices[0]))
+        if len(indices) > 2:
+            picks.append(features.sentence(indices[len(indices) // 2]))
+        if len(indices) > 1:
+            picks.append(features.sentence(indices[-1]))
+
+        return self._summary_output(len(doc), picks)
 
+    def _summary_output(self, input_len: int, picks: list) -> dict:
         summary = ". ".join(picks) + "."
-        confidence = self._compute_confidence(len(text), len(summary))
-        return {"result": summary, "confidence": confidence}
+        confidence = self._compute_confidence(input_len, len(summary))
+        return {"result": summary, "confidence": confidence, "noise": 0.3}
 
-    def _extract(self, text: str, task: dict) -> dict:
+    def _extract(self, doc: Document, task: dict) -> dict:
         """Extract key sentences from the text."""
-        if not text or len(text.strip()) == 0:
+        if doc.is_empty:
             return {"result": "No content to extract from.", "confidence": 0.1}
 
-        sentences = re.split(r'[.!?]+', text)
-        sentences = [s.strip() for s in sentences if len(s.strip()) > 10]
+        # Score sentences with the task's scorer (default: word count, longer = more informative)
+        scoring = task.get("scoring", DEFAULT_SCORER)
+        if scoring not in SCORERS:
+            return {"result": f"Unsupported scoring: {scoring}", "confidence": 0.0}
+
+        features = doc.sentence_features
+        top = [features.sentence(i) for i in features.ranking(scoring, 5, 10)]
 
-        # Score sentences by word count (longer = more informative, simplistic heuristic)
-        scored = sorted(sentences, key=lambda s: len(s.split()), reverse=True)
-        top = scored[:min(5, len(scored))]
+        return self._extract_output(len(doc), top)
 
+    def rank_extracts(self, jobs: list):
+        """
+        Rank sentences for several (extract task, document) pairs with one
+        rank_batch per scorer, e.g. the per-source extracts of a compare plan;
+        their handler runs then reuse those rankings. Pairs whose output comes
+        from the cache or map-reduce instead are left out.
+        """
+        batches = {}
+        for task, document in jobs:
+            scoring = task.get("scoring", DEFAULT_SCORER)
+            if scoring not in SCORERS or not self.is_deterministic(task) or document.is_empty:
+                continue
+            if scoring == DEFAULT_SCORER and self.map_reduce is not None and self.map_reduce.applies(document):
+                continue
+            key = self.cache_key(task, document)
+            if key is not None and key in self.cache:
+                continue
+            batches.setdefault(scoring, {})[id(document)] = document
+
+        for scoring, documents in batches.items():
+            rank_batch([doc.sentence_features for doc in documents.values()], 5, scoring, 10)
+
+    def _extract_output(self, input_len: int, top: list) -> dict:
         result = "\n".join(f"• {s}." for s in top)
-        confidence = self._compute_confidence(len(text), len(result))
-        return {"result": result, "confidence": confidence}
+        confidence = self._compute_confidence(input_len, len(result))
+        return {"result": result, "confidence": confidence, "noise": 0.3}
 
-    def _analyze(self, text: str, task: dict) -> dict:
+    def _analyze(self, doc: Document, task: dict) -> dict:
         """Basic keyword frequency analysis."""
-        if not text or len(text.strip()) == 0:
+        if doc.is_empty:
             return {"result": "No content to analyze.", "confidence": 0.1}
 
-        words = re.findall(r'\b[a-zA-Z]{4,}\b', text.lower())
         # Filter out common stop words
-        stop_words = {
-            "that", "this", "with", "from", "have", "been", "were", "they",
-            "their", "will", "would", "could", "should", "about", "which",
-            "what", "when", "where", "there", "these", "those", "than",
-            "then", "also", "into", "some", "such", "each", "only"
-        }
-        words = [w for w in words if w not in stop_words]
-        freq = Counter(words).most_common(10)
+        terms = doc.term_counts.copy()
+        for word in STOP_WORDS:
+            terms.pop(word, None)
+        return self._analyze_output(terms.most_common(10))
 
+    def _analyze_output(self, freq: list) -> dict:
         if not freq:
             return {"result": "Could not extract meaningful terms.", "confidence": 0.3}
 
         lines = [f"• {word}: {count} occurrences" for word, count in freq]
         result = "Key terms found:\n" + "\n".join(lines)
-        confidence = self._compute_confidence(len(text), len(freq))
         return {"result": result, "confidence": min(0.95, 0.6 + len(freq) * 0.03)}
 
-    def _validate(self, text: str, task: dict) -> dict:
+    def _validate(self, doc: Document, task: dict) -> dict:
         """Basic structural validation of the text."""
-        if not text or len(text.strip()) == 0:
+        if doc.is_empty:
             return {"result": "No content to validate.", "confidence": 0.1}
 
-        checks = []
-        word_count = len(text.split())
-        sentence_count = len(re.split(r'[.!?]+', text))
+        return self._validate_output(doc.word_count, len(doc.sentences))
 
+    def _validate_output(self, word_count: int, sentence_count: int) -> dict:
+        checks = []
         checks.append(f"Word count: {word_count}")
         checks.append(f"Sentence count: {sentence_count}")
         checks.append(f"Avg words/sentence: {word_count // max(1, sentence_count)}")
@@ -118,40 +283,60 @@ class Worker:
             confidence = 0.85
 
         result = "Validation report:\n" + "\n".join(f"• {c}" for c in checks)
-        noise = random.uniform(0, self.temperature * 0.2)
-        return {"result": result, "confidence": round(max(0.1, confidence - noise), 2)}
+        return {"result": result, "confidence": confidence, "noise": 0.2}
 
-    def _generate(self, text: str, task: dict) -> dict:
+    def _generate(self, doc: Document, task: dict) -> dict:
         """Generate a formatted output based on available data."""
-        if not text or len(text.strip()) == 0:
+        if task.get("inputs"):
+            return self._generate_from_inputs(task["inputs"])
+
+        if doc.is_empty:
             return {"result": "No content to generate from.", "confidence": 0.1}
 
-        sentences = re.split(r'[.!?]+', text)
-        sentences = [s.strip() for s in sentences if len(s.strip()) > 10]
-        word_count = len(text.split())
+        sentences = doc.sentences_longer_than(10)
+        return self._report_output(len(doc), doc.word_count, sentences[:5], len(sentences))
 
+    def _report_output(self, input_len: int, word_count: int, sections: list, sentence_count: int) -> dict:
         report = []
         report.append("=== Generated Report ===")
         report.append(f"Source length: {word_count} words")
-        report.append(f"Sections identified: {min(len(sentences), 5)}")
+        report.append(f"Sections identified: {min(sentence_count, 5)}")
         report.append("")
 
-        for i, s in enumerate(sentences[:5]):
+        for i, s in enumerate(sections):
             report.append(f"[{i+1}] {s}.")
 
         report.append("")
         report.append("=== End of Report ===")
 
-        confidence = self._compute_confidence(len(text), len(sentences))
-        return {"result": "\n".join(report), "confidence": confidence}
+        confidence = self._compute_confidence(input_len, sentence_count)
+        return {"result": "\n".join(report), "confidence": confidence, "noise": 0.3}
+
+    def _generate_from_inputs(self, inputs: list) -> dict:
+        """Compose a report from upstream task outputs; it is only as reliable as they are."""
+        word_count = sum(len(item.get("result", "").split()) for item in inputs)
+        report = []
+        report.append("=== Generated Report ===")
+        report.append(f"Input length: {word_count} words")
+        report.append(f"Sections identified: {len(inputs)}")
+
+        for i, item in enumerate(inputs):
+            report.append("")
+            report.append(f"[{i+1}] {item.get('type', 'input').title()} ({item.get('confidence', 0):.0%} confidence)")
+            report.append(item.get("result", ""))
+
+        report.append("")
+        report.append("=== End of Report ===")
+
+        confidence = sum(item.get("confidence", 0) for item in inputs) / len(inputs)
+        return {"result": "\n".join(report), "confidence": min(0.95, confidence), "noise": 0.3}
 
     def _compute_confidence(self, input_len: int, output_metric) -> float:
-        """Compute confidence based on input/output ratio with temperature noise."""
+        """Compute base confidence from the input/output ratio (noise is applied in apply_confidence)."""
         if isinstance(output_metric, int):
             base = min(0.95, 0.5 + output_metric * 0.05)
         else:
             ratio = output_metric / max(1, input_len)
             base = min(0.95, 0.5 + ratio * 2)
 
-        noise = random.uniform(0, self.temperature * 0.3)
-        return round(max(0.1, base - noise), 2)
\ No newline at end of file
+        return base
\ No newline at end of file